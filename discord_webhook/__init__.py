@@ -1,5 +1,78 @@
-__all__ = ["DiscordWebhook", "DiscordEmbed", "AsyncDiscordWebhook"]
+__all__ = [
+    "DiscordWebhook",
+    "DiscordEmbed",
+    "AsyncDiscordWebhook",
+    "AttachmentCache",
+    "AttachmentPreprocessor",
+    "BulkJob",
+    "BulkProgress",
+    "DiscordLogHandler",
+    "FairSender",
+    "AsyncFairSender",
+    "MessageDeduplicator",
+    "MessageIndex",
+    "PreparedMessage",
+    "Priority",
+    "ProxyPool",
+    "ProxyPoolTransport",
+    "AsyncProxyPoolTransport",
+    "PrioritySender",
+    "AsyncPrioritySender",
+    "RateLimiter",
+    "Relay",
+    "RelayClient",
+    "ReportBuilder",
+    "ShardedSender",
+    "Scheduler",
+    "AsyncScheduler",
+    "ThreadResolver",
+    "WebhookPool",
+    "ConnectionWarmer",
+    "AsyncConnectionWarmer",
+    "Transport",
+    "AsyncTransport",
+    "RequestsTransport",
+    "HttpxTransport",
+    "AsyncHttpxTransport",
+    "Urllib3Transport",
+    "ThreadLocalTransport",
+    "FakeTransport",
+    "AsyncFakeTransport",
+    "AdaptiveLimiter",
+    "AdaptiveTransport",
+    "AsyncAdaptiveTransport",
+]
 
 
 from .webhook import DiscordWebhook, DiscordEmbed
 from .async_webhook import AsyncDiscordWebhook
+from .bulk import BulkJob, BulkProgress
+from .cache import AttachmentCache
+from .concurrency import AdaptiveLimiter, AdaptiveTransport, AsyncAdaptiveTransport
+from .dedup import MessageDeduplicator
+from .fair import AsyncFairSender, FairSender
+from .log_handler import DiscordLogHandler
+from .message_index import MessageIndex
+from .prepared import PreparedMessage
+from .preprocessing import AttachmentPreprocessor
+from .priority import AsyncPrioritySender, Priority, PrioritySender
+from .pool import WebhookPool
+from .proxy import AsyncProxyPoolTransport, ProxyPool, ProxyPoolTransport
+from .rate_limit import RateLimiter
+from .relay import Relay, RelayClient
+from .report import ReportBuilder
+from .sharding import ShardedSender
+from .scheduler import AsyncScheduler, Scheduler
+from .threads import ThreadResolver
+from .transport import (
+    AsyncFakeTransport,
+    AsyncHttpxTransport,
+    AsyncTransport,
+    FakeTransport,
+    HttpxTransport,
+    RequestsTransport,
+    ThreadLocalTransport,
+    Transport,
+    Urllib3Transport,
+)
+from .warmup import AsyncConnectionWarmer, ConnectionWarmer
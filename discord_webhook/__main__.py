@@ -3,21 +3,48 @@ import argparse
 import sys
 
 from discord_webhook import DiscordWebhook
+from discord_webhook.relay import DEFAULT_HOST, DEFAULT_PORT, Relay
 
 
 def main() -> bool:
     parser = argparse.ArgumentParser(
         prog="discord_webhook", description="Trigger discord webhook(s)."
     )
-    parser.add_argument("-u", "--url", required=True, help="Webhook URL")
-    parser.add_argument("-c", "--content", required=True, help="Message content")
+    parser.add_argument("-u", "--url", help="Webhook URL")
+    parser.add_argument("-c", "--content", help="Message content")
     parser.add_argument(
         "--username", default=None, help="override the default username of the webhook"
     )
     parser.add_argument(
         "--avatar_url", default=None, help="override the default avatar of the webhook"
     )
+    parser.add_argument(
+        "--relay",
+        action="store_true",
+        help="run a relay that other processes send their webhooks through",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="host of the relay")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="port of the relay"
+    )
+    parser.add_argument(
+        "--socket", default=None, help="unix socket of the relay instead of a port"
+    )
+    parser.add_argument(
+        "--queue", default=None, help="SQLite file of the durable relay queue"
+    )
     args = parser.parse_args()
+    if args.relay:
+        relay = Relay(args.host, args.port, args.socket, args.queue)
+        try:
+            relay.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            relay.close()
+        return True
+    if not args.url or not args.content:
+        parser.error("the following arguments are required: -u/--url, -c/--content")
     webhook = DiscordWebhook(
         url=args.url,
         content=args.content,
@@ -0,0 +1,127 @@
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, AsyncIterator, Dict, Tuple, Union
+
+try:
+    import anyio
+except ImportError:  # pragma: nocover
+    # anyio is installed together with httpx, the async extra of the package.
+    pass
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AsyncFileSource(ABC):
+    """
+    Attachment whose content is read while it is uploaded.
+    """
+
+    @abstractmethod
+    def chunks(self) -> AsyncIterator[bytes]:
+        """
+        Read the content of the attachment.
+        :return: async iterator of bytes
+        """
+
+
+class PathFileSource(AsyncFileSource):
+    """
+    Attachment that is streamed from a file without blocking the event loop.
+    The file is read again if the upload is retried.
+    """
+
+    def __init__(
+        self, path: Union[str, "os.PathLike[str]"], chunk_size: int = CHUNK_SIZE
+    ) -> None:
+        """
+        Init path file source.
+        :param path: path of the file
+        :param int chunk_size: bytes read at once
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(self.path, "rb") as file:
+            while chunk := await file.read(self.chunk_size):
+                yield chunk
+
+
+class StreamFileSource(AsyncFileSource):
+    """
+    Attachment that is streamed from an async iterator of bytes.
+    An iterator can only be consumed once, so the upload can't be retried.
+    """
+
+    def __init__(self, stream: AsyncIterable[bytes]) -> None:
+        """
+        Init stream file source.
+        :param stream: async iterable of bytes
+        """
+        self.stream = stream
+        self.consumed = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        if self.consumed:
+            raise RuntimeError(
+                "The attachment stream has already been uploaded and can't be sent"
+                " again, e.g. after being rate limited."
+            )
+        self.consumed = True
+        async for chunk in self.stream:
+            yield chunk
+
+
+def multipart_boundary() -> str:
+    return uuid.uuid4().hex
+
+
+async def multipart_stream(
+    boundary: str,
+    payload: Dict,
+    files: Dict[str, Tuple[str, Union[bytes, str]]],
+    file_sources: Dict[str, Tuple[str, AsyncFileSource]],
+) -> AsyncIterator[bytes]:
+    """
+    Encode the webhook as multipart/form-data while reading the file sources.
+    :param str boundary: multipart boundary
+    :param dict payload: JSON payload of the webhook
+    :param dict files: files that are already in memory
+    :param dict file_sources: files that are read during the upload
+    :return: async iterator of the request body
+    """
+    delimiter = f"--{boundary}\r\n".encode("ascii")
+    yield delimiter
+    yield b'Content-Disposition: form-data; name="payload_json"\r\n'
+    yield b"Content-Type: application/json\r\n\r\n"
+    yield json.dumps(payload).encode("utf-8")
+    yield b"\r\n"
+    for name, (filename, file) in files.items():
+        if filename is None:
+            continue
+        yield delimiter
+        yield _file_headers(name, filename)
+        yield file.encode("utf-8") if isinstance(file, str) else file
+        yield b"\r\n"
+    for name, (filename, source) in file_sources.items():
+        yield delimiter
+        yield _file_headers(name, filename)
+        async for chunk in source.chunks():
+            yield chunk
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode("ascii")
+
+
+def _file_headers(name: str, filename: str) -> bytes:
+    name = _quote(name)
+    filename = _quote(filename)
+    return (
+        f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode("utf-8")
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', "%22").replace("\r\n", "%0D%0A")
@@ -1,11 +1,28 @@
 import asyncio
-import json
 import logging
+import os
 from contextlib import asynccontextmanager
 from functools import partial
-from http.client import HTTPException
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Tuple, Union
 
 from . import DiscordWebhook
+from .bulk import BulkProgress, Target
+from .async_files import (
+    AsyncFileSource,
+    PathFileSource,
+    StreamFileSource,
+    multipart_boundary,
+    multipart_stream,
+)
+from .transport import (
+    AsyncHttpxTransport,
+    AsyncTransport,
+    Request,
+    httpx_proxy,
+    log_response,
+    retry_delay,
+    send_request_async,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +39,19 @@ class AsyncDiscordWebhook(DiscordWebhook):
     Async version of DiscordWebhook.
     """
 
+    client: Optional["httpx.AsyncClient"]
+    file_sources: Dict[str, Tuple[str, AsyncFileSource]]
+
     def __init__(self, *args, **kwargs):
+        """
+        Init async webhook for Discord.
+        Accepts the same arguments as DiscordWebhook.
+        :keyword httpx.AsyncClient client: client whose connections are reused
+        :keyword AsyncTransport transport: sends the requests instead of httpx
+        """
         super().__init__(*args, **kwargs)
+        self.client = kwargs.get("client")
+        self.file_sources = {}
         try:
             import httpx  # noqa
         except ImportError:  # pragma: nocover
@@ -40,38 +68,116 @@ class AsyncDiscordWebhook(DiscordWebhook):
         Example:
             async with self.http_client as client:
                 client.post(url, data=data)
-        It will automatically close the client when the context is exited.
+        It will automatically close the client when the context is exited,
+        unless the client was passed with the `client` keyword.
         :return: httpx.AsyncClient
         """
-        client = httpx.AsyncClient(proxy=self.proxies)
+        if self.client is not None:
+            yield self.client
+            return
+        client = httpx.AsyncClient(proxy=httpx_proxy(self.proxies))
         yield client
         await client.aclose()
 
+    def add_file_from_path(
+        self, path: Union[str, "os.PathLike[str]"], filename: Optional[str] = None
+    ) -> None:
+        """
+        Add a file that is streamed from disk during the upload without blocking
+        the event loop.
+        :param path: path of the file
+        :param str filename: (optional) filename, defaults to the name of the file
+        """
+        filename = filename or os.path.basename(path)
+        self.file_sources[f"_{filename}"] = (filename, PathFileSource(path))
+
+    def add_file_stream(self, stream: AsyncIterable[bytes], filename: str) -> None:
+        """
+        Add a file whose content is streamed from an async iterator of bytes.
+        The stream can only be uploaded once.
+        :param stream: async iterable of bytes
+        :param str filename: filename
+        """
+        self.file_sources[f"_{filename}"] = (filename, StreamFileSource(stream))
+
+    def remove_file(self, filename: str) -> None:
+        """
+        Remove the file by the given filename if it exists.
+        :param str filename: filename
+        """
+        self.file_sources.pop(f"_{filename}", None)
+        super().remove_file(filename)
+
+    def remove_files(self, clear_attachments: bool = True) -> None:
+        """
+        Remove all files and optionally clear the attachments.
+        :param bool clear_attachments: Clear the attachments
+        """
+        self.file_sources = {}
+        super().remove_files(clear_attachments=clear_attachments)
+
+    def _has_files(self) -> bool:
+        return bool(self.files) or bool(self.file_sources)
+
+    async def preprocess_files(self, preprocessor) -> List["AsyncDiscordWebhook"]:
+        """
+        Compress, downscale or split the added files without blocking the event loop.
+        Files that don't fit into this message are moved to follow-up messages.
+        :param AttachmentPreprocessor preprocessor: preprocessor of the files
+        :return: follow-up webhooks with the remaining files, they have to be
+        executed after this webhook. If this webhook creates a thread with
+        `thread_name`, set the `thread_id` of the follow-ups to the `channel_id`
+        of its response
+        """
+        referenced = self._referenced_files()
+        files = await preprocessor.process_async(self.files, referenced)
+        follow_ups = self._split_files(preprocessor.batch(files, referenced))
+        for follow_up in follow_ups:
+            # streamed files are only uploaded with the first message
+            follow_up.file_sources = {}
+        return follow_ups
+
+    @property
+    def _transport(self) -> AsyncTransport:
+        """
+        Transport that sends the requests, httpx is used if no transport is set.
+        :return: AsyncTransport
+        """
+        return self.transport or AsyncHttpxTransport(
+            self.client, proxy=httpx_proxy(self.proxies)
+        )
+
+    def _request(self, method: str = "POST") -> Request:
+        """
+        Build the request of the webhook, files added from paths or streams are
+        streamed while the request is sent.
+        :param str method: "POST" sends, "PATCH" edits and "DELETE" deletes the message
+        :return: Request
+        """
+        if not self.file_sources or method == "DELETE":
+            return super()._request(method)
+        boundary = multipart_boundary()
+        return Request(
+            method=method,
+            url=self.url if method == "POST" else f"{self.url}/messages/{self.id}",
+            params=tuple((k, str(v)) for k, v in self._query_params.items()),
+            headers=(("Content-Type", f"multipart/form-data; boundary={boundary}"),),
+            content=partial(
+                multipart_stream,
+                boundary,
+                self._payload(),
+                dict(self.files),
+                dict(self.file_sources),
+            ),
+            timeout=self.timeout,
+        )
+
     async def api_post_request(self) -> "httpx.Response":
         """
         Post the JSON converted webhook data to the specified url.
-        :return:
-        """
-        async with self.http_client as client:  # type: httpx.AsyncClient
-            if bool(self.files) is False:
-                response = await client.post(
-                    self.url,
-                    json=self.json,
-                    params=self._query_params,
-                    timeout=self.timeout,
-                )
-            else:
-                self.files["payload_json"] = (
-                    None,
-                    json.dumps(self.json).encode("utf-8"),
-                )
-                response = await client.post(
-                    self.url,
-                    files=self.files,
-                    params=self._query_params,
-                    timeout=self.timeout,
-                )
-        return response
+        :return: Response of the sent webhook
+        """
+        return await self._transport.send(self._request())
 
     async def handle_rate_limit(self, response, request) -> "httpx.Response":
         """
@@ -81,19 +187,9 @@ class AsyncDiscordWebhook(DiscordWebhook):
         :return: Response of the sent webhook
         """
         while response.status_code == 429:
-            errors = response.json()
-            if not response.headers.get("Via"):
-                raise HTTPException(errors)
-            wh_sleep = float(errors["retry_after"]) + 0.15
-            logger.error(
-                "Webhook rate limited: sleeping for {wh_sleep} seconds...".format(
-                    wh_sleep=round(wh_sleep, 2)
-                )
-            )
-            await asyncio.sleep(wh_sleep)
+            await asyncio.sleep(retry_delay(response))
             response = await request()
-            if response.status_code in [200, 204]:
-                return response
+        return response
 
     async def execute(self, remove_embeds=False) -> "httpx.Response":
         """
@@ -101,23 +197,12 @@ class AsyncDiscordWebhook(DiscordWebhook):
         :param bool remove_embeds: clear the stored embeds after webhook is executed
         :return: Response of the sent webhook
         """
-        response = await self.api_post_request()
-        if response.status_code in [200, 204]:
-            logger.debug("Webhook executed")
-        elif response.status_code == 429 and self.rate_limit_retry:
-            response = await self.handle_rate_limit(response, self.api_post_request)
-        else:
-            logger.error(
-                "Webhook status code {status_code}: {content}".format(
-                    status_code=response.status_code,
-                    content=response.content.decode("utf-8"),
-                )
+        with self._attachment_cache_applied() as digests:
+            response = await send_request_async(
+                self._transport, self._request(), self.rate_limit_retry
             )
-        if remove_embeds:
-            self.remove_embeds()
-        self.remove_files(clear_attachments=False)
-        if webhook_id := json.loads(response.content.decode("utf-8")).get("id"):
-            self.id = webhook_id
+        log_response(response)
+        self._executed(response, remove_embeds, digests)
         return response
 
     async def edit(self) -> "httpx.Response":
@@ -131,36 +216,11 @@ class AsyncDiscordWebhook(DiscordWebhook):
         assert isinstance(
             self.url, str
         ), "Webhook URL needs to be set in order to edit the webhook."
-        async with self.http_client as client:  # type: httpx.AsyncClient
-            url = f"{self.url}/messages/{self.id}"
-            if bool(self.files) is False:
-                patch_kwargs = {
-                    "json": self.json,
-                    "params": self._query_params,
-                    "timeout": self.timeout,
-                }
-            else:
-                self.files["payload_json"] = (None, json.dumps(self.json))
-                patch_kwargs = {
-                    "files": self.files,
-                    "params": self._query_params,
-                    "timeout": self.timeout,
-                }
-            request = partial(client.patch, url, **patch_kwargs)
-            response = await request()
-            if response.status_code in [200, 204]:
-                logger.debug("Webhook with id {id} edited".format(id=self.id))
-            elif response.status_code == 429 and self.rate_limit_retry:
-                response = await self.handle_rate_limit(response, request)
-                logger.debug("Webhook edited")
-            else:
-                logger.error(
-                    "Webhook status code {status_code}: {content}".format(
-                        status_code=response.status_code,
-                        content=response.content.decode("utf-8"),
-                    )
-                )
-            return response
+        response = await send_request_async(
+            self._transport, self._request("PATCH"), self.rate_limit_retry
+        )
+        log_response(response, f"Webhook with id {self.id} edited")
+        return response
 
     async def delete(self) -> "httpx.Response":
         """
@@ -173,18 +233,40 @@ class AsyncDiscordWebhook(DiscordWebhook):
         assert isinstance(
             self.url, str
         ), "Webhook URL needs to be set in order to delete the webhook."
-        url = f"{self.url}/messages/{self.id}"
-        async with self.http_client as client:  # type: httpx.AsyncClient
-            response = await client.delete(
-                url, params=self._query_params, timeout=self.timeout
-            )
-            if response.status_code in [200, 204]:
-                logger.debug("Webhook deleted")
-            else:
-                logger.error(
-                    "Webhook status code {status_code}: {content}".format(
-                        status_code=response.status_code,
-                        content=response.content.decode("utf-8"),
-                    )
-                )
-            return response
+        response = await send_request_async(
+            self._transport, self._request("DELETE"), self.rate_limit_retry
+        )
+        log_response(response, f"Webhook with id {self.id} deleted")
+        return response
+
+    async def bulk_delete(
+        self,
+        message_ids: Iterable[Target],
+        concurrency: int = 4,
+        progress: Optional[BulkProgress] = None,
+    ) -> BulkProgress:
+        """
+        Delete many messages of the webhook concurrently within the rate limits.
+        :param message_ids: message ids or tuples of message id and thread id
+        :param int concurrency: number of requests in flight at once
+        :param BulkProgress progress: (optional) progress of an interrupted run
+        :return: progress with the result of every message
+        """
+        job = self._bulk_job("DELETE", concurrency, progress, client=self.client)
+        return await job.run_async(message_ids)
+
+    async def bulk_edit(
+        self,
+        message_ids: Iterable[Target],
+        concurrency: int = 4,
+        progress: Optional[BulkProgress] = None,
+    ) -> BulkProgress:
+        """
+        Replace many messages of the webhook with the data of this webhook.
+        :param message_ids: message ids or tuples of message id and thread id
+        :param int concurrency: number of requests in flight at once
+        :param BulkProgress progress: (optional) progress of an interrupted run
+        :return: progress with the result of every message
+        """
+        job = self._bulk_job("PATCH", concurrency, progress, client=self.client)
+        return await job.run_async(message_ids)
@@ -0,0 +1,392 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from http.client import HTTPException
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import requests
+
+from .prepared import PreparedMessage
+from .rate_limit import RateLimiter
+from .transport import (
+    AsyncHttpxTransport,
+    AsyncTransport,
+    Request,
+    RequestsTransport,
+    ThreadLocalTransport,
+    Transport,
+    httpx_proxy,
+    log_response,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: nocover
+    # httpx is only needed to run bulk jobs asynchronously
+    pass
+
+logger = logging.getLogger(__name__)
+
+# message id or a tuple of message id and thread id
+Target = Union[str, int, Tuple[Union[str, int], Optional[Union[str, int]]]]
+
+
+class BulkItem(NamedTuple):
+    """
+    Result of deleting or editing one message of a bulk job.
+    """
+
+    message_id: str
+    thread_id: Optional[str] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code in [200, 204]
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether sending the request again wouldn't change the result, e.g. a 404
+        of a message that has already been deleted.
+        """
+        return self.status_code is not None and self.status_code < 500
+
+
+class BulkProgress:
+    """
+    Results of a bulk job by message. With a path the results are saved to a
+    JSON file, so an interrupted job continues with the messages that haven't
+    been finished yet when it's run again.
+    """
+
+    def __init__(self, path: Optional[str] = None, save_every: int = 50) -> None:
+        """
+        Init bulk progress.
+        :param str path: (optional) JSON file the progress is loaded from and saved to
+        :param int save_every: save the file after this many new results
+        """
+        self.path = path
+        self.save_every = save_every
+        self.results: Dict[Tuple[str, Optional[str]], BulkItem] = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def is_finished(self, message_id: str, thread_id: Optional[str] = None) -> bool:
+        """
+        Check if the message doesn't have to be sent again.
+        :param str message_id: message id
+        :param str thread_id: (optional) thread id
+        :return: whether the message has been finished
+        """
+        item = self.results.get((message_id, thread_id))
+        return item is not None and item.finished
+
+    def record(self, item: BulkItem) -> None:
+        """
+        Store the result of a message.
+        :param item: result of the message
+        """
+        with self._lock:
+            self.results[(item.message_id, item.thread_id)] = item
+            self._unsaved += 1
+            if self.path is not None and self._unsaved >= self.save_every:
+                self._save()
+
+    def save(self) -> None:
+        """
+        Save the results to the JSON file.
+        """
+        with self._lock:
+            if self.path is not None:
+                self._save()
+
+    def load(self) -> None:
+        """
+        Load the results from the JSON file.
+        """
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            for values in data["results"]:
+                item = BulkItem(*values)
+                self.results[(item.message_id, item.thread_id)] = item
+
+    @property
+    def succeeded(self) -> List[BulkItem]:
+        return [item for item in self.results.values() if item.ok]
+
+    @property
+    def failed(self) -> List[BulkItem]:
+        return [item for item in self.results.values() if not item.ok]
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def _save(self) -> None:
+        # write a temporary file first, so an interrupted save keeps the old file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"results": [list(item) for item in self.results.values()]}, f)
+        os.replace(temp_path, self.path)
+        self._unsaved = 0
+
+
+class BulkJob:
+    """
+    Delete or edit many messages of a webhook concurrently.
+
+    The messages are sent by `concurrency` workers that take the next message as
+    soon as they are done, while all workers follow the rate limit bucket of the
+    route (e.g. deleting messages of the webhook), so Discord is kept busy
+    without being rate limited. Messages that are already finished in the
+    progress are skipped.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        method: str = "DELETE",
+        message: Optional[PreparedMessage] = None,
+        thread_id: Optional[str] = None,
+        concurrency: int = 4,
+        progress: Optional[BulkProgress] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport=None,
+        session: Optional[requests.Session] = None,
+        client=None,
+        proxies: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Init bulk job.
+        :param str url: webhook url
+        :param str method: "DELETE" or "PATCH"
+        :param message: (optional) prepared message with the new data of edits
+        :param str thread_id: (optional) thread of messages given without thread id
+        :param int concurrency: number of requests in flight at once
+        :param progress: (optional) progress of an earlier run of the job
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        :param transport: (optional) sync or async transport of the requests
+        :param session: (optional) requests session, used if no transport is set
+        :param client: (optional) httpx.AsyncClient, used if no transport is set
+        :param dict proxies: (optional) proxies, used if no transport is set
+        :param float timeout: (optional) seconds to wait for a response
+        """
+        if method not in ("DELETE", "PATCH"):
+            raise ValueError("method must be 'DELETE' or 'PATCH'")
+        if method == "PATCH" and message is None:
+            raise ValueError("editing messages needs the message with the new data")
+        self.url = url
+        self.method = method
+        self.message = message
+        self.thread_id = str(thread_id) if thread_id else None
+        self.concurrency = concurrency
+        self.progress = progress if progress is not None else BulkProgress()
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.transport = transport
+        self.session = session
+        self.client = client
+        self.proxies = proxies
+        self.timeout = timeout
+
+    @classmethod
+    def delete(cls, url: str, **kwargs) -> "BulkJob":
+        """
+        Create a job that deletes messages.
+        :param str url: webhook url
+        :param kwargs: the same kwargs that are used for an instance of the class
+        :return: BulkJob
+        """
+        return cls(url, method="DELETE", **kwargs)
+
+    @classmethod
+    def edit(cls, webhook, **kwargs) -> "BulkJob":
+        """
+        Create a job that replaces messages with the current data of a webhook.
+        :param webhook: DiscordWebhook instance with the new data
+        :param kwargs: the same kwargs that are used for an instance of the class
+        :return: BulkJob
+        """
+        message = PreparedMessage.from_webhook(webhook, fingerprint=False)
+        kwargs.setdefault("thread_id", webhook.thread_id)
+        kwargs.setdefault("timeout", webhook.timeout)
+        return cls(webhook.url, method="PATCH", message=message, **kwargs)
+
+    @property
+    def route(self) -> str:
+        """
+        Rate limit key of the requests of the job.
+        :return: method and webhook url
+        """
+        return f"{self.method} {self.url}"
+
+    def run(self, targets: Iterable[Target]) -> BulkProgress:
+        """
+        Delete or edit the messages.
+        :param targets: message ids or tuples of message id and thread id
+        :return: progress with the result of every message
+        """
+        transport: Transport = self.transport
+        if transport is None and self.session is not None:
+            transport = RequestsTransport(self.session, proxies=self.proxies)
+        elif transport is None:
+            # every worker thread gets a session of its own
+            transport = ThreadLocalTransport(
+                lambda: RequestsTransport(requests.Session(), proxies=self.proxies)
+            )
+        pending = self._pending(targets)
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def worker() -> None:
+            while not stop.is_set():
+                with lock:
+                    target = next(pending, None)
+                if target is None:
+                    return
+                self.progress.record(self._send(transport, *target))
+
+        executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="BulkJob")
+        try:
+            futures = [executor.submit(worker) for _ in range(self.concurrency)]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            stop.set()
+            for future in futures:
+                future.result()
+        finally:
+            stop.set()
+            executor.shutdown()
+            self.progress.save()
+            if self.transport is None and self.session is None:
+                transport.close()
+        return self.progress
+
+    async def run_async(self, targets: Iterable[Target]) -> BulkProgress:
+        """
+        Async version of run.
+        :param targets: message ids or tuples of message id and thread id
+        :return: progress with the result of every message
+        """
+        transport: AsyncTransport = self.transport or AsyncHttpxTransport(
+            self.client or httpx.AsyncClient(proxy=httpx_proxy(self.proxies))
+        )
+        pending = self._pending(targets)
+
+        async def worker() -> None:
+            for target in pending:
+                self.progress.record(await self._send_async(transport, *target))
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.progress.save()
+            if self.transport is None and self.client is None:
+                await transport.aclose()
+        return self.progress
+
+    def _pending(
+        self, targets: Iterable[Target]
+    ) -> Iterator[Tuple[str, Optional[str]]]:
+        for target in targets:
+            if isinstance(target, (tuple, list)):
+                message_id, thread_id = target
+            else:
+                message_id, thread_id = target, self.thread_id
+            message_id = str(message_id)
+            thread_id = str(thread_id) if thread_id else None
+            if not self.progress.is_finished(message_id, thread_id):
+                yield message_id, thread_id
+
+    def _request(self, message_id: str, thread_id: Optional[str]) -> Request:
+        params = (("thread_id", thread_id),) if thread_id else ()
+        url = f"{self.url}/messages/{message_id}"
+        if self.message is None:
+            return Request(self.method, url, params=params, timeout=self.timeout)
+        return Request(
+            method=self.method,
+            url=url,
+            params=params,
+            headers=tuple(self.message.headers.items()),
+            content=self.message.body,
+            timeout=self.timeout,
+        )
+
+    def _send(
+        self, transport: Transport, message_id: str, thread_id: Optional[str]
+    ) -> BulkItem:
+        request = self._request(message_id, thread_id)
+        while True:
+            delay = self.rate_limiter.reserve(self.route)
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            try:
+                response = transport.send(request)
+            except Exception as e:
+                logger.warning(f"{self.method} of message {message_id} failed: {e}")
+                return BulkItem(message_id, thread_id, error=repr(e))
+            if item := self._result(message_id, thread_id, response):
+                return item
+
+    async def _send_async(
+        self, transport: AsyncTransport, message_id: str, thread_id: Optional[str]
+    ) -> BulkItem:
+        request = self._request(message_id, thread_id)
+        while True:
+            # nothing is awaited between reserve and send, so the tasks can't
+            # reserve more requests than the bucket allows
+            delay = self.rate_limiter.reserve(self.route)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                response = await transport.send(request)
+            except Exception as e:
+                logger.warning(f"{self.method} of message {message_id} failed: {e}")
+                return BulkItem(message_id, thread_id, error=repr(e))
+            if item := self._result(message_id, thread_id, response):
+                return item
+
+    def _result(
+        self, message_id: str, thread_id: Optional[str], response
+    ) -> Optional[BulkItem]:
+        """
+        Update the rate limit bucket with the response.
+        :return: result of the message or None if it has to be sent again
+        """
+        self.rate_limiter.update(self.route, response)
+        if response.status_code == 429:
+            if not response.headers.get("Via"):
+                # not rate limited by the webhook, but e.g. blocked by Cloudflare
+                raise HTTPException(response.content.decode("utf-8"))
+            return None
+        action = "deleted" if self.method == "DELETE" else "edited"
+        log_response(response, f"Message {message_id} {action}")
+        if response.status_code in [200, 204]:
+            return BulkItem(message_id, thread_id, response.status_code)
+        return BulkItem(
+            message_id,
+            thread_id,
+            response.status_code,
+            response.content.decode("utf-8"),
+        )
@@ -0,0 +1,250 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# attachment fields of an embed that may reference an uploaded file
+EMBED_ATTACHMENT_FIELDS = (
+    ("image", "url"),
+    ("thumbnail", "url"),
+    ("author", "icon_url"),
+    ("footer", "icon_url"),
+)
+ATTACHMENT_SCHEME = "attachment://"
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional time to live for its entries.
+    """
+
+    def __init__(
+        self, max_size: int = 1024, ttl: Optional[float] = None, clock=time.monotonic
+    ) -> None:
+        """
+        Init LRU cache.
+        :param int max_size: maximum number of entries before the least recently
+        used entry is evicted
+        :param float ttl: (optional) seconds until an entry expires
+        :param clock: function returning the current time in seconds
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the value of a key and mark it as recently used.
+        :param key: key of the entry
+        :param default: value that is returned if the key is missing or expired
+        :return: stored value or default
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value and evict the least recently used entries if necessary.
+        :param key: key of the entry
+        :param value: value of the entry
+        :param float ttl: (optional) overrides the default time to live
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove an entry.
+        :param key: key of the entry
+        :param default: value that is returned if the key is missing
+        :return: removed value or default
+        """
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """
+        Get the entries that haven't expired, from least to most recently used.
+        :return: list of keys and values
+        """
+        now = self._clock()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (value, expires_at) in self._data.items()
+                if expires_at is None or expires_at > now
+            ]
+
+    def clear(self) -> None:
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
+
+
+class AttachmentCache:
+    """
+    Content-addressed cache of attachments that have already been uploaded.
+
+    Files that are only referenced by embeds (`attachment://<filename>`) and were
+    uploaded before are replaced with the CDN url of the previous upload, so the
+    bytes don't have to be sent again.
+    """
+
+    def __init__(
+        self, max_size: int = 256, ttl: Optional[float] = 12 * 60 * 60
+    ) -> None:
+        """
+        Init attachment cache.
+        :param int max_size: maximum number of cached attachments
+        :param float ttl: seconds a cached attachment url is reused, signed urls
+        of Discord's CDN are never used after they expire
+        """
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+
+    @staticmethod
+    def digest(file: bytes) -> str:
+        """
+        Get the content hash of a file.
+        :param bytes file: file content
+        :return: hex digest of the file content
+        """
+        if isinstance(file, str):
+            file = file.encode("utf-8")
+        return hashlib.sha256(file).hexdigest()
+
+    def get(self, file: bytes) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached attachment of a file.
+        :param bytes file: file content
+        :return: attachment returned by Discord or None
+        """
+        return self._cache.get(self.digest(file))
+
+    def store(self, digest: str, attachment: Dict[str, Any]) -> None:
+        """
+        Store an uploaded attachment under the hash of its content.
+        :param str digest: hex digest of the uploaded file
+        :param dict attachment: attachment returned by Discord
+        """
+        url = attachment.get("url")
+        if not url:
+            return
+        ttl = None
+        if expires_at := _signed_url_expiry(url):
+            # keep a safety margin so the url doesn't expire while being sent
+            ttl = expires_at - time.time() - 60
+            if self._cache.ttl is not None:
+                ttl = min(self._cache.ttl, ttl)
+            if ttl <= 0:
+                return
+        self._cache.set(digest, attachment, ttl=ttl)
+
+    def store_attachments(
+        self, digests: Dict[str, str], attachments: Iterable[Dict[str, Any]]
+    ) -> None:
+        """
+        Store the attachments of a response for the uploaded files.
+        :param dict digests: hex digests of the uploaded files by filename
+        :param attachments: attachments returned by Discord
+        """
+        for attachment in attachments:
+            if digest := digests.get(attachment.get("filename")):
+                self.store(digest, attachment)
+
+    def apply(self, webhook) -> Dict[str, str]:
+        """
+        Replace files that were already uploaded with their CDN url in the embeds
+        of the webhook and remove them from the files that will be uploaded.
+        :param webhook: DiscordWebhook instance
+        :return: hex digests of the files that still have to be uploaded by filename
+        """
+        cached_urls = {}
+        digests = {}
+        for filename, file in list(webhook.files.values()):
+            if filename is None:
+                continue
+            digest = self.digest(file)
+            attachment = self._cache.get(digest)
+            if attachment is None:
+                digests[filename] = digest
+            else:
+                cached_urls[ATTACHMENT_SCHEME + filename] = attachment["url"]
+        if not cached_urls:
+            return digests
+
+        embeds = []
+        referenced = set()
+        for embed in webhook.embeds:
+            embed = dict(embed if isinstance(embed, dict) else embed.__dict__)
+            for field, key in EMBED_ATTACHMENT_FIELDS:
+                value = embed.get(field)
+                if value and (url := cached_urls.get(value.get(key))):
+                    referenced.add(value[key])
+                    embed[field] = {**value, key: url}
+            embeds.append(embed)
+        webhook.embeds = embeds
+
+        for reference in referenced:
+            filename = reference[len(ATTACHMENT_SCHEME) :]
+            webhook.files.pop(f"_{filename}", None)
+        # files that aren't used by an embed are shown as attachments of the
+        # message and still have to be uploaded
+        for reference in cached_urls.keys() - referenced:
+            filename = reference[len(ATTACHMENT_SCHEME) :]
+            digests[filename] = self.digest(webhook.files[f"_{filename}"][1])
+        return digests
+
+    def clear(self) -> None:
+        """
+        Remove all cached attachments.
+        """
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+def _signed_url_expiry(url: str) -> Optional[float]:
+    """
+    Get the expiry of a signed Discord CDN url.
+    :param str url: attachment url
+    :return: unix timestamp of the expiry or None
+    """
+    expiry = parse_qs(urlsplit(url).query).get("ex")
+    if not expiry:
+        return None
+    try:
+        return float(int(expiry[0], 16))
+    except ValueError:
+        return None
@@ -0,0 +1,245 @@
+import asyncio
+import math
+import threading
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .transport import AsyncTransport, Request, Transport
+
+
+class LimitToken(NamedTuple):
+    """
+    Slot of a request that was acquired from an AdaptiveLimiter.
+    """
+
+    key: Hashable
+    epoch: int
+    started_at: float
+
+
+class _HostState:
+    __slots__ = ("limit", "in_flight", "latency", "samples", "epoch")
+
+    def __init__(self, limit: float) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.samples = 0
+        self.epoch = 0
+
+
+class AdaptiveLimiter:
+    """
+    Adaptive limit of concurrent requests per host (AIMD).
+
+    While responses are healthy the limit grows by `increase` per round trip.
+    A 429, a server error, a failed request or a response that took more than
+    `latency_tolerance` times the usual latency cuts the limit by `decrease`.
+    Requests that were started before a cut don't cut it again, so one burst
+    of errors only halves the limit once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        clock=time.monotonic,
+    ) -> None:
+        """
+        Init adaptive limiter.
+        :param int initial_limit: concurrent requests of a new host
+        :param int min_limit: lowest limit
+        :param int max_limit: highest limit
+        :param float increase: growth of the limit per round trip
+        :param float decrease: factor the limit is multiplied with on congestion
+        :param float latency_tolerance: latency relative to the usual latency
+        that is treated as congestion
+        :param clock: function returning the current time in seconds
+        """
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self._clock = clock
+        self._hosts: Dict[Hashable, _HostState] = {}
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def acquire(self, key: Hashable, timeout: Optional[float] = None) -> LimitToken:
+        """
+        Wait until a request to the host can be sent.
+        :param key: host or other key of the limit
+        :param float timeout: (optional) seconds to wait at most
+        :return: token that has to be released after the response
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._available(key), timeout):
+                raise TimeoutError(f"No slot for {key} within {timeout} seconds")
+            return self._take(key)
+
+    async def acquire_async(self, key: Hashable) -> LimitToken:
+        """
+        Async version of acquire.
+        :param key: host or other key of the limit
+        :return: token that has to be released after the response
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._available(key):
+                    return self._take(key)
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, token: LimitToken, status_code: Optional[int] = None) -> None:
+        """
+        Release the slot of a request and adapt the limit to its outcome.
+        :param token: token of acquire
+        :param int status_code: status code of the response, None if it failed
+        """
+        latency = self._clock() - token.started_at
+        with self._condition:
+            state = self._hosts[token.key]
+            state.in_flight -= 1
+            congested = (
+                status_code is None
+                or status_code == 429
+                or status_code >= 500
+                or (
+                    state.samples >= 5
+                    and latency > state.latency * self.latency_tolerance
+                )
+            )
+            if congested:
+                # only the first congested response of an epoch cuts the limit
+                if token.epoch == state.epoch:
+                    state.limit = max(self.min_limit, state.limit * self.decrease)
+                    state.epoch += 1
+            else:
+                state.latency = (
+                    latency
+                    if state.latency is None
+                    else state.latency * 0.9 + latency * 0.1
+                )
+                state.samples += 1
+                state.limit = min(
+                    self.max_limit, state.limit + self.increase / state.limit
+                )
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def limit(self, key: Hashable) -> int:
+        """
+        Current limit of concurrent requests to the host.
+        :param key: host or other key of the limit
+        :return: number of concurrent requests
+        """
+        with self._condition:
+            state = self._hosts.get(key)
+            return self.initial_limit if state is None else math.floor(state.limit)
+
+    def stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """
+        Limit, requests in flight and smoothed latency per host.
+        :return: stats by host
+        """
+        with self._condition:
+            return {
+                key: {
+                    "limit": math.floor(state.limit),
+                    "in_flight": state.in_flight,
+                    "latency": state.latency or 0.0,
+                }
+                for key, state in self._hosts.items()
+            }
+
+    def _available(self, key: Hashable) -> bool:
+        state = self._hosts.get(key)
+        return state is None or state.in_flight < math.floor(state.limit)
+
+    def _take(self, key: Hashable) -> LimitToken:
+        state = self._hosts.get(key)
+        if state is None:
+            state = self._hosts[key] = _HostState(float(self.initial_limit))
+        state.in_flight += 1
+        return LimitToken(key, state.epoch, self._clock())
+
+
+class AdaptiveTransport(Transport):
+    """
+    Transport that limits the concurrent requests of another transport per host
+    with an AdaptiveLimiter.
+    """
+
+    def __init__(
+        self, transport: Transport, limiter: Optional[AdaptiveLimiter] = None
+    ) -> None:
+        """
+        Init adaptive transport.
+        :param transport: transport that sends the requests
+        :param limiter: (optional) limiter shared with other transports
+        """
+        self.transport = transport
+        self.limiter = limiter or AdaptiveLimiter()
+
+    def send(self, request: Request):
+        token = self.limiter.acquire(_host(request))
+        status_code = None
+        try:
+            response = self.transport.send(request)
+            status_code = response.status_code
+            return response
+        finally:
+            self.limiter.release(token, status_code)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncAdaptiveTransport(AsyncTransport):
+    """
+    Async version of AdaptiveTransport.
+    """
+
+    def __init__(
+        self, transport: AsyncTransport, limiter: Optional[AdaptiveLimiter] = None
+    ) -> None:
+        """
+        Init async adaptive transport.
+        :param transport: async transport that sends the requests
+        :param limiter: (optional) limiter shared with other transports
+        """
+        self.transport = transport
+        self.limiter = limiter or AdaptiveLimiter()
+
+    async def send(self, request: Request):
+        token = await self.limiter.acquire_async(_host(request))
+        status_code = None
+        try:
+            response = await self.transport.send(request)
+            status_code = response.status_code
+            return response
+        finally:
+            self.limiter.release(token, status_code)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _host(request: Request) -> str:
+    return urlsplit(request.url).netloc
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
@@ -1,5 +1,15 @@
 from enum import Enum
 
+# limits of a Discord message
+CONTENT_LIMIT = 2000
+EMBED_LIMIT = 10
+TOTAL_EMBED_LIMIT = 6000
+DESCRIPTION_LIMIT = 4096
+TITLE_LIMIT = 256
+FIELD_LIMIT = 25
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+
 
 class MessageFlags(Enum):
     NONE = 0
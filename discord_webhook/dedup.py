@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+from .cache import LRUCache
+from .constants import CONTENT_LIMIT
+from .prepared import PreparedMessage, message_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateEntry:
+    """
+    Message that has been sent within the deduplication window.
+    """
+
+    __slots__ = (
+        "url",
+        "thread_id",
+        "message_id",
+        "content",
+        "count",
+        "edited_at",
+        "trailing_edit",
+        "proxies",
+        "timeout",
+        "session",
+        "client",
+        "transport",
+    )
+
+    def __init__(self, webhook) -> None:
+        self.url = webhook.url
+        self.thread_id = webhook.thread_id
+        # the edits are sent the same way as the original message
+        self.proxies = webhook.proxies
+        self.timeout = webhook.timeout
+        self.session = getattr(webhook, "session", None)
+        self.client = getattr(webhook, "client", None)
+        self.transport = webhook.transport
+        self.message_id: Optional[str] = None
+        self.content = webhook.content
+        self.count = 1
+        self.edited_at = 0.0
+        self.trailing_edit = False
+
+    def counter_message(self) -> PreparedMessage:
+        """
+        Prepare an edit of the original message that shows how often it was sent.
+        Only the content is changed, embeds and attachments are kept.
+        :return: PreparedMessage
+        """
+        counter = f"(×{self.count})"
+        content = self.content or ""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8")
+        content = content[: CONTENT_LIMIT - len(counter) - 1]
+        content = f"{content} {counter}" if content else counter
+        return PreparedMessage(
+            url=f"{self.url}/messages/{self.message_id}",
+            body=json.dumps({"content": content}).encode("utf-8"),
+            content_type="application/json",
+            method="PATCH",
+            params=(("thread_id", str(self.thread_id)),) if self.thread_id else (),
+            proxies=tuple((self.proxies or {}).items()),
+            timeout=self.timeout,
+        )
+
+    def send(self, message: PreparedMessage, rate_limit_retry: bool) -> None:
+        """
+        Send an edit of the original message, errors are logged.
+        :param message: edit of the message
+        :param bool rate_limit_retry: send the edit again when being rate limited
+        """
+        try:
+            message.send(
+                self.session,
+                rate_limit_retry=rate_limit_retry,
+                transport=self.transport,
+            )
+        except Exception:
+            logger.exception("Counter of a duplicate message could not be edited")
+
+    async def send_async(
+        self, message: PreparedMessage, rate_limit_retry: bool
+    ) -> None:
+        """
+        Async version of send.
+        :param message: edit of the message
+        :param bool rate_limit_retry: send the edit again when being rate limited
+        """
+        try:
+            await message.send_async(
+                self.client, rate_limit_retry=rate_limit_retry, transport=self.transport
+            )
+        except Exception:
+            logger.exception("Counter of a duplicate message could not be edited")
+
+
+class MessageDeduplicator:
+    """
+    Suppress identical messages that are sent again within a time window.
+
+    Messages are identified by a fingerprint of their payload, files, webhook url
+    and thread. Repeats are either dropped or counted by editing the original
+    message, e.g. "disk full (×12)". Edits are sent at most once per edit
+    interval; repeats within the interval are shown by a trailing edit at its end.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_size: int = 10000,
+        collapse: str = "drop",
+        edit_interval: float = 5.0,
+        clock=time.monotonic,
+    ) -> None:
+        """
+        Init message deduplicator.
+        :param float window: seconds a message is remembered after it was first sent
+        :param int max_size: maximum number of remembered messages
+        :param str collapse: "drop" repeats or "edit" the counter of the original
+        :param float edit_interval: minimum seconds between edits of one message
+        :param clock: function returning the current time in seconds
+        """
+        if collapse not in ("drop", "edit"):
+            raise ValueError("collapse must be 'drop' or 'edit'")
+        self.collapse = collapse
+        self.edit_interval = edit_interval
+        self.suppressed = 0
+        self._clock = clock
+        self._index = LRUCache(max_size=max_size, ttl=window, clock=clock)
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def check(self, webhook) -> Optional[DuplicateEntry]:
+        """
+        Remember the message of the webhook and check if it was sent before.
+        :param webhook: DiscordWebhook instance
+        :return: the entry of the original message if it's a duplicate, else None
+        """
+        entry, duplicate = self._check(message_fingerprint(webhook), webhook)
+        return entry if duplicate else None
+
+    def _check(self, fingerprint: str, webhook) -> Tuple[DuplicateEntry, bool]:
+        with self._lock:
+            entry = self._index.get(fingerprint)
+            if entry is None:
+                entry = DuplicateEntry(webhook)
+                self._index.set(fingerprint, entry)
+                return entry, False
+            entry.count += 1
+            self.suppressed += 1
+            return entry, True
+
+    def forget(self, webhook) -> None:
+        """
+        Forget the message of the webhook, e.g. because it couldn't be sent.
+        :param webhook: DiscordWebhook instance
+        """
+        self._index.pop(message_fingerprint(webhook))
+
+    def execute(self, webhook, remove_embeds: bool = False):
+        """
+        Execute the webhook unless it's a duplicate.
+        :param webhook: DiscordWebhook instance
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook or None if it was suppressed
+        """
+        fingerprint = message_fingerprint(webhook)
+        entry, duplicate = self._check(fingerprint, webhook)
+        if duplicate:
+            message, delay = self._counter_edit(entry)
+            if message is not None:
+                entry.send(message, webhook.rate_limit_retry)
+            elif delay is not None:
+                timer = threading.Timer(
+                    delay, self._send_trailing_edit, (entry, webhook.rate_limit_retry)
+                )
+                timer.daemon = True
+                timer.start()
+            return None
+        try:
+            response = webhook.execute(remove_embeds=remove_embeds)
+        except BaseException:
+            self._index.pop(fingerprint)
+            raise
+        self._remember(fingerprint, entry, webhook, response)
+        return response
+
+    async def execute_async(self, webhook, remove_embeds: bool = False):
+        """
+        Execute the AsyncDiscordWebhook unless it's a duplicate.
+        :param webhook: AsyncDiscordWebhook instance
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook or None if it was suppressed
+        """
+        fingerprint = message_fingerprint(webhook)
+        entry, duplicate = self._check(fingerprint, webhook)
+        if duplicate:
+            message, delay = self._counter_edit(entry)
+            if message is not None:
+                await entry.send_async(message, webhook.rate_limit_retry)
+            elif delay is not None:
+                task = asyncio.create_task(
+                    self._send_trailing_edit_async(
+                        entry, delay, webhook.rate_limit_retry
+                    )
+                )
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return None
+        try:
+            response = await webhook.execute(remove_embeds=remove_embeds)
+        except BaseException:
+            self._index.pop(fingerprint)
+            raise
+        self._remember(fingerprint, entry, webhook, response)
+        return response
+
+    def _remember(
+        self, fingerprint: str, entry: DuplicateEntry, webhook, response
+    ) -> None:
+        if response is None or response.status_code not in [200, 204]:
+            # a failed message is not a duplicate when it's sent again
+            self._index.pop(fingerprint)
+        else:
+            entry.message_id = webhook.id
+
+    def _counter_edit(
+        self, entry: DuplicateEntry
+    ) -> Tuple[Optional[PreparedMessage], Optional[float]]:
+        """
+        Throttle the counter edits of a message.
+        :return: the edit that is sent now, or the seconds until a trailing edit
+        is sent if one has to be scheduled
+        """
+        if self.collapse != "edit" or entry.message_id is None:
+            return None, None
+        now = self._clock()
+        with self._lock:
+            if entry.trailing_edit:
+                # the scheduled edit shows this repeat as well
+                return None, None
+            wait = entry.edited_at + self.edit_interval - now
+            if wait > 0:
+                entry.trailing_edit = True
+                return None, wait
+            entry.edited_at = now
+            return entry.counter_message(), None
+
+    def _trailing_edit(self, entry: DuplicateEntry) -> PreparedMessage:
+        with self._lock:
+            entry.trailing_edit = False
+            entry.edited_at = self._clock()
+            return entry.counter_message()
+
+    def _send_trailing_edit(
+        self, entry: DuplicateEntry, rate_limit_retry: bool
+    ) -> None:
+        entry.send(self._trailing_edit(entry), rate_limit_retry)
+
+    async def _send_trailing_edit_async(
+        self, entry: DuplicateEntry, delay: float, rate_limit_retry: bool
+    ) -> None:
+        await asyncio.sleep(delay)
+        await entry.send_async(self._trailing_edit(entry), rate_limit_retry)
+
+    def __len__(self) -> int:
+        return len(self._index)
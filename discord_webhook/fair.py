@@ -0,0 +1,317 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import requests
+
+from .prepared import PreparedMessage, SendResult
+from .queue_sender import (
+    AsyncQueueSender,
+    QueuedItem,
+    QueueSender,
+    new_wait_stats,
+    record_wait,
+    wait_summary,
+)
+from .rate_limit import RateLimiter
+from .transport import Transport
+
+
+class TenantMessage(QueuedItem):
+    """
+    Prepared message waiting in the queue of a tenant.
+    """
+
+    __slots__ = ("tenant",)
+
+    def __init__(
+        self, message: PreparedMessage, tenant: Hashable, queued_at: float, future
+    ) -> None:
+        super().__init__(message, queued_at, future)
+        self.tenant = tenant
+
+
+class _Tenant:
+    __slots__ = ("weight", "deficit", "urls", "queued")
+
+    def __init__(self, weight: float) -> None:
+        self.weight = weight
+        self.deficit = 0.0
+        self.urls: "OrderedDict[str, Deque[TenantMessage]]" = OrderedDict()
+        self.queued = 0
+
+
+class FairQueue:
+    """
+    Queued messages by tenant, dequeued by deficit round-robin (DRR).
+
+    Every round a tenant may send `weight` messages, so a tenant with a burst
+    only gets its share while the other tenants keep sending. Messages whose
+    webhook is rate limited are skipped until the rate limit is lifted. Only
+    tenants with queued messages are kept in the queue, and the stats of idle
+    tenants are dropped least recently used first once there are more than
+    `max_stats`, so idle tenants cost next to nothing. The queue is not
+    thread-safe on its own.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[Hashable, float]] = None,
+        default_weight: float = 1,
+        max_stats: int = 10000,
+    ) -> None:
+        """
+        Init fair queue.
+        :param weights: (optional) messages per round by tenant
+        :param float default_weight: messages per round of other tenants
+        :param int max_stats: maximum number of tenants whose stats are kept
+        """
+        self.weights: Dict[Hashable, float] = {}
+        self.default_weight = _check_weight(default_weight)
+        self.max_stats = max_stats
+        self._tenants: Dict[Hashable, _Tenant] = {}
+        self._active: Deque[Hashable] = deque()
+        self._stats: "OrderedDict[Hashable, Dict[str, float]]" = OrderedDict()
+        for tenant, weight in (weights or {}).items():
+            self.set_weight(tenant, weight)
+
+    def set_weight(self, tenant: Hashable, weight: float) -> None:
+        """
+        Set the messages per round of a tenant.
+        :param tenant: key of the tenant
+        :param float weight: messages per round, at least 1
+        """
+        self.weights[tenant] = _check_weight(weight)
+        if tenant in self._tenants:
+            self._tenants[tenant].weight = weight
+
+    def push(self, item: TenantMessage, front: bool = False) -> None:
+        """
+        Add a message to the queue of its tenant.
+        :param item: queued message
+        :param bool front: put the message in front of its queue, e.g. after a retry
+        """
+        tenant = self._tenants.get(item.tenant)
+        if tenant is None:
+            tenant = self._tenants[item.tenant] = _Tenant(
+                self.weights.get(item.tenant, self.default_weight)
+            )
+            self._active.append(item.tenant)
+        queue = tenant.urls.setdefault(item.message.url, deque())
+        if front:
+            queue.appendleft(item)
+        else:
+            queue.append(item)
+        tenant.queued += 1
+        self._tenant_stats(item.tenant)["queued"] += 1
+
+    def pop(
+        self, now: float, delay: Callable[[str], float]
+    ) -> Tuple[Optional[TenantMessage], Optional[float]]:
+        """
+        Remove the next message that can be sent.
+        :param float now: current time
+        :param delay: function returning the seconds until a url can be used
+        :return: the message or None and the seconds until the next message can
+        be sent (None if no messages are queued)
+        """
+        min_wait: Optional[float] = None
+        delays: Dict[str, float] = {}
+        for _ in range(len(self._active)):
+            key = self._active[0]
+            tenant = self._tenants[key]
+            queue, wait = _ready(tenant, delay, delays)
+            if queue is None:
+                # rate limited tenants keep their deficit for the next round
+                if min_wait is None or wait < min_wait:
+                    min_wait = wait
+                self._active.rotate(-1)
+                continue
+            if tenant.deficit < 1:
+                tenant.deficit += tenant.weight
+            item = queue.popleft()
+            if not queue:
+                del tenant.urls[item.message.url]
+            tenant.deficit -= 1
+            tenant.queued -= 1
+            if not tenant.queued:
+                self._active.popleft()
+                del self._tenants[key]
+            elif tenant.deficit < 1:
+                self._active.rotate(-1)
+            item.dispatched_at = now
+            item.attempts += 1
+            self._tenant_stats(key)["queued"] -= 1
+            return item, 0.0
+        return None, min_wait
+
+    def record(self, item: TenantMessage) -> None:
+        """
+        Record the wait time of a message that has been sent.
+        :param item: queued message
+        """
+        record_wait(self._tenant_stats(item.tenant), item)
+
+    def stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """
+        Queue depth and wait times per tenant.
+        :return: queued and sent messages, total, average and maximum wait by tenant
+        """
+        return {tenant: wait_summary(stats) for tenant, stats in self._stats.items()}
+
+    def _tenant_stats(self, tenant: Hashable) -> Dict[str, float]:
+        stats = self._stats.get(tenant)
+        if stats is not None:
+            self._stats.move_to_end(tenant)
+            return stats
+        self._evict_stats()
+        stats = self._stats[tenant] = new_wait_stats()
+        return stats
+
+    def _evict_stats(self) -> None:
+        # tenants with queued messages are skipped, their stats are still needed
+        for _ in range(len(self._stats)):
+            if len(self._stats) < self.max_stats:
+                return
+            tenant, stats = next(iter(self._stats.items()))
+            if stats["queued"]:
+                self._stats.move_to_end(tenant)
+            else:
+                del self._stats[tenant]
+
+    def __len__(self) -> int:
+        return sum(tenant.queued for tenant in self._tenants.values())
+
+
+class FairSender(QueueSender):
+    """
+    Send webhooks of many tenants from worker threads, fair between tenants.
+
+    Messages are dequeued by deficit round-robin over the tenants. When a
+    webhook is rate limited, its message goes back into the queue of its tenant
+    and the worker sends the message of another tenant instead of sleeping.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        weights: Optional[Dict[Hashable, float]] = None,
+        default_weight: float = 1,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        """
+        Init fair sender.
+        :param int workers: number of threads that send messages
+        :param weights: (optional) messages per round by tenant
+        :param float default_weight: messages per round of other tenants
+        :param session: (optional) requests session whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        :param transport: (optional) transport that sends the requests, every
+        worker uses a session of its own if neither session nor transport is set
+        """
+        queue = FairQueue(weights, default_weight)
+        super().__init__(queue, workers, session, rate_limiter, transport)
+
+    def submit(self, webhook, tenant: Hashable) -> "Future[SendResult]":
+        """
+        Queue a webhook of a tenant.
+        :param webhook: DiscordWebhook or PreparedMessage
+        :param tenant: key of the tenant, e.g. the customer id
+        :return: future of the SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        future: "Future[SendResult]" = Future()
+        self._submit(TenantMessage(message, tenant, time.monotonic(), future))
+        return future
+
+    def set_weight(self, tenant: Hashable, weight: float) -> None:
+        """
+        Set the messages per round of a tenant.
+        :param tenant: key of the tenant
+        :param float weight: messages per round, at least 1
+        """
+        with self._condition:
+            self._queue.set_weight(tenant, weight)
+
+
+class AsyncFairSender(AsyncQueueSender):
+    """
+    Async version of FairSender that sends from worker tasks.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        weights: Optional[Dict[Hashable, float]] = None,
+        default_weight: float = 1,
+        client=None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        """
+        Init async fair sender.
+        :param int workers: number of tasks that send messages
+        :param weights: (optional) messages per round by tenant
+        :param float default_weight: messages per round of other tenants
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        """
+        queue = FairQueue(weights, default_weight)
+        super().__init__(queue, workers, client, rate_limiter)
+
+    def submit(self, webhook, tenant: Hashable) -> "asyncio.Future":
+        """
+        Queue a webhook of a tenant, must be called from the running event loop.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param tenant: key of the tenant, e.g. the customer id
+        :return: future of the SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        future = asyncio.get_running_loop().create_future()
+        self._submit(TenantMessage(message, tenant, time.monotonic(), future))
+        return future
+
+    async def send(self, webhook, tenant: Hashable) -> SendResult:
+        """
+        Queue a webhook of a tenant and wait until it has been sent.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param tenant: key of the tenant, e.g. the customer id
+        :return: SendResult
+        """
+        return await self.submit(webhook, tenant)
+
+    def set_weight(self, tenant: Hashable, weight: float) -> None:
+        """
+        Set the messages per round of a tenant.
+        :param tenant: key of the tenant
+        :param float weight: messages per round, at least 1
+        """
+        self._queue.set_weight(tenant, weight)
+
+
+def _ready(
+    tenant: _Tenant, delay: Callable[[str], float], delays: Dict[str, float]
+) -> Tuple[Optional[Deque[TenantMessage]], float]:
+    """
+    Find the queue of the oldest message of a tenant whose url isn't rate limited.
+    :return: the queue or None and the seconds until a url of the tenant is free
+    """
+    best: Optional[Deque[TenantMessage]] = None
+    min_wait = float("inf")
+    for url, queue in tenant.urls.items():
+        if url not in delays:
+            delays[url] = delay(url)
+        if delays[url] > 0:
+            min_wait = min(min_wait, delays[url])
+        elif best is None or queue[0].queued_at < best[0].queued_at:
+            best = queue
+    return best, min_wait
+
+
+def _check_weight(weight: float) -> float:
+    if weight < 1:
+        raise ValueError("weight must be at least 1")
+    return weight
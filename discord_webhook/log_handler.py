@@ -0,0 +1,269 @@
+import copy
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from .constants import (
+    CONTENT_LIMIT,
+    DESCRIPTION_LIMIT,
+    EMBED_LIMIT,
+    TITLE_LIMIT,
+    TOTAL_EMBED_LIMIT,
+)
+from .webhook import DiscordEmbed, DiscordWebhook
+
+DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+LEVEL_COLORS = {
+    logging.DEBUG: 0x95A5A6,
+    logging.INFO: 0x3498DB,
+    logging.WARNING: 0xF1C40F,
+    logging.ERROR: 0xE74C3C,
+    logging.CRITICAL: 0x992D22,
+}
+
+
+class DiscordLogHandler(logging.Handler):
+    """
+    Logging handler that sends log records to a Discord webhook.
+
+    Records are only put into a queue by the logging thread. A background thread
+    batches the records of each flush window into as few messages as the Discord
+    limits allow and sends them, so logging never waits for the network.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        level: int = logging.NOTSET,
+        flush_interval: float = 2.0,
+        max_queue_size: int = 10000,
+        style: str = "code",
+        session: Optional[requests.Session] = None,
+        shutdown_timeout: float = 10.0,
+        **webhook_kwargs: Any,
+    ) -> None:
+        """
+        Init Discord log handler.
+        :param str url: your discord webhook url
+        :param int level: minimum level of the records that are sent
+        :param float flush_interval: seconds records are collected before sending
+        :param int max_queue_size: records that are dropped once the queue is full
+        :param str style: send records as "code" blocks or as "embed"s
+        :param session: (optional) requests session whose connections are reused
+        :param float shutdown_timeout: maximum seconds flush() and close() wait for
+        the remaining records, so a hanging network never blocks the exit
+        :param webhook_kwargs: kwargs of the DiscordWebhook, e.g. username, the
+        request timeout is 10 seconds by default
+        """
+        super().__init__(level)
+        if style not in ("code", "embed"):
+            raise ValueError("style must be 'code' or 'embed'")
+        if style == "code":
+            self.setFormatter(logging.Formatter(DEFAULT_FORMAT))
+        self.url = url
+        self.flush_interval = flush_interval
+        self.style = style
+        self.session = session or requests.Session()
+        self.shutdown_timeout = shutdown_timeout
+        self.webhook_kwargs = {
+            "rate_limit_retry": True,
+            "timeout": 10.0,
+            **webhook_kwargs,
+        }
+        # emitted and dropped are counted by the logging threads
+        self._counter_lock = threading.Lock()
+        self.emitted = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.messages = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="DiscordLogHandler", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the handler.
+        :return: emitted, dropped, sent and failed records and sent messages
+        """
+        return {
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "messages": self.messages,
+            "queued": self._queue.qsize(),
+        }
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Queue the record without blocking.
+        :param record: log record
+        """
+        try:
+            if threading.get_ident() == self._thread.ident:
+                # don't send the logs of sending logs
+                return
+            if self._stopping.is_set():
+                self._count_dropped()
+                return
+            try:
+                self._queue.put_nowait(self.prepare(record))
+            except queue.Full:
+                self._count_dropped()
+            else:
+                with self._counter_lock:
+                    self.emitted += 1
+        except Exception:
+            self.handleError(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Format the record now, its arguments could be changed before it is sent
+        and its traceback can't be passed to the background thread.
+        :param record: log record
+        :return: copy of the record whose message is the formatted text
+        """
+        text = self.format(record)
+        record = copy.copy(record)
+        record.message = text
+        record.msg = text
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.stack_info = None
+        return record
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued records have been sent.
+        :param float timeout: (optional) maximum seconds to wait, the
+        `shutdown_timeout` by default
+        :return: whether all records were sent
+        """
+        if timeout is None:
+            timeout = self.shutdown_timeout
+        if not self._thread.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """
+        Send the remaining records and stop the background thread. Records that
+        aren't sent within the `shutdown_timeout` are lost.
+        """
+        if not self._stopping.is_set():
+            self._stopping.set()
+            self._thread.join(self.shutdown_timeout)
+        super().close()
+
+    def _count_dropped(self) -> None:
+        with self._counter_lock:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch, waiters = [], []
+            self._collect(item, batch, waiters)
+            deadline = time.monotonic() + self.flush_interval
+            while not waiters and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._collect(self._queue.get(timeout=remaining), batch, waiters)
+                except queue.Empty:
+                    break
+            # a flush or close sends everything that is queued right away
+            while True:
+                try:
+                    self._collect(self._queue.get_nowait(), batch, waiters)
+                except queue.Empty:
+                    break
+            if batch:
+                self._send(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    @staticmethod
+    def _collect(item, batch: List, waiters: List) -> None:
+        if isinstance(item, threading.Event):
+            waiters.append(item)
+        else:
+            batch.append(item)
+
+    def _send(self, records: List[logging.LogRecord]) -> None:
+        if self.style == "code":
+            messages = self._code_messages(records)
+        else:
+            messages = self._embed_messages(records)
+        for webhook, count in messages:
+            try:
+                result = webhook.prepare().send(self.session)
+                ok = result.ok
+            except Exception:
+                ok = False
+            if ok:
+                self.sent += count
+                self.messages += 1
+            else:
+                self.failed += count
+
+    def _code_messages(self, records: List[logging.LogRecord]):
+        fence_size = len("```\n```")
+        lines, size = [], fence_size
+        for record in records:
+            line = self._format(record)[: CONTENT_LIMIT - fence_size - 1] + "\n"
+            if lines and size + len(line) > CONTENT_LIMIT:
+                yield self._webhook(content=f"```\n{''.join(lines)}```"), len(lines)
+                lines, size = [], fence_size
+            lines.append(line)
+            size += len(line)
+        if lines:
+            yield self._webhook(content=f"```\n{''.join(lines)}```"), len(lines)
+
+    def _embed_messages(self, records: List[logging.LogRecord]):
+        embeds, size = [], 0
+        for record in records:
+            title = f"{record.levelname} {record.name}"[:TITLE_LIMIT]
+            embed = DiscordEmbed(
+                title=title,
+                description=self._format(record)[:DESCRIPTION_LIMIT],
+                color=LEVEL_COLORS.get(record.levelno, LEVEL_COLORS[logging.ERROR]),
+            )
+            embed.set_timestamp(record.created)
+            embed_size = len(title) + len(embed.description)
+            if embeds and (
+                len(embeds) == EMBED_LIMIT or size + embed_size > TOTAL_EMBED_LIMIT
+            ):
+                yield self._webhook(embeds=embeds), len(embeds)
+                embeds, size = [], 0
+            embeds.append(embed)
+            size += embed_size
+        if embeds:
+            yield self._webhook(embeds=embeds), len(embeds)
+
+    @staticmethod
+    def _format(record: logging.LogRecord) -> str:
+        # a log line must not close the code block
+        return record.getMessage().replace("```", "`\u200b``")
+
+    def _webhook(self, **kwargs: Any) -> DiscordWebhook:
+        return DiscordWebhook(self.url, **self.webhook_kwargs, **kwargs)
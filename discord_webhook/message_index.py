@@ -0,0 +1,304 @@
+import sqlite3
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+from .async_webhook import AsyncDiscordWebhook
+from .cache import LRUCache
+from .prepared import message_fingerprint
+from .webhook import DiscordWebhook
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    thread_id TEXT,
+    message_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL
+)
+"""
+
+
+class IndexEntry(NamedTuple):
+    """
+    Where a message was sent to and what it contained.
+    """
+
+    url: str
+    thread_id: Optional[str]
+    message_id: str
+    fingerprint: str
+
+
+class MessageIndex:
+    """
+    Map keys of your application to sent messages, so they can be edited or
+    deleted later without keeping the webhook in memory.
+
+    Recently used entries are kept in an LRU cache. With a path all entries are
+    also stored in a SQLite database, so the messages can be edited or deleted
+    by key from other processes or after a restart.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size: int = 10000) -> None:
+        """
+        Init message index.
+        :param str path: (optional) SQLite database file, entries are only kept in
+        memory if not set
+        :param int max_size: maximum number of entries kept in memory
+        """
+        self.path = path
+        self._cache = LRUCache(max_size=max_size)
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            # readers of other processes don't block the writer
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[IndexEntry]:
+        """
+        Get the entry of a key.
+        :param str key: key of the message
+        :return: IndexEntry or None if the key is unknown
+        """
+        entry = self._cache.get(key)
+        if entry is not None or self._db is None:
+            return entry
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, thread_id, message_id, fingerprint FROM messages"
+                " WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = IndexEntry(*row)
+        self._cache.set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: IndexEntry) -> None:
+        """
+        Store the entry of a key.
+        :param str key: key of the message
+        :param entry: IndexEntry
+        """
+        self._cache.set(key, entry)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)",
+                    (key, *entry),
+                )
+                self._db.commit()
+
+    def pop(self, key: str) -> Optional[IndexEntry]:
+        """
+        Remove the entry of a key.
+        :param str key: key of the message
+        :return: removed IndexEntry or None
+        """
+        entry = self.get(key)
+        self._cache.pop(key)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute("DELETE FROM messages WHERE key = ?", (key,))
+                self._db.commit()
+        return entry
+
+    def record(
+        self, key: str, webhook, fingerprint: Optional[str] = None
+    ) -> IndexEntry:
+        """
+        Store the message of an executed webhook.
+        :param str key: key of the message
+        :param webhook: executed DiscordWebhook instance
+        :param str fingerprint: (optional) fingerprint of the message before it was
+        sent, files are removed after execution
+        :return: IndexEntry
+        """
+        entry = IndexEntry(
+            url=webhook.url,
+            thread_id=str(webhook.thread_id) if webhook.thread_id else None,
+            message_id=webhook.id,
+            fingerprint=fingerprint or message_fingerprint(webhook),
+        )
+        self.set(key, entry)
+        return entry
+
+    def execute(self, key: str, webhook, remove_embeds: bool = False):
+        """
+        Execute the webhook and store its message under the key.
+        :param str key: key of the message
+        :param webhook: DiscordWebhook instance
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook
+        """
+        fingerprint = message_fingerprint(webhook)
+        response = webhook.execute(remove_embeds=remove_embeds)
+        self._executed(key, webhook, fingerprint, response)
+        return response
+
+    def edit(self, key: str, webhook, force: bool = False):
+        """
+        Replace the message of the key with the data of the webhook.
+        :param str key: key of the message
+        :param webhook: DiscordWebhook instance, its url, thread_id and id are set
+        from the index
+        :param bool force: also edit the message if its content hasn't changed
+        :return: Response of the edit or None if the message is unchanged
+        """
+        fingerprint = self._prepare_edit(key, webhook, force)
+        if fingerprint is None:
+            return None
+        response = webhook.edit()
+        self._edited(key, webhook, fingerprint, response)
+        return response
+
+    def upsert(self, key: str, webhook):
+        """
+        Edit the message of the key or send a new one if the key is unknown or
+        the message has been deleted.
+        :param str key: key of the message
+        :param webhook: DiscordWebhook instance
+        :return: Response or None if the message is unchanged
+        """
+        if key in self:
+            response = self.edit(key, webhook)
+            if response is None or response.status_code != 404:
+                return response
+            webhook.id = None
+        return self.execute(key, webhook)
+
+    def delete(self, key: str, **kwargs):
+        """
+        Delete the message of the key.
+        :param str key: key of the message
+        :param kwargs: kwargs of the DiscordWebhook that deletes the message, e.g.
+        `session`, `transport` or `rate_limit_retry`
+        :return: Response or None if the key is unknown
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        response = self._webhook(DiscordWebhook, entry, kwargs).delete()
+        self._deleted(key, response)
+        return response
+
+    async def execute_async(self, key: str, webhook, remove_embeds: bool = False):
+        """
+        Async version of execute.
+        :param str key: key of the message
+        :param webhook: AsyncDiscordWebhook instance
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook
+        """
+        fingerprint = message_fingerprint(webhook)
+        response = await webhook.execute(remove_embeds=remove_embeds)
+        self._executed(key, webhook, fingerprint, response)
+        return response
+
+    async def edit_async(self, key: str, webhook, force: bool = False):
+        """
+        Async version of edit.
+        :param str key: key of the message
+        :param webhook: AsyncDiscordWebhook instance
+        :param bool force: also edit the message if its content hasn't changed
+        :return: Response of the edit or None if the message is unchanged
+        """
+        fingerprint = self._prepare_edit(key, webhook, force)
+        if fingerprint is None:
+            return None
+        response = await webhook.edit()
+        self._edited(key, webhook, fingerprint, response)
+        return response
+
+    async def upsert_async(self, key: str, webhook):
+        """
+        Async version of upsert.
+        :param str key: key of the message
+        :param webhook: AsyncDiscordWebhook instance
+        :return: Response or None if the message is unchanged
+        """
+        if key in self:
+            response = await self.edit_async(key, webhook)
+            if response is None or response.status_code != 404:
+                return response
+            webhook.id = None
+        return await self.execute_async(key, webhook)
+
+    async def delete_async(self, key: str, **kwargs):
+        """
+        Async version of delete.
+        :param str key: key of the message
+        :param kwargs: kwargs of the AsyncDiscordWebhook that deletes the message
+        :return: Response or None if the key is unknown
+        """
+        entry = self.get(key)
+        if entry is None:
+            return None
+        response = await self._webhook(AsyncDiscordWebhook, entry, kwargs).delete()
+        self._deleted(key, response)
+        return response
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
+
+    def __enter__(self) -> "MessageIndex":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        if self._db is None:
+            return len(self._cache)
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def _prepare_edit(self, key: str, webhook, force: bool) -> Optional[str]:
+        """
+        Point the webhook to the message of the key.
+        :return: fingerprint of the new message or None if nothing has changed
+        """
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        webhook.url = entry.url
+        webhook.thread_id = entry.thread_id
+        webhook.id = entry.message_id
+        fingerprint = message_fingerprint(webhook)
+        if fingerprint == entry.fingerprint and not force:
+            return None
+        return fingerprint
+
+    def _executed(self, key: str, webhook, fingerprint: str, response) -> None:
+        if response.status_code in [200, 204] and webhook.id:
+            self.record(key, webhook, fingerprint)
+
+    def _edited(self, key: str, webhook, fingerprint: str, response) -> None:
+        if response.status_code in [200, 204]:
+            self.record(key, webhook, fingerprint)
+        elif response.status_code == 404:
+            # the message has been deleted in Discord
+            self.pop(key)
+
+    def _deleted(self, key: str, response) -> None:
+        if response.status_code in [200, 204, 404]:
+            self.pop(key)
+
+    @staticmethod
+    def _webhook(webhook_class, entry: IndexEntry, kwargs: Dict[str, Any]):
+        return webhook_class(
+            entry.url, id=entry.message_id, thread_id=entry.thread_id, **kwargs
+        )
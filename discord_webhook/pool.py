@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from http.client import HTTPException
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import requests
+
+from .prepared import PreparedMessage, SendResult
+from .rate_limit import RateLimiter
+from .transport import ThreadLocalTransport
+
+logger = logging.getLogger(__name__)
+
+LOCK_STRIPES = 64
+
+
+class WebhookPool:
+    """
+    Spread messages for one channel or thread over several webhook urls.
+
+    Discord rate limits every webhook separately, so each message is sent with
+    the url that has the most rate limit headroom left. Messages with the same
+    key always use the same url (as long as it's available) and are sent one
+    after another, so related messages stay in order. Urls that respond with 401
+    or 404 are removed from the rotation.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        """
+        Init webhook pool.
+        :param urls: webhook urls of the same channel or thread
+        :param session: (optional) requests session whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        """
+        self.urls: List[str] = list(dict.fromkeys(urls))
+        if not self.urls:
+            raise ValueError("WebhookPool needs at least one webhook url")
+        self.removed_urls: Dict[str, int] = {}
+        self.session = session
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # threads sending through the pool don't share a session unless one is given
+        self._transport = None if session is not None else ThreadLocalTransport()
+        self._in_flight: Dict[str, int] = {url: 0 for url in self.urls}
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._async_key_locks: Optional[List[asyncio.Lock]] = None
+
+    def select(self, key: Optional[Hashable] = None) -> Tuple[str, float]:
+        """
+        Select the url for the next message.
+        :param key: (optional) messages with the same key use the same url
+        :return: url and the seconds to wait until it can be used
+        """
+        with self._lock:
+            if not self.urls:
+                raise RuntimeError("No webhook url left in the WebhookPool")
+            if key is not None:
+                url = max(self.urls, key=lambda u: _rendezvous(key, u))
+                return url, self.rate_limiter.delay(url)
+            best, best_score = None, None
+            for url in self.urls:
+                delay = self.rate_limiter.delay(url)
+                headroom = self.rate_limiter.headroom(url)
+                # unknown headroom is treated like a fresh bucket
+                headroom = 1000 if headroom is None else headroom
+                score = (-delay, headroom - self._in_flight[url])
+                if best_score is None or score > best_score:
+                    best, best_score = url, score
+            return best, -best_score[0]
+
+    def send(self, webhook, key: Optional[Hashable] = None) -> SendResult:
+        """
+        Send the webhook with the url that has the most headroom.
+        :param webhook: DiscordWebhook or PreparedMessage
+        :param key: (optional) messages with the same key use the same url and
+        are sent in order
+        :return: SendResult, `url` is the webhook url that was used
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        if key is None:
+            return self._send(message, None)
+        with self._key_locks[hash(key) % LOCK_STRIPES]:
+            return self._send(message, key)
+
+    def execute(self, webhook, key: Optional[Hashable] = None) -> SendResult:
+        """
+        Send the webhook and store the used url, message id and attachments in it,
+        so it can be edited or deleted afterward.
+        :param webhook: DiscordWebhook instance
+        :param key: (optional) messages with the same key use the same url
+        :return: SendResult
+        """
+        result = self.send(webhook, key)
+        _apply_result(webhook, result)
+        return result
+
+    async def send_async(
+        self, webhook, key: Optional[Hashable] = None, client=None
+    ) -> SendResult:
+        """
+        Async version of send.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param key: (optional) messages with the same key use the same url
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :return: SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        if key is None:
+            return await self._send_async(message, None, client)
+        if self._async_key_locks is None:
+            self._async_key_locks = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+        async with self._async_key_locks[hash(key) % LOCK_STRIPES]:
+            return await self._send_async(message, key, client)
+
+    async def execute_async(
+        self, webhook, key: Optional[Hashable] = None, client=None
+    ) -> SendResult:
+        """
+        Async version of execute.
+        :param webhook: AsyncDiscordWebhook instance
+        :param key: (optional) messages with the same key use the same url
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :return: SendResult
+        """
+        result = await self.send_async(webhook, key, client)
+        _apply_result(webhook, result)
+        return result
+
+    def remove(self, url: str, status_code: int = 0) -> None:
+        """
+        Remove a url from the rotation.
+        :param str url: webhook url
+        :param int status_code: status code that caused the removal
+        """
+        with self._lock:
+            if url in self.urls:
+                self.urls.remove(url)
+                self.removed_urls[url] = status_code
+                logger.warning(
+                    f"Webhook url removed from pool (status code {status_code})"
+                )
+
+    def close(self) -> None:
+        """
+        Close the sessions of the threads that sent through the pool, a given
+        session is left open.
+        """
+        if self._transport is not None:
+            self._transport.close()
+
+    def __enter__(self) -> "WebhookPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _send(self, message: PreparedMessage, key: Optional[Hashable]) -> SendResult:
+        while True:
+            url, delay = self.select(key)
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            transport = None
+            if self._transport is not None:
+                transport = self._transport.for_proxies(message.proxies)
+            self._start(url)
+            try:
+                result = message.replace(url=url).send(
+                    self.session, rate_limit_retry=False, transport=transport
+                )
+            finally:
+                self._finish(url)
+            if not self._retry(url, result):
+                return result
+
+    async def _send_async(
+        self, message: PreparedMessage, key: Optional[Hashable], client
+    ) -> SendResult:
+        while True:
+            url, delay = self.select(key)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            self._start(url)
+            try:
+                result = await message.replace(url=url).send_async(
+                    client, rate_limit_retry=False
+                )
+            finally:
+                self._finish(url)
+            if not self._retry(url, result):
+                return result
+
+    def _start(self, url: str) -> None:
+        self.rate_limiter.reserve(url)
+        with self._lock:
+            self._in_flight[url] += 1
+
+    def _finish(self, url: str) -> None:
+        with self._lock:
+            self._in_flight[url] -= 1
+
+    def _retry(self, url: str, result: SendResult) -> bool:
+        """
+        Check the response and decide if the message has to be sent again.
+        :return: whether the message should be sent with another (or the same) url
+        """
+        response = result.response
+        self.rate_limiter.update(url, response)
+        if response.status_code in [401, 404]:
+            self.remove(url, response.status_code)
+            return True
+        if response.status_code == 429:
+            if not response.headers.get("Via"):
+                # not rate limited by the webhook, but e.g. blocked by Cloudflare
+                raise HTTPException(response.content.decode("utf-8"))
+            return True
+        return False
+
+
+def _rendezvous(key: Hashable, url: str) -> bytes:
+    """
+    Highest random weight of a url for a key. Removing a url only moves the keys
+    that used it to other urls.
+    """
+    return hashlib.blake2b(f"{key!r}\0{url}".encode("utf-8"), digest_size=8).digest()
+
+
+def _apply_result(webhook, result: SendResult) -> None:
+    if isinstance(webhook, PreparedMessage):
+        return
+    webhook.url = result.url
+    if result.id:
+        webhook.id = result.id
+    if result.attachments:
+        webhook.attachments = list(result.attachments)
@@ -0,0 +1,240 @@
+import hashlib
+import json
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import requests
+from urllib3 import encode_multipart_formdata
+
+from .transport import (
+    AsyncHttpxTransport,
+    AsyncTransport,
+    Request,
+    RequestsTransport,
+    Transport,
+    httpx_proxy,
+    log_response,
+    send_request,
+    send_request_async,
+)
+
+
+class SendResult(NamedTuple):
+    """
+    Result of sending a prepared message.
+    """
+
+    response: Any
+    id: Optional[str]
+    channel_id: Optional[str]
+    attachments: Tuple[Dict[str, Any], ...]
+    url: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.response.status_code in [200, 204]
+
+    @classmethod
+    def from_response(cls, response, url: Optional[str] = None) -> "SendResult":
+        """
+        Read the message id and attachments from a response.
+        :param response: response of requests or httpx
+        :param str url: webhook url the message was sent to
+        :return: SendResult
+        """
+        try:
+            content = json.loads(response.content.decode("utf-8"))
+        except ValueError:
+            content = {}
+        if not isinstance(content, dict):
+            content = {}
+        return cls(
+            response=response,
+            id=content.get("id") if response.status_code in [200, 204] else None,
+            channel_id=content.get("channel_id"),
+            attachments=tuple(content.get("attachments") or ()),
+            url=url,
+        )
+
+
+@dataclass(frozen=True)
+class PreparedMessage:
+    """
+    Immutable, pre-encoded webhook message.
+
+    A prepared message doesn't share any mutable state, so it can be sent from
+    any number of threads or coroutines at once. Every send returns its own
+    SendResult instead of changing the webhook it was prepared from.
+    """
+
+    url: str
+    body: bytes
+    content_type: str
+    method: str = "POST"
+    params: Tuple[Tuple[str, str], ...] = ()
+    proxies: Tuple[Tuple[str, str], ...] = ()
+    timeout: Optional[float] = None
+    rate_limit_retry: bool = False
+    filenames: Tuple[str, ...] = ()
+    fingerprint: str = field(default="", compare=False)
+
+    @classmethod
+    def from_webhook(
+        cls, webhook, method: str = "POST", fingerprint: bool = True
+    ) -> "PreparedMessage":
+        """
+        Encode the current data of a webhook without changing it.
+        :param webhook: DiscordWebhook instance
+        :param str method: HTTP method, "PATCH" edits the message of `webhook.id`
+        :param bool fingerprint: compute the fingerprint of the message
+        :return: PreparedMessage
+        """
+        url = webhook.url
+        if method != "POST":
+            assert isinstance(
+                webhook.id, str
+            ), "Webhook ID needs to be set in order to edit the webhook."
+            url = f"{url}/messages/{webhook.id}"
+        payload = json.dumps(webhook._payload())
+        files = [
+            (key, value)
+            for key, value in webhook.files.items()
+            if key != "payload_json" and value[0] is not None
+        ]
+        if files:
+            body, content_type = encode_multipart_formdata(
+                files + [("payload_json", (None, payload))]
+            )
+        else:
+            body, content_type = payload.encode("utf-8"), "application/json"
+        return cls(
+            url=url,
+            body=body,
+            content_type=content_type,
+            method=method,
+            params=tuple((k, str(v)) for k, v in webhook._query_params.items()),
+            proxies=tuple((webhook.proxies or {}).items()),
+            timeout=webhook.timeout,
+            rate_limit_retry=webhook.rate_limit_retry,
+            filenames=tuple(value[0] for _, value in files),
+            fingerprint=message_fingerprint(webhook) if fingerprint else "",
+        )
+
+    def replace(self, **changes: Any) -> "PreparedMessage":
+        """
+        Copy the prepared message with some fields replaced, e.g. another url.
+        :return: PreparedMessage
+        """
+        return replace(self, **changes)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": self.content_type}
+
+    def to_request(self) -> Request:
+        """
+        Request of the prepared message that can be sent with any transport.
+        :return: Request
+        """
+        return Request(
+            method=self.method,
+            url=self.url,
+            params=self.params,
+            headers=tuple(self.headers.items()),
+            content=self.body,
+            timeout=self.timeout,
+        )
+
+    def send(
+        self,
+        session: Optional[requests.Session] = None,
+        rate_limit_retry: Optional[bool] = None,
+        transport: Optional[Transport] = None,
+    ) -> SendResult:
+        """
+        Send the prepared message.
+        :param session: (optional) requests session whose connections are reused
+        :param bool rate_limit_retry: overrides the `rate_limit_retry` of the webhook
+        :param transport: (optional) transport that sends the request instead of
+        requests
+        :return: SendResult
+        """
+        if transport is None:
+            transport = RequestsTransport(session, proxies=dict(self.proxies) or None)
+        if rate_limit_retry is None:
+            rate_limit_retry = self.rate_limit_retry
+        response = send_request(transport, self.to_request(), rate_limit_retry)
+        log_response(response)
+        return SendResult.from_response(response, self.webhook_url)
+
+    async def send_async(
+        self,
+        client=None,
+        rate_limit_retry: Optional[bool] = None,
+        transport: Optional[AsyncTransport] = None,
+    ) -> SendResult:
+        """
+        Send the prepared message with httpx.
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :param bool rate_limit_retry: overrides the `rate_limit_retry` of the webhook
+        :param transport: (optional) async transport that sends the request instead
+        of httpx
+        :return: SendResult
+        """
+        if transport is None:
+            transport = AsyncHttpxTransport(client, proxy=self.proxy)
+        if rate_limit_retry is None:
+            rate_limit_retry = self.rate_limit_retry
+        response = await send_request_async(
+            transport, self.to_request(), rate_limit_retry
+        )
+        log_response(response)
+        return SendResult.from_response(response, self.webhook_url)
+
+    @property
+    def webhook_url(self) -> str:
+        """
+        Url of the webhook without the path of an edited message.
+        :return: webhook url
+        """
+        return self.url.split("/messages/", 1)[0]
+
+    @property
+    def proxy(self) -> Optional[str]:
+        """
+        Proxy url that is used by httpx.
+        :return: https or http proxy
+        """
+        return httpx_proxy(dict(self.proxies))
+
+
+def message_fingerprint(webhook) -> str:
+    """
+    Stable fingerprint of the message a webhook would send.
+    Identical messages to the same target always have the same fingerprint.
+    :param webhook: DiscordWebhook instance
+    :return: hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(webhook.url.encode("utf-8"))
+    digest.update(f"\0{webhook.thread_id or ''}\0".encode("utf-8"))
+    payload = webhook._payload()
+    # drop settings of the request that aren't part of the message content
+    for key in ["id", "proxies", "rate_limit_retry", "thread_id", "timeout", "wait"]:
+        payload.pop(key, None)
+    digest.update(
+        json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode(
+            "utf-8"
+        )
+    )
+    for key in sorted(webhook.files):
+        filename, file = webhook.files[key]
+        if filename is None:
+            continue
+        digest.update(f"\0{filename}\0".encode("utf-8"))
+        digest.update(
+            hashlib.sha256(
+                file.encode("utf-8") if isinstance(file, str) else file
+            ).digest()
+        )
+    return digest.hexdigest()
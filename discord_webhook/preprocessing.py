@@ -0,0 +1,272 @@
+import asyncio
+import gzip
+import io
+import logging
+import os
+import zipfile
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Collection, Dict, List, Optional, Tuple, Union
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: nocover
+    # Pillow is an optional dependency, images are sent as they are without it.
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Discord's default upload limit for webhooks
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+# maximum number of files of one message
+MAX_FILES = 10
+TEXT_EXTENSIONS = (".log", ".txt", ".csv", ".json", ".md", ".xml", ".yaml", ".yml")
+IMAGE_FORMATS = {
+    ".png": "PNG",
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".webp": "WEBP",
+}
+
+Files = Dict[str, Tuple[Optional[str], Union[bytes, str]]]
+
+
+class AttachmentPreprocessor:
+    """
+    Shrink attachments before they are uploaded.
+
+    Large text files are compressed, images are downscaled and recompressed (if
+    Pillow is installed) and files that are still too large are split into parts.
+    The work is done in a process pool so neither the sending thread nor the event
+    loop is blocked by it. Files that don't fit into one message can be grouped
+    into batches for follow-up messages with `batch`.
+    """
+
+    def __init__(
+        self,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        compress_threshold: int = 1024 * 1024,
+        archive_format: str = "gzip",
+        image_max_size: Tuple[int, int] = (1920, 1920),
+        image_quality: int = 85,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Init attachment preprocessor.
+        :param int max_file_size: upload limit of a message, larger files are split
+        into parts
+        :param int compress_threshold: files smaller than this are sent unchanged
+        :param str archive_format: archive for text files, "gzip" or "zip"
+        :param tuple image_max_size: maximum width and height of images
+        :param int image_quality: quality of recompressed JPEG and WEBP images
+        :param executor: (optional) executor that processes the files, a process
+        pool is created on first use if not set
+        :param int max_workers: number of processes of the created process pool
+        """
+        if archive_format not in ("gzip", "zip"):
+            raise ValueError("archive_format must be 'gzip' or 'zip'")
+        self.options = {
+            "max_file_size": max_file_size,
+            "archive_format": archive_format,
+            "image_max_size": image_max_size,
+            "image_quality": image_quality,
+        }
+        self.compress_threshold = compress_threshold
+        self.max_workers = max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        """
+        Executor that processes the files.
+        :return: Executor
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(
+        self, files: Files, referenced: Collection[str] = ()
+    ) -> Dict[str, Future]:
+        """
+        Submit the files that need preprocessing to the executor.
+        :param dict files: files of a webhook
+        :param referenced: filenames used by embeds (`attachment://<filename>`),
+        these files are never renamed, so they are only shrunk if they are images
+        :return: futures of the processed files by key
+        """
+        return {
+            key: self.executor.submit(
+                process_file,
+                filename,
+                file,
+                {**self.options, "rename": filename not in referenced},
+            )
+            for key, (filename, file) in files.items()
+            if filename is not None and len(file) >= self.compress_threshold
+        }
+
+    def process(self, files: Files, referenced: Collection[str] = ()) -> Files:
+        """
+        Preprocess the files and wait for the result.
+        :param dict files: files of a webhook
+        :param referenced: filenames used by embeds, they keep their name
+        :return: files that should be uploaded instead
+        """
+        futures = self.submit(files, referenced)
+        return self._merge(files, {key: f.result() for key, f in futures.items()})
+
+    async def process_async(
+        self, files: Files, referenced: Collection[str] = ()
+    ) -> Files:
+        """
+        Preprocess the files without blocking the event loop.
+        :param dict files: files of a webhook
+        :param referenced: filenames used by embeds, they keep their name
+        :return: files that should be uploaded instead
+        """
+        futures = self.submit(files, referenced)
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in futures.values())
+        )
+        return self._merge(files, dict(zip(futures.keys(), results)))
+
+    @staticmethod
+    def _merge(files: Files, processed: Dict[str, List[Tuple[str, bytes]]]) -> Files:
+        """
+        Replace processed files while keeping the order of the files.
+        :param dict files: original files
+        :param dict processed: processed files by key of the original file
+        :return: files that should be uploaded
+        """
+        result = {}
+        for key, value in files.items():
+            if key not in processed:
+                result[key] = value
+                continue
+            for filename, file in processed[key]:
+                result[f"_{filename}"] = (filename, file)
+        return result
+
+    def batch(self, files: Files, referenced: Collection[str] = ()) -> List[Files]:
+        """
+        Group files into batches that fit into the upload limit and the file limit
+        of one message each.
+        :param dict files: processed files
+        :param referenced: filenames used by embeds, they are put into the first
+        batch so the embeds can show them
+        :return: files of the message and of its follow-up messages
+        """
+        max_size = self.options["max_file_size"]
+        ordered = sorted(files.items(), key=lambda item: item[1][0] not in referenced)
+        batches: List[Files] = []
+        size = 0
+        for key, (filename, file) in ordered:
+            if (
+                not batches
+                or len(batches[-1]) >= MAX_FILES
+                or size + len(file) > max_size
+            ):
+                batches.append({})
+                size = 0
+            batches[-1][key] = (filename, file)
+            size += len(file)
+        return batches
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shutdown the process pool if it was created by the preprocessor.
+        :param bool wait: wait until pending files are processed
+        """
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def __enter__(self) -> "AttachmentPreprocessor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+
+def process_file(
+    filename: str, file: Union[bytes, str], options: dict
+) -> List[Tuple[str, bytes]]:
+    """
+    Preprocess a single file. This runs in a worker process.
+    :param str filename: filename
+    :param file: file content
+    :param dict options: options of the AttachmentPreprocessor, files are only
+    compressed or split if `rename` is set
+    :return: list of filenames and contents that replace the file
+    """
+    if isinstance(file, str):
+        file = file.encode("utf-8")
+    rename = options.get("rename", True)
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in IMAGE_FORMATS and Image is not None:
+        file = _shrink_image(file, IMAGE_FORMATS[extension], options)
+    elif extension in TEXT_EXTENSIONS and rename:
+        filename, file = _compress(filename, file, options["archive_format"])
+    if not rename:
+        return [(filename, file)]
+    return _split(filename, file, options["max_file_size"])
+
+
+def _shrink_image(file: bytes, image_format: str, options: dict) -> bytes:
+    """
+    Downscale and recompress an image.
+    :param bytes file: image content
+    :param str image_format: Pillow format of the image
+    :param dict options: options of the AttachmentPreprocessor
+    :return: the smaller one of the original and the processed image
+    """
+    try:
+        with Image.open(io.BytesIO(file)) as image:
+            image.thumbnail(options["image_max_size"])
+            if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            save_kwargs = {"optimize": True}
+            if image_format in ("JPEG", "WEBP"):
+                save_kwargs["quality"] = options["image_quality"]
+            image.save(output, format=image_format, **save_kwargs)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Attachment image could not be processed, sending it as is")
+        return file
+    processed = output.getvalue()
+    return processed if len(processed) < len(file) else file
+
+
+def _compress(filename: str, file: bytes, archive_format: str) -> Tuple[str, bytes]:
+    """
+    Compress a text file.
+    :param str filename: filename
+    :param bytes file: file content
+    :param str archive_format: "gzip" or "zip"
+    :return: filename and content of the archive
+    """
+    if archive_format == "gzip":
+        return f"{filename}.gz", gzip.compress(file, compresslevel=6)
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(filename, file)
+    return f"{os.path.splitext(filename)[0]}.zip", output.getvalue()
+
+
+def _split(filename: str, file: bytes, max_file_size: int) -> List[Tuple[str, bytes]]:
+    """
+    Split a file into numbered parts that fit into the upload limit.
+    The parts can be joined with e.g. `cat file.gz.* > file.gz`.
+    :param str filename: filename
+    :param bytes file: file content
+    :param int max_file_size: maximum size of a part
+    :return: list of filenames and contents of the parts
+    """
+    if len(file) <= max_file_size:
+        return [(filename, file)]
+    return [
+        (f"{filename}.{number:03d}", file[offset : offset + max_file_size])
+        for number, offset in enumerate(range(0, len(file), max_file_size), start=1)
+    ]
@@ -0,0 +1,231 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+import requests
+
+from .prepared import PreparedMessage, SendResult
+from .queue_sender import (
+    AsyncQueueSender,
+    QueuedItem,
+    QueueSender,
+    new_wait_stats,
+    record_wait,
+    wait_summary,
+)
+from .rate_limit import RateLimiter
+from .transport import Transport
+
+
+class Priority(IntEnum):
+    BULK = 0
+    LOW = 1
+    NORMAL = 2
+    HIGH = 3
+    CRITICAL = 4
+
+
+class QueuedMessage(QueuedItem):
+    """
+    Prepared message waiting in a priority lane.
+    """
+
+    __slots__ = ("priority",)
+
+    def __init__(
+        self, message: PreparedMessage, priority: int, queued_at: float, future
+    ) -> None:
+        super().__init__(message, queued_at, future)
+        self.priority = priority
+
+
+class PriorityLanes:
+    """
+    Queued messages by priority and webhook url.
+
+    The next message is the one with the highest priority whose webhook isn't
+    rate limited. Every `aging` seconds a message waits it is treated as one
+    priority higher, so low priority messages are never starved. The lanes are
+    not thread-safe on their own.
+    """
+
+    def __init__(self, aging: float = 30.0) -> None:
+        """
+        Init priority lanes.
+        :param float aging: seconds of waiting that raise the priority by one
+        """
+        self.aging = aging
+        self._lanes: Dict[int, "OrderedDict[str, Deque[QueuedMessage]]"] = {}
+        self._stats: Dict[int, Dict[str, float]] = {}
+
+    def push(self, item: QueuedMessage, front: bool = False) -> None:
+        """
+        Add a message to its lane.
+        :param item: queued message
+        :param bool front: put the message in front of its lane, e.g. after a retry
+        """
+        lane = self._lanes.setdefault(item.priority, OrderedDict())
+        queue = lane.setdefault(item.message.url, deque())
+        if front:
+            queue.appendleft(item)
+        else:
+            queue.append(item)
+        self._lane_stats(item.priority)["queued"] += 1
+
+    def pop(
+        self, now: float, delay: Callable[[str], float]
+    ) -> Tuple[Optional[QueuedMessage], Optional[float]]:
+        """
+        Remove the next message that can be sent.
+        :param float now: current time
+        :param delay: function returning the seconds until a url can be used
+        :return: the message or None and the seconds until the next message can
+        be sent (None if no messages are queued)
+        """
+        best: Optional[Deque[QueuedMessage]] = None
+        best_score: Tuple[float, float] = (float("-inf"), 0.0)
+        min_wait: Optional[float] = None
+        delays: Dict[str, float] = {}
+        for priority, lane in self._lanes.items():
+            for url, queue in lane.items():
+                if url not in delays:
+                    delays[url] = delay(url)
+                if delays[url] > 0:
+                    if min_wait is None or delays[url] < min_wait:
+                        min_wait = delays[url]
+                    continue
+                head = queue[0]
+                score = (
+                    priority + (now - head.queued_at) / self.aging,
+                    -head.queued_at,
+                )
+                if score > best_score:
+                    best, best_score = queue, score
+        if best is None:
+            return None, min_wait
+        item = best.popleft()
+        if not best:
+            lane = self._lanes[item.priority]
+            del lane[item.message.url]
+            if not lane:
+                del self._lanes[item.priority]
+        item.dispatched_at = now
+        item.attempts += 1
+        self._lane_stats(item.priority)["queued"] -= 1
+        return item, 0.0
+
+    def record(self, item: QueuedMessage) -> None:
+        """
+        Record the wait time of a message that has been sent.
+        :param item: queued message
+        """
+        record_wait(self._lane_stats(item.priority), item)
+
+    def stats(self) -> Dict[int, Dict[str, float]]:
+        """
+        Queue depth and wait times per lane.
+        :return: queued and sent messages, total, average and maximum wait by priority
+        """
+        return {
+            priority: wait_summary(stats)
+            for priority, stats in sorted(self._stats.items())
+        }
+
+    def _lane_stats(self, priority: int) -> Dict[str, float]:
+        if priority not in self._stats:
+            self._stats[priority] = new_wait_stats()
+        return self._stats[priority]
+
+    def __len__(self) -> int:
+        return sum(
+            len(queue) for lane in self._lanes.values() for queue in lane.values()
+        )
+
+
+class PrioritySender(QueueSender):
+    """
+    Send webhooks from worker threads in the order of their priority.
+
+    When a webhook is rate limited, its message goes back into its lane and the
+    worker sends the next message instead of sleeping. Once the rate limit is
+    lifted, the message with the highest priority gets the next slot.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        aging: float = 30.0,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        """
+        Init priority sender.
+        :param int workers: number of threads that send messages
+        :param float aging: seconds of waiting that raise the priority by one
+        :param session: (optional) requests session whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        :param transport: (optional) transport that sends the requests, every
+        worker uses a session of its own if neither session nor transport is set
+        """
+        super().__init__(
+            PriorityLanes(aging), workers, session, rate_limiter, transport
+        )
+
+    def submit(self, webhook, priority: int = Priority.NORMAL) -> "Future[SendResult]":
+        """
+        Queue a webhook.
+        :param webhook: DiscordWebhook or PreparedMessage
+        :param int priority: priority of the message, higher is sent first
+        :return: future of the SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        future: "Future[SendResult]" = Future()
+        self._submit(QueuedMessage(message, priority, time.monotonic(), future))
+        return future
+
+
+class AsyncPrioritySender(AsyncQueueSender):
+    """
+    Async version of PrioritySender that sends from worker tasks.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        aging: float = 30.0,
+        client=None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        """
+        Init async priority sender.
+        :param int workers: number of tasks that send messages
+        :param float aging: seconds of waiting that raise the priority by one
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        """
+        super().__init__(PriorityLanes(aging), workers, client, rate_limiter)
+
+    def submit(self, webhook, priority: int = Priority.NORMAL) -> "asyncio.Future":
+        """
+        Queue a webhook, must be called from the running event loop.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param int priority: priority of the message, higher is sent first
+        :return: future of the SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        future = asyncio.get_running_loop().create_future()
+        self._submit(QueuedMessage(message, priority, time.monotonic(), future))
+        return future
+
+    async def send(self, webhook, priority: int = Priority.NORMAL) -> SendResult:
+        """
+        Queue a webhook and wait until it has been sent.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param int priority: priority of the message, higher is sent first
+        :return: SendResult
+        """
+        return await self.submit(webhook, priority)
@@ -0,0 +1,300 @@
+import asyncio
+import threading
+import time
+from http.client import HTTPException
+from typing import Any, Dict, Optional
+
+import requests
+
+from .prepared import PreparedMessage, SendResult
+from .rate_limit import RateLimiter
+from .transport import ThreadLocalTransport, Transport
+
+
+class QueuedItem:
+    """
+    Prepared message waiting in the queue of a sender.
+    """
+
+    __slots__ = ("message", "queued_at", "dispatched_at", "attempts", "future")
+
+    def __init__(self, message: PreparedMessage, queued_at: float, future) -> None:
+        self.message = message
+        self.queued_at = queued_at
+        self.dispatched_at = queued_at
+        self.attempts = 0
+        self.future = future
+
+
+def new_wait_stats() -> Dict[str, float]:
+    """
+    Create the counters of a lane or tenant.
+    :return: queued and sent messages, total and maximum wait
+    """
+    return {"queued": 0, "sent": 0, "wait_total": 0.0, "wait_max": 0.0}
+
+
+def record_wait(stats: Dict[str, float], item: QueuedItem) -> None:
+    """
+    Record the wait time of a message that has been sent.
+    :param stats: counters of the lane or tenant of the message
+    :param item: queued message
+    """
+    wait = item.dispatched_at - item.queued_at
+    stats["sent"] += 1
+    stats["wait_total"] += wait
+    stats["wait_max"] = max(stats["wait_max"], wait)
+
+
+def wait_summary(stats: Dict[str, float]) -> Dict[str, float]:
+    """
+    Add the average wait to the counters.
+    :param stats: counters of a lane or tenant
+    :return: copy of the counters with `wait_avg`
+    """
+    average = stats["wait_total"] / stats["sent"] if stats["sent"] else 0.0
+    return {**stats, "wait_avg": average}
+
+
+class QueueSender:
+    """
+    Send queued webhooks from worker threads.
+
+    The queue decides which message is sent next, e.g. PriorityLanes or
+    FairQueue. When a webhook is rate limited, its message goes back into the
+    queue and the worker sends the next message instead of sleeping.
+    """
+
+    def __init__(
+        self,
+        queue: Any,
+        workers: int,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        """
+        Init queue sender.
+        :param queue: queue with push, pop, record and stats
+        :param int workers: number of threads that send messages
+        :param session: (optional) requests session whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        :param transport: (optional) transport that sends the requests, every
+        worker uses a session of its own if neither session nor transport is set
+        """
+        self.session = session
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # the workers don't share a session unless one is given
+        self._owns_transport = transport is None and session is None
+        self.transport = ThreadLocalTransport() if self._owns_transport else transport
+        self._queue = queue
+        self._condition = threading.Condition()
+        self._closed = False
+        self._running = workers
+        name = type(self).__name__
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stats(self) -> Dict[Any, Dict[str, float]]:
+        """
+        Queue depth and wait times.
+        :return: stats by lane or tenant
+        """
+        with self._condition:
+            return self._queue.stats()
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting messages and stop the workers once the queue is empty.
+        :param bool wait: wait until all queued messages have been sent
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _submit(self, item: QueuedItem) -> None:
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{type(self).__name__} has been closed")
+            self._queue.push(item)
+            self._condition.notify()
+
+    def _exit(self) -> None:
+        # the last worker closes the transport, also after close(wait=False)
+        self._running -= 1
+        if not self._running and self._owns_transport:
+            self.transport.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    item, wait = self._queue.pop(
+                        time.monotonic(), self.rate_limiter.delay
+                    )
+                    if item is not None:
+                        break
+                    if self._closed and wait is None:
+                        self._exit()
+                        return
+                    self._condition.wait(wait)
+                self.rate_limiter.reserve(item.message.url)
+            if item.attempts == 1 and not item.future.set_running_or_notify_cancel():
+                continue
+            transport = self.transport
+            if self._owns_transport:
+                # the default transport sends through the proxies of the message
+                transport = self.transport.for_proxies(item.message.proxies)
+            try:
+                result = item.message.send(
+                    self.session, rate_limit_retry=False, transport=transport
+                )
+                if _requeue(self.rate_limiter, item, result):
+                    with self._condition:
+                        self._queue.push(item, front=True)
+                        self._condition.notify()
+                    continue
+            except Exception as e:
+                item.future.set_exception(e)
+                continue
+            with self._condition:
+                self._queue.record(item)
+            item.future.set_result(result)
+
+
+class AsyncQueueSender:
+    """
+    Async version of QueueSender that sends from worker tasks.
+    """
+
+    def __init__(
+        self,
+        queue: Any,
+        workers: int,
+        client=None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        """
+        Init async queue sender.
+        :param queue: queue with push, pop, record and stats
+        :param int workers: number of tasks that send messages
+        :param client: (optional) httpx.AsyncClient whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        """
+        self.workers = workers
+        self.client = client
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self._queue = queue
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self._closed = False
+
+    def stats(self) -> Dict[Any, Dict[str, float]]:
+        """
+        Queue depth and wait times.
+        :return: stats by lane or tenant
+        """
+        return self._queue.stats()
+
+    async def close(self) -> None:
+        """
+        Stop accepting messages and wait until all queued messages have been sent.
+        """
+        self._closed = True
+        if self._wakeup is None:
+            return
+        self._wakeup.set()
+        await asyncio.gather(*self._tasks)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def _submit(self, item: QueuedItem) -> None:
+        if self._closed:
+            raise RuntimeError(f"{type(self).__name__} has been closed")
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._tasks = [
+                asyncio.create_task(self._run()) for _ in range(self.workers)
+            ]
+        self._queue.push(item)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            # the queue is only used by tasks of one event loop, so no lock is
+            # needed as long as nothing is awaited between pop and reserve
+            item, wait = self._queue.pop(time.monotonic(), self.rate_limiter.delay)
+            if item is None:
+                if self._closed and wait is None:
+                    return
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.rate_limiter.reserve(item.message.url)
+            if item.future.done():
+                continue
+            try:
+                result = await item.message.send_async(
+                    self.client, rate_limit_retry=False
+                )
+                if _requeue(self.rate_limiter, item, result):
+                    self._queue.push(item, front=True)
+                    self._wakeup.set()
+                    continue
+            except Exception as e:
+                _resolve(item.future, exception=e)
+                continue
+            self._queue.record(item)
+            _resolve(item.future, result)
+
+
+def _resolve(
+    future: asyncio.Future,
+    result: Optional[SendResult] = None,
+    exception: Optional[BaseException] = None,
+) -> None:
+    """
+    Set the result of an async message unless the caller has cancelled it while
+    it was sent, e.g. because `asyncio.wait_for` timed out.
+    """
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+def _requeue(rate_limiter: RateLimiter, item: QueuedItem, result: SendResult) -> bool:
+    """
+    Update the rate limit state and check if the message has to be sent again.
+    :return: whether the message was rate limited and should be queued again
+    """
+    response = result.response
+    rate_limiter.update(item.message.url, response)
+    if response.status_code != 429:
+        return False
+    if not response.headers.get("Via"):
+        # not rate limited by the webhook, but e.g. blocked by Cloudflare
+        raise HTTPException(response.content.decode("utf-8"))
+    return True
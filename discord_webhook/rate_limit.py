@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+LOCK_STRIPES = 64
+
+
+class RateLimitBucket:
+    """
+    Rate limit state of a single bucket as reported by Discord.
+    """
+
+    __slots__ = ("limit", "remaining", "reset_at")
+
+    def __init__(
+        self, limit: Optional[int], remaining: Optional[int], reset_at: float
+    ) -> None:
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_at = reset_at
+
+
+class RateLimiter:
+    """
+    Thread-safe tracker of Discord's rate limits.
+
+    The state is read from the `X-RateLimit-*` headers and 429 responses, so
+    senders know how long to wait before a request can be sent instead of being
+    rate limited and sleeping afterward. Buckets are keyed by webhook url unless
+    another key is given.
+
+    Buckets are spread over `stripes` locks, so threads that send to different
+    webhooks don't wait for each other, also on free-threaded Python builds.
+    """
+
+    def __init__(self, clock=time.monotonic, stripes: int = LOCK_STRIPES) -> None:
+        """
+        Init rate limiter.
+        :param clock: function returning the current time in seconds
+        :param int stripes: number of locks the buckets are spread over
+        """
+        self._clock = clock
+        self._stripes: List[Tuple[threading.Lock, Dict[Hashable, RateLimitBucket]]] = [
+            (threading.Lock(), {}) for _ in range(stripes)
+        ]
+        # only written under the global lock, reading a float is atomic
+        self._global_reset_at = 0.0
+        self._global_lock = threading.Lock()
+
+    def delay(self, key: Hashable) -> float:
+        """
+        Get the seconds until a request of the bucket can be sent.
+        :param key: bucket key, e.g. the webhook url
+        :return: seconds to wait, 0 if a request can be sent right away
+        """
+        lock, buckets = self._stripe(key)
+        with lock:
+            return self._delay(buckets.get(key), self._clock())
+
+    def reserve(self, key: Hashable) -> float:
+        """
+        Reserve a request of the bucket if one is available.
+        :param key: bucket key, e.g. the webhook url
+        :return: 0 if the request was reserved, otherwise the seconds to wait
+        """
+        lock, buckets = self._stripe(key)
+        with lock:
+            now = self._clock()
+            bucket = buckets.get(key)
+            wait = self._delay(bucket, now)
+            if wait == 0 and bucket is not None:
+                if bucket.remaining is not None and bucket.reset_at > now:
+                    bucket.remaining -= 1
+            return wait
+
+    def headroom(self, key: Hashable) -> Optional[int]:
+        """
+        Get the remaining requests of the bucket.
+        :param key: bucket key, e.g. the webhook url
+        :return: remaining requests or None if unknown
+        """
+        lock, buckets = self._stripe(key)
+        with lock:
+            now = self._clock()
+            bucket = buckets.get(key)
+            if self._global_reset_at > now:
+                return 0
+            if bucket is None or bucket.remaining is None:
+                return None
+            if bucket.reset_at <= now:
+                return bucket.limit
+            return bucket.remaining
+
+    def update(self, key: Hashable, response) -> float:
+        """
+        Update the bucket with the rate limit information of a response.
+        :param key: bucket key, e.g. the webhook url
+        :param response: response of requests or httpx
+        :return: seconds to wait if the response was rate limited, otherwise 0
+        """
+        headers = response.headers
+        now = self._clock()
+        retry_after = 0.0
+        is_global = False
+        if response.status_code == 429:
+            retry_after, is_global = parse_retry_after(response)
+        if retry_after and is_global:
+            with self._global_lock:
+                self._global_reset_at = max(self._global_reset_at, now + retry_after)
+        lock, buckets = self._stripe(key)
+        with lock:
+            bucket = buckets.get(key)
+            remaining = _int_header(headers, "X-RateLimit-Remaining")
+            reset_after = _float_header(headers, "X-RateLimit-Reset-After")
+            if remaining is not None and reset_after is not None:
+                limit = _int_header(headers, "X-RateLimit-Limit")
+                if bucket is None:
+                    bucket = buckets[key] = RateLimitBucket(limit, None, 0)
+                # concurrent requests may have reserved more than this response knows
+                if bucket.remaining is None or bucket.reset_at <= now:
+                    bucket.remaining = remaining
+                else:
+                    bucket.remaining = min(bucket.remaining, remaining)
+                bucket.limit = limit
+                bucket.reset_at = now + reset_after
+            if retry_after and not is_global:
+                if bucket is None:
+                    bucket = buckets[key] = RateLimitBucket(None, None, 0)
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, now + retry_after)
+        return retry_after
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Remove the state of a bucket.
+        :param key: bucket key, e.g. the webhook url
+        """
+        lock, buckets = self._stripe(key)
+        with lock:
+            buckets.pop(key, None)
+
+    def _stripe(
+        self, key: Hashable
+    ) -> Tuple[threading.Lock, Dict[Hashable, RateLimitBucket]]:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _delay(self, bucket: Optional[RateLimitBucket], now: float) -> float:
+        wait = max(self._global_reset_at - now, 0.0)
+        if bucket is None or bucket.remaining is None and bucket.reset_at <= now:
+            return wait
+        if bucket.reset_at <= now:
+            # the bucket has been reset, the next response updates it again
+            bucket.remaining = bucket.limit
+            return wait
+        if bucket.remaining is None or bucket.remaining > 0:
+            return wait
+        return max(wait, bucket.reset_at - now)
+
+
+def parse_retry_after(response) -> Tuple[float, bool]:
+    """
+    Read how long a rate limited request has to wait.
+    :param response: response with status code 429
+    :return: seconds to wait and whether the global rate limit was hit
+    """
+    try:
+        errors = json.loads(response.content.decode("utf-8"))
+    except ValueError:
+        errors = {}
+    if not isinstance(errors, dict):
+        errors = {}
+    retry_after = errors.get("retry_after")
+    if retry_after is None:
+        retry_after = _float_header(response.headers, "Retry-After") or 1.0
+    is_global = bool(errors.get("global")) or (
+        response.headers.get("X-RateLimit-Global", "").lower() == "true"
+    )
+    return float(retry_after) + 0.15, is_global
+
+
+def _int_header(headers, name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return None if value is None else int(value)
+    except ValueError:
+        return None
+
+
+def _float_header(headers, name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return None if value is None else float(value)
+    except ValueError:
+        return None
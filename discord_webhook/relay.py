@@ -0,0 +1,423 @@
+import base64
+import http.client
+import http.server
+import json
+import logging
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from .prepared import PreparedMessage, SendResult
+from .priority import Priority, PrioritySender
+from .rate_limit import RateLimiter
+from .transport import TransportResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message TEXT NOT NULL
+)
+"""
+
+
+def message_to_json(message: PreparedMessage) -> Dict[str, Any]:
+    """
+    Serialize a prepared message for the relay.
+    :param message: PreparedMessage
+    :return: JSON serializable dict
+    """
+    data: Dict[str, Any] = {
+        "url": message.url,
+        "method": message.method,
+        "params": dict(message.params),
+        "timeout": message.timeout,
+        "priority": Priority.NORMAL,
+    }
+    if message.content_type == "application/json":
+        data["payload"] = json.loads(message.body)
+    else:
+        # multipart bodies with files are passed on unchanged
+        data["body"] = base64.b64encode(message.body).decode("ascii")
+        data["content_type"] = message.content_type
+        data["filenames"] = list(message.filenames)
+    return data
+
+
+def message_from_json(data: Dict[str, Any]) -> PreparedMessage:
+    """
+    Read a message of the relay, either with the JSON `payload` of a webhook or
+    with an encoded `body` and its `content_type`.
+    :param dict data: deserialized message
+    :return: PreparedMessage
+    """
+    if not isinstance(data, dict) or "url" not in data:
+        raise ValueError("message needs a url")
+    priority_from_json(data)
+    if "payload" in data:
+        body = json.dumps(data["payload"]).encode("utf-8")
+        content_type = "application/json"
+    elif "body" in data:
+        body = base64.b64decode(data["body"])
+        content_type = data["content_type"]
+    else:
+        raise ValueError("message needs a payload or a body")
+    return PreparedMessage(
+        url=data["url"],
+        body=body,
+        content_type=content_type,
+        method=data.get("method", "POST"),
+        params=tuple((k, str(v)) for k, v in (data.get("params") or {}).items()),
+        timeout=data.get("timeout"),
+        filenames=tuple(data.get("filenames") or ()),
+    )
+
+
+def priority_from_json(data: Dict[str, Any]) -> Priority:
+    """
+    Read the priority of a message of the relay.
+    :param dict data: deserialized message
+    :return: Priority, NORMAL if the message has none
+    """
+    priority = data.get("priority", Priority.NORMAL)
+    if isinstance(priority, bool) or not isinstance(priority, int):
+        raise ValueError(f"invalid priority {priority!r}")
+    return Priority(priority)
+
+
+class RelayQueue:
+    """
+    SQLite queue of the messages a relay has accepted but not sent yet, so
+    they are sent after a restart.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Init relay queue.
+        :param str path: SQLite database file
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def add(self, data: Dict[str, Any]) -> int:
+        """
+        Store an accepted message.
+        :param dict data: serialized message
+        :return: id of the queued message
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO queue (message) VALUES (?)", (json.dumps(data),)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def remove(self, message_id: int) -> None:
+        """
+        Remove a message that has been sent.
+        :param int message_id: id of the queued message
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM queue WHERE id = ?", (message_id,))
+            self._db.commit()
+
+    def pending(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Get the messages that haven't been sent yet.
+        :return: ids and serialized messages
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT id, message FROM queue ORDER BY id")
+            return [(message_id, json.loads(data)) for message_id, data in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+
+
+class _RelayHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "discord-webhook-relay"
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, {"error": "not found"})
+            return
+        self._reply(200, {"status": "ok", "queued": self.server.relay.queued})
+
+    def do_POST(self) -> None:
+        if self.path != "/messages":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length))
+            future = self.server.relay.submit(data)
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        if not data.get("wait"):
+            self._reply(202, {"queued": True})
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            self._reply(502, {"error": str(e)})
+            return
+        self._reply(
+            200,
+            {
+                "status_code": result.response.status_code,
+                "content": result.response.content.decode("utf-8"),
+            },
+        )
+
+    def _reply(self, status: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def address_string(self) -> str:
+        # clients of a unix socket have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+class _TCPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Relay:
+    """
+    Long-running relay that many short-lived processes send messages through.
+
+    Messages are accepted over HTTP on localhost or a unix socket and sent by a
+    single PrioritySender, so all clients share its connections and rate
+    limits. With a queue path accepted messages are stored in SQLite until they
+    have been sent.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: Optional[str] = None,
+        queue_path: Optional[str] = None,
+        workers: int = 2,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        """
+        Init relay.
+        :param str host: host of the HTTP server
+        :param int port: port of the HTTP server, 0 picks a free port
+        :param str socket_path: (optional) unix socket that is used instead of
+        host and port
+        :param str queue_path: (optional) SQLite database of the durable queue
+        :param int workers: number of threads that send messages
+        :param session: (optional) requests session whose connections are reused
+        :param rate_limiter: (optional) rate limiter shared with other senders
+        """
+        self.sender = PrioritySender(
+            workers=workers, session=session, rate_limiter=rate_limiter
+        )
+        self.queue = RelayQueue(queue_path) if queue_path else None
+        if socket_path:
+            self.server = _UnixServer(socket_path, _RelayHandler)
+        else:
+            self.server = _TCPServer((host, port), _RelayHandler)
+        self.server.relay = self
+        self.socket_path = socket_path
+        self._thread: Optional[threading.Thread] = None
+        if self.queue is not None:
+            for message_id, data in self.queue.pending():
+                try:
+                    self._submit(data, message_id)
+                except (ValueError, KeyError, TypeError) as e:
+                    # e.g. stored by a version that didn't validate messages
+                    logger.error(f"Dropped invalid queued message {message_id}: {e}")
+                    self.queue.remove(message_id)
+
+    @property
+    def address(self) -> str:
+        """
+        Address that clients connect to.
+        :return: unix socket path or http url
+        """
+        if self.socket_path:
+            return self.socket_path
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def queued(self) -> int:
+        return sum(int(stats["queued"]) for stats in self.sender.stats().values())
+
+    def submit(self, data: Dict[str, Any]):
+        """
+        Accept a serialized message.
+        :param dict data: serialized message
+        :return: future of the SendResult
+        """
+        message_from_json(data)  # reject invalid messages before they are stored
+        message_id = self.queue.add(data) if self.queue is not None else None
+        return self._submit(data, message_id)
+
+    def serve_forever(self) -> None:
+        """
+        Serve until the relay is closed.
+        """
+        logger.info(f"Relay listening on {self.address}")
+        self.server.serve_forever()
+
+    def start(self) -> "Relay":
+        """
+        Serve in a background thread.
+        :return: the relay
+        """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="Relay", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Stop the server and wait until the accepted messages have been sent.
+        """
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.sender.close()
+        if self.queue is not None:
+            self.queue.close()
+
+    def __enter__(self) -> "Relay":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _submit(self, data: Dict[str, Any], message_id: Optional[int]):
+        future = self.sender.submit(message_from_json(data), priority_from_json(data))
+        if message_id is not None:
+            future.add_done_callback(lambda _: self.queue.remove(message_id))
+        return future
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float]) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class RelayClient:
+    """
+    Send messages through a relay and directly if no relay is running.
+    """
+
+    def __init__(
+        self,
+        address: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}",
+        timeout: float = 5.0,
+        fallback: bool = True,
+    ) -> None:
+        """
+        Init relay client.
+        :param str address: url of the relay or path of its unix socket
+        :param float timeout: seconds to wait for the relay
+        :param bool fallback: send messages directly if the relay isn't running
+        """
+        self.address = address
+        self.timeout = timeout
+        self.fallback = fallback
+
+    def send(
+        self, webhook, wait: bool = False, priority: int = Priority.NORMAL
+    ) -> Optional[SendResult]:
+        """
+        Send a webhook through the relay.
+        :param webhook: DiscordWebhook or PreparedMessage
+        :param bool wait: wait until the relay has sent the message
+        :param int priority: priority of the message in the relay
+        :return: SendResult or None if the message was queued by the relay
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        data = message_to_json(message)
+        data["priority"] = priority
+        data["wait"] = wait
+        try:
+            connection = self._connect()
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            # only a relay that isn't running falls back, once the request has
+            # been written the relay may already send the message
+            if not self.fallback:
+                raise
+            logger.warning(f"Relay not reachable ({e}), sending directly")
+            return message.send()
+        status, body = self._post(connection, data)
+        if status == 202:
+            return None
+        if status != 200:
+            raise ValueError(f"Relay rejected message: {body.get('error')}")
+        response = TransportResponse(
+            body["status_code"], {}, body["content"].encode("utf-8"), message.url
+        )
+        return SendResult.from_response(response, message.webhook_url)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.address.startswith(("http://", "https://")):
+            host = self.address.split("://", 1)[1].rstrip("/")
+            connection = http.client.HTTPConnection(host, timeout=self.timeout)
+        else:
+            connection = _UnixConnection(self.address, self.timeout)
+        connection.connect()
+        return connection
+
+    def _post(
+        self, connection: http.client.HTTPConnection, data: Dict[str, Any]
+    ) -> Tuple[int, Dict[str, Any]]:
+        try:
+            connection.request(
+                "POST",
+                "/messages",
+                body=json.dumps(data).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
@@ -0,0 +1,188 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .constants import (
+    CONTENT_LIMIT,
+    EMBED_LIMIT,
+    FIELD_LIMIT,
+    FIELD_NAME_LIMIT,
+    FIELD_VALUE_LIMIT,
+    TITLE_LIMIT,
+    TOTAL_EMBED_LIMIT,
+)
+from .webhook import DiscordWebhook
+
+# the most digits of a page number that are reserved in the title of a table
+PAGE_DIGITS = 6
+EMPTY = "\u200b"
+
+
+class ReportBuilder:
+    """
+    Turn rows into as few messages as possible within Discord's limits.
+
+    Rows are read lazily and every message is yielded as soon as it is full, so
+    reports of any size are formatted with the memory of a single message. In
+    the "table" style the rows are rendered as a monospace table in a code block
+    whose column widths fit the rows of that message. In the "embed" style every
+    row becomes an embed field.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        title: Optional[str] = None,
+        style: str = "table",
+        max_width: int = 40,
+        inline: bool = True,
+    ) -> None:
+        """
+        Init report builder.
+        :param columns: names of the columns
+        :param str title: (optional) title of every message
+        :param str style: "table" for a code block or "embed" for embed fields
+        :param int max_width: maximum width of a column of the table, longer
+        values are cut off. It's reduced further if a table with a single row of
+        that width wouldn't fit into a message.
+        :param bool inline: whether the embed fields are displayed inline
+        """
+        if style not in ("table", "embed"):
+            raise ValueError("style must be 'table' or 'embed'")
+        self.columns = [str(column) for column in columns]
+        self.title = title
+        self.style = style
+        self.max_width = max_width
+        self.inline = inline
+        # header, rule and one row have to fit into a message
+        line = (CONTENT_LIMIT - len(self._prefix(10**PAGE_DIGITS - 1)) - 7) // 3
+        columns = len(self.columns)
+        self._cell_width = min(max_width, (line - 3 * (columns - 1) - 1) // columns)
+        if style == "table" and self._cell_width < 1:
+            raise ValueError("too many columns to fit a table into a message")
+
+    def webhooks(
+        self, url: str, rows: Iterable[Sequence[Any]], **kwargs
+    ) -> Iterator[DiscordWebhook]:
+        """
+        Create a webhook for every message of the report.
+        :param str url: webhook url
+        :param rows: rows of the report, one value per column
+        :param kwargs: the same kwargs that are used for an instance of DiscordWebhook
+        :return: iterator of webhooks that are ready to be sent
+        """
+        if self.style == "table":
+            for content in self.tables(rows):
+                yield DiscordWebhook(url, content=content, **kwargs)
+        else:
+            for embeds in self.embeds(rows):
+                yield DiscordWebhook(url, embeds=embeds, **kwargs)
+
+    def tables(self, rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """
+        Render the rows as tables that fit into the content of a message.
+        :param rows: rows of the report, one value per column
+        :return: iterator of message contents
+        """
+        header = [self._cell(column) for column in self.columns]
+        page = 1
+        cells: List[List[str]] = []
+        widths = [len(cell) for cell in header]
+        for row in rows:
+            row_cells = self._cells(row)
+            row_widths = [max(w, len(c)) for w, c in zip(widths, row_cells)]
+            size = self._table_size(page, row_widths, len(cells) + 1)
+            if cells and size > CONTENT_LIMIT:
+                yield self._table(page, header, cells, widths)
+                page += 1
+                cells = []
+                row_widths = [max(len(h), len(c)) for h, c in zip(header, row_cells)]
+            cells.append(row_cells)
+            widths = row_widths
+        if cells:
+            yield self._table(page, header, cells, widths)
+
+    def embeds(self, rows: Iterable[Sequence[Any]]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Render the rows as embed fields of as few messages as possible.
+        :param rows: rows of the report, one value per column
+        :return: iterator of the embeds of every message
+        """
+        page = 1
+        embeds: List[Dict[str, Any]] = []
+        size = 0
+        for row in rows:
+            field = self._field(row)
+            field_size = len(field["name"]) + len(field["value"])
+            new_embed = not embeds or len(embeds[-1]["fields"]) == FIELD_LIMIT
+            title = self._title(page + len(embeds)) if new_embed else ""
+            if embeds and (
+                size + len(title) + field_size > TOTAL_EMBED_LIMIT
+                or new_embed
+                and len(embeds) == EMBED_LIMIT
+            ):
+                yield embeds
+                page += len(embeds)
+                embeds, size = [], 0
+                new_embed, title = True, self._title(page)
+            if new_embed:
+                embeds.append({"title": title, "fields": []})
+                size += len(title)
+            embeds[-1]["fields"].append(field)
+            size += field_size
+        if embeds:
+            yield embeds
+
+    def _cell(self, value: Any) -> str:
+        text = "" if value is None else str(value)
+        # keep the code block closed and the table on one line per row
+        text = text.replace("\n", " ").replace("`", "'")
+        if len(text) > self._cell_width:
+            text = text[: self._cell_width - 1] + "…"
+        return text
+
+    def _cells(self, row: Sequence[Any]) -> List[str]:
+        cells = [self._cell(value) for value in row[: len(self.columns)]]
+        return cells + [""] * (len(self.columns) - len(cells))
+
+    def _title(self, page: int) -> str:
+        title = f"{self.title} ({page})" if self.title else f"({page})"
+        return title[:TITLE_LIMIT]
+
+    def _prefix(self, page: int) -> str:
+        return f"**{self._title(page)}**\n" if self.title else ""
+
+    def _table_size(self, page: int, widths: List[int], rows: int) -> int:
+        line = sum(widths) + 3 * (len(widths) - 1) + 1
+        # header, rule, rows and the code fences "```\n" and "```"
+        return len(self._prefix(page)) + line * (rows + 2) + 7
+
+    def _table(
+        self,
+        page: int,
+        header: List[str],
+        cells: List[List[str]],
+        widths: List[int],
+    ) -> str:
+        lines = [self._prefix(page) + "```", _line(header, widths)]
+        lines.append("-+-".join("-" * width for width in widths))
+        lines.extend(_line(row, widths) for row in cells)
+        lines.append("```")
+        return "\n".join(lines)
+
+    def _field(self, row: Sequence[Any]) -> Dict[str, Any]:
+        values = ["" if value is None else str(value) for value in row]
+        values += [""] * (len(self.columns) - len(values))
+        name = values[0][:FIELD_NAME_LIMIT] or EMPTY
+        value = "\n".join(
+            f"{column}: {value}"
+            for column, value in zip(self.columns[1:], values[1:])
+            if value
+        )
+        return {
+            "name": name,
+            "value": value[:FIELD_VALUE_LIMIT] or EMPTY,
+            "inline": self.inline,
+        }
+
+
+def _line(cells: List[str], widths: List[int]) -> str:
+    return " | ".join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
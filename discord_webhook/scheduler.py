@@ -0,0 +1,421 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from .prepared import PreparedMessage
+from .priority import AsyncPrioritySender, Priority, PrioritySender
+
+When = Union[float, int, datetime]
+
+
+class ScheduledMessage:
+    """
+    Message that is waiting to be sent at a time.
+    """
+
+    __slots__ = ("key", "send_at", "message", "priority", "future", "cancelled")
+
+    def __init__(
+        self,
+        key: Hashable,
+        send_at: float,
+        message: PreparedMessage,
+        priority: int,
+        future: Future,
+    ) -> None:
+        self.key = key
+        self.send_at = send_at
+        self.message = message
+        self.priority = priority
+        self.future = future
+        self.cancelled = False
+
+
+class ScheduleQueue:
+    """
+    Scheduled messages by key, ordered by their time in a heap.
+
+    Adding a message is O(log n). Cancelled messages are only marked and skipped
+    when they reach the top of the heap, so cancelling is O(1); the heap is
+    rebuilt once most of its entries are cancelled. The queue is not thread-safe
+    on its own.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, ScheduledMessage]] = []
+        self._entries: Dict[Hashable, ScheduledMessage] = {}
+        self._counter = itertools.count()
+
+    def push(self, entry: ScheduledMessage) -> Optional[ScheduledMessage]:
+        """
+        Add a message, a message with the same key is replaced.
+        :param entry: scheduled message
+        :return: the replaced message or None
+        """
+        replaced = self.cancel(entry.key)
+        self._entries[entry.key] = entry
+        heapq.heappush(self._heap, (entry.send_at, next(self._counter), entry))
+        return replaced
+
+    def cancel(self, key: Hashable) -> Optional[ScheduledMessage]:
+        """
+        Cancel the message of a key.
+        :param key: key of the message
+        :return: the cancelled message or None if the key isn't scheduled
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        entry.cancelled = True
+        if len(self._heap) > 64 and len(self._entries) < len(self._heap) // 2:
+            self._heap = [item for item in self._heap if not item[2].cancelled]
+            heapq.heapify(self._heap)
+        return entry
+
+    def get(self, key: Hashable) -> Optional[ScheduledMessage]:
+        return self._entries.get(key)
+
+    def pop_due(self, now: float) -> Tuple[List[ScheduledMessage], Optional[float]]:
+        """
+        Remove all messages that are due.
+        :param float now: current time
+        :return: due messages and the time of the next message (None if empty)
+        """
+        due = []
+        while self._heap:
+            send_at, _, entry = self._heap[0]
+            if entry.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if send_at > now:
+                return due, send_at
+            heapq.heappop(self._heap)
+            del self._entries[entry.key]
+            due.append(entry)
+        return due, None
+
+    def clear(self) -> List[ScheduledMessage]:
+        """
+        Remove all messages.
+        :return: removed messages
+        """
+        entries = list(self._entries.values())
+        for entry in entries:
+            entry.cancelled = True
+        self._entries.clear()
+        self._heap.clear()
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Scheduler:
+    """
+    Send webhooks at a time or after a delay.
+
+    A single background thread waits for the next due message and hands it to a
+    PrioritySender, which sends it within the rate limits. Scheduled messages can
+    be cancelled or rescheduled by key, e.g. to send "resolved" only if no new
+    alert arrived within 5 minutes.
+    """
+
+    def __init__(
+        self, sender: Optional[PrioritySender] = None, clock=time.time
+    ) -> None:
+        """
+        Init scheduler.
+        :param sender: (optional) priority sender of the due messages
+        :param clock: function returning the current time as a unix timestamp
+        """
+        self.sender = sender or PrioritySender()
+        self._owns_sender = sender is None
+        self._clock = clock
+        self._queue = ScheduleQueue()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="Scheduler", daemon=True)
+        self._thread.start()
+
+    def schedule(
+        self,
+        webhook,
+        at: Optional[When] = None,
+        delay: Optional[float] = None,
+        key: Optional[Hashable] = None,
+        priority: int = Priority.NORMAL,
+    ) -> ScheduledMessage:
+        """
+        Schedule a webhook, a scheduled message with the same key is replaced.
+        :param webhook: DiscordWebhook or PreparedMessage
+        :param at: (optional) datetime or unix timestamp of the send
+        :param float delay: (optional) seconds until the send
+        :param key: (optional) key to cancel or reschedule the message
+        :param int priority: priority of the message once it's due
+        :return: scheduled message, its future is resolved with the SendResult
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        entry = ScheduledMessage(
+            key if key is not None else uuid.uuid4().hex,
+            _send_at(self._clock(), at, delay),
+            message,
+            priority,
+            Future(),
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Scheduler has been closed")
+            replaced = self._queue.push(entry)
+            self._condition.notify()
+        if replaced is not None:
+            replaced.future.cancel()
+        return entry
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel a scheduled message.
+        :param key: key of the message
+        :return: whether the message was scheduled
+        """
+        with self._condition:
+            entry = self._queue.cancel(key)
+        if entry is None:
+            return False
+        entry.future.cancel()
+        return True
+
+    def reschedule(
+        self, key: Hashable, at: Optional[When] = None, delay: Optional[float] = None
+    ) -> bool:
+        """
+        Move a scheduled message to another time.
+        :param key: key of the message
+        :param at: (optional) datetime or unix timestamp of the send
+        :param float delay: (optional) seconds until the send
+        :return: whether the message was scheduled
+        """
+        with self._condition:
+            entry = self._queue.get(key)
+            if entry is None:
+                return False
+            moved = ScheduledMessage(
+                key,
+                _send_at(self._clock(), at, delay),
+                entry.message,
+                entry.priority,
+                entry.future,
+            )
+            self._queue.push(moved)
+            self._condition.notify()
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the scheduler, messages that aren't due yet are cancelled.
+        :param bool wait: wait until the due messages have been sent
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        if self._owns_sender:
+            self.sender.close(wait=wait)
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    due, next_at = self._queue.pop_due(self._clock())
+                    if due or self._closed:
+                        break
+                    timeout = None if next_at is None else next_at - self._clock()
+                    self._condition.wait(timeout)
+                closed = self._closed
+            for entry in due:
+                if entry.future.set_running_or_notify_cancel():
+                    _chain(self.sender.submit(entry.message, entry.priority), entry)
+            if closed:
+                with self._condition:
+                    pending = self._queue.clear()
+                for entry in pending:
+                    entry.future.cancel()
+                return
+
+
+class AsyncScheduler:
+    """
+    Async version of Scheduler that waits in a task and hands due messages to an
+    AsyncPrioritySender.
+    """
+
+    def __init__(
+        self, sender: Optional[AsyncPrioritySender] = None, clock=time.time
+    ) -> None:
+        """
+        Init async scheduler.
+        :param sender: (optional) async priority sender of the due messages
+        :param clock: function returning the current time as a unix timestamp
+        """
+        self.sender = sender or AsyncPrioritySender()
+        self._owns_sender = sender is None
+        self._clock = clock
+        self._queue = ScheduleQueue()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def schedule(
+        self,
+        webhook,
+        at: Optional[When] = None,
+        delay: Optional[float] = None,
+        key: Optional[Hashable] = None,
+        priority: int = Priority.NORMAL,
+    ) -> ScheduledMessage:
+        """
+        Schedule a webhook, must be called from the running event loop.
+        :param webhook: AsyncDiscordWebhook, DiscordWebhook or PreparedMessage
+        :param at: (optional) datetime or unix timestamp of the send
+        :param float delay: (optional) seconds until the send
+        :param key: (optional) key to cancel or reschedule the message
+        :param int priority: priority of the message once it's due
+        :return: scheduled message, its asyncio future is resolved with the
+        SendResult
+        """
+        if self._closed:
+            raise RuntimeError("AsyncScheduler has been closed")
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        entry = ScheduledMessage(
+            key if key is not None else uuid.uuid4().hex,
+            _send_at(self._clock(), at, delay),
+            message,
+            priority,
+            asyncio.get_running_loop().create_future(),
+        )
+        if (replaced := self._queue.push(entry)) is not None:
+            replaced.future.cancel()
+        self._wakeup.set()
+        return entry
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel a scheduled message.
+        :param key: key of the message
+        :return: whether the message was scheduled
+        """
+        entry = self._queue.cancel(key)
+        if entry is None:
+            return False
+        entry.future.cancel()
+        return True
+
+    def reschedule(
+        self, key: Hashable, at: Optional[When] = None, delay: Optional[float] = None
+    ) -> bool:
+        """
+        Move a scheduled message to another time.
+        :param key: key of the message
+        :param at: (optional) datetime or unix timestamp of the send
+        :param float delay: (optional) seconds until the send
+        :return: whether the message was scheduled
+        """
+        entry = self._queue.get(key)
+        if entry is None:
+            return False
+        self._queue.push(
+            ScheduledMessage(
+                key,
+                _send_at(self._clock(), at, delay),
+                entry.message,
+                entry.priority,
+                entry.future,
+            )
+        )
+        self._wakeup.set()
+        return True
+
+    async def close(self) -> None:
+        """
+        Stop the scheduler, messages that aren't due yet are cancelled.
+        """
+        self._closed = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+        if self._owns_sender:
+            await self.sender.close()
+
+    async def __aenter__(self) -> "AsyncScheduler":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def _run(self) -> None:
+        while True:
+            due, next_at = self._queue.pop_due(self._clock())
+            for entry in due:
+                if not entry.future.done():
+                    _chain(self.sender.submit(entry.message, entry.priority), entry)
+            if self._closed:
+                for entry in self._queue.clear():
+                    entry.future.cancel()
+                return
+            if due:
+                continue
+            self._wakeup.clear()
+            timeout = None if next_at is None else max(next_at - self._clock(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _send_at(now: float, at: Optional[When], delay: Optional[float]) -> float:
+    if at is not None and delay is not None:
+        raise ValueError("Use either at or delay")
+    if isinstance(at, datetime):
+        return at.timestamp()
+    if at is not None:
+        return float(at)
+    return now + (delay or 0.0)
+
+
+def _chain(sent, entry: ScheduledMessage) -> None:
+    """
+    Resolve the future of the scheduled message with the result of the sender.
+    """
+
+    def done(sent) -> None:
+        if entry.future.done():
+            return
+        if sent.cancelled():
+            entry.future.cancel()
+        elif sent.exception() is not None:
+            entry.future.set_exception(sent.exception())
+        else:
+            entry.future.set_result(sent.result())
+
+    sent.add_done_callback(done)
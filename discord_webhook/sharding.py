@@ -0,0 +1,347 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import as_completed
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .prepared import PreparedMessage
+from .priority import PrioritySender
+from .transport import ThreadLocalTransport, Transport
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastResult(NamedTuple):
+    """
+    Result of sending a broadcast to one webhook url.
+    """
+
+    url: str
+    status_code: Optional[int]
+    id: Optional[str]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code in [200, 204]
+
+
+class HashRing:
+    """
+    Consistent hashing of webhook urls to shards.
+
+    Every shard owns `replicas` points on the ring, so urls are spread evenly
+    and the same url always belongs to the same shard.
+    """
+
+    def __init__(self, shards: int, replicas: int = 100) -> None:
+        """
+        Init hash ring.
+        :param int shards: number of shards
+        :param int replicas: points of every shard on the ring
+        """
+        points = sorted(
+            (_hash(f"{shard}:{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard(self, url: str) -> int:
+        """
+        Get the shard of a url.
+        :param str url: webhook url
+        :return: index of the shard
+        """
+        index = bisect.bisect(self._hashes, _hash(url)) % len(self._hashes)
+        return self._shards[index]
+
+    def split(self, urls: Iterable[str]) -> Dict[int, List[str]]:
+        """
+        Group urls by their shard.
+        :param urls: webhook urls
+        :return: urls by shard
+        """
+        shards: Dict[int, List[str]] = {}
+        for url in urls:
+            shards.setdefault(self.shard(url), []).append(url)
+        return shards
+
+
+class ShardedSender:
+    """
+    Send one message to a very large number of webhook urls from several
+    processes.
+
+    The urls are split over the worker processes by consistent hashing, so the
+    rate limit state of a url stays in one process. The message is encoded once
+    and passed to the workers through shared memory; every worker sends it with
+    a PrioritySender of its own. Results are streamed back as they arrive.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        threads: int = 8,
+        replicas: int = 100,
+        transport_factory: Optional[Callable[[], Transport]] = None,
+    ) -> None:
+        """
+        Init sharded sender.
+        :param int processes: number of worker processes, the number of CPUs by
+        default
+        :param int threads: threads that send messages in every worker process
+        :param int replicas: points of every process on the hash ring
+        :param transport_factory: (optional) picklable function creating the
+        transport of a worker process, e.g. `Urllib3Transport`
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.ring = HashRing(self.processes, replicas)
+        # spawn instead of fork, the parent may already run threads
+        context = multiprocessing.get_context("spawn")
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(self.processes)]
+        self._workers = [
+            context.Process(
+                target=_worker,
+                args=(tasks, self._results, threads, transport_factory),
+                name=f"ShardedSender-{i}",
+                daemon=True,
+            )
+            for i, tasks in enumerate(self._tasks)
+        ]
+        for worker in self._workers:
+            worker.start()
+        # guards the results queue and the shared memory segments, it's never
+        # held while a result is yielded
+        self._lock = threading.Lock()
+        self._jobs = 0
+        # results of running broadcasts that were read by another broadcast, a
+        # buffer is dropped without the lock when its iterator is garbage collected
+        self._buffers: Dict[int, Deque[Tuple[str, Any]]] = {}
+        # shared memory of every broadcast and the shards that haven't copied it
+        self._segments: Dict[int, List[Any]] = {}
+
+    def broadcast(self, webhook, urls: Iterable[str]) -> Iterator[BroadcastResult]:
+        """
+        Send a webhook to all urls. The message is handed to the workers right
+        away, iterating only collects the results.
+        :param webhook: DiscordWebhook or PreparedMessage, its url is ignored
+        :param urls: webhook urls
+        :return: iterator of the results in the order they arrive, the message is
+        sent to all urls even if the iterator isn't consumed
+        """
+        message = webhook if isinstance(webhook, PreparedMessage) else webhook.prepare()
+        shards = self.ring.split(urls)
+        if not shards:
+            return iter(())
+        size = len(message.body)
+        memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        memory.buf[:size] = message.body
+        meta = {
+            "content_type": message.content_type,
+            "method": message.method,
+            "params": message.params,
+            "proxies": message.proxies,
+            "timeout": message.timeout,
+            "filenames": message.filenames,
+        }
+        with self._lock:
+            self._jobs += 1
+            job = self._jobs
+            # the memory is unlinked once every shard has acknowledged its copy
+            self._segments[job] = [memory, len(shards)]
+            self._buffers[job] = deque()
+            for shard, shard_urls in shards.items():
+                self._tasks[shard].put((job, memory.name, size, meta, shard_urls))
+        results = self._collect(job, len(shards))
+        # results of a broadcast whose iterator is dropped are discarded
+        weakref.finalize(results, self._buffers.pop, job, None)
+        return results
+
+    def _collect(self, job: int, pending: int) -> Iterator[BroadcastResult]:
+        try:
+            while pending:
+                kind, payload = self._next_result(job)
+                if kind == "done":
+                    pending -= 1
+                else:
+                    yield BroadcastResult(*payload)
+        finally:
+            self._buffers.pop(job, None)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for tasks in self._tasks:
+            tasks.put(None)
+        # a worker only exits once its results have been read from the queue
+        while any(worker.is_alive() for worker in self._workers):
+            self._drain(timeout=0.1)
+        for worker in self._workers:
+            worker.join()
+        self._drain()
+        with self._lock:
+            for memory, _ in self._segments.values():
+                _release(memory)
+            self._segments.clear()
+
+    def __enter__(self) -> "ShardedSender":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _next_result(self, job: int) -> Tuple[str, Any]:
+        while True:
+            with self._lock:
+                if self._buffers[job]:
+                    return self._buffers[job].popleft()
+                try:
+                    item = self._results.get(timeout=0.1)
+                except queue.Empty:
+                    item = None
+                else:
+                    result_job, kind, payload = item
+                    if result_job == job and kind != "ack":
+                        return kind, payload
+                    self._dispatch(result_job, kind, payload)
+            if item is None and not all(w.is_alive() for w in self._workers):
+                raise RuntimeError("A worker process of ShardedSender died")
+
+    def _drain(self, timeout: float = 0.0) -> None:
+        with self._lock:
+            while True:
+                try:
+                    item = self._results.get(timeout=timeout)
+                except queue.Empty:
+                    return
+                self._dispatch(*item)
+
+    def _dispatch(self, job: int, kind: str, payload: Any) -> None:
+        if kind == "ack":
+            segment = self._segments.get(job)
+            if segment is not None:
+                segment[1] -= 1
+                if not segment[1]:
+                    _release(self._segments.pop(job)[0])
+        elif (buffer := self._buffers.get(job)) is not None:
+            buffer.append((kind, payload))
+        else:
+            # results of an abandoned broadcast
+            logger.debug(f"Dropped result of broadcast {job}")
+
+
+def _worker(
+    tasks,
+    results,
+    threads: int,
+    transport_factory: Optional[Callable[[], Transport]],
+) -> None:
+    transport = None
+    if transport_factory is not None:
+        transport = ThreadLocalTransport(transport_factory)
+    sender = PrioritySender(workers=threads, transport=transport)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            _run_task(sender, results, *task)
+    finally:
+        sender.close()
+        if transport is not None:
+            transport.close()
+
+
+def _run_task(
+    sender: PrioritySender,
+    results,
+    job: int,
+    name: str,
+    size: int,
+    meta: Dict[str, Any],
+    urls: List[str],
+) -> None:
+    """
+    Send the message of a broadcast to the urls of a shard. Errors are reported
+    as results, so the worker keeps running.
+    """
+    remaining = set(urls)
+    try:
+        try:
+            memory = _attach(name)
+            try:
+                body = bytes(memory.buf[:size])
+            finally:
+                memory.close()
+        finally:
+            results.put((job, "ack", None))
+        message = PreparedMessage(url="", body=body, **meta)
+        futures = {sender.submit(message.replace(url=url)): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            remaining.discard(url)
+            results.put((job, "result", _result(url, future)))
+    except Exception as e:
+        logger.exception(f"Broadcast {job} failed")
+        for url in remaining:
+            results.put((job, "result", (url, None, None, str(e))))
+    results.put((job, "done", None))
+
+
+def _result(url: str, future) -> tuple:
+    try:
+        result = future.result()
+    except Exception as e:
+        return url, None, None, str(e)
+    return url, result.response.status_code, result.id, None
+
+
+def _release(memory: shared_memory.SharedMemory) -> None:
+    memory.close()
+    try:
+        memory.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 attaching registers the memory with the resource
+        # tracker, which would unlink it when the worker exits
+        from multiprocessing import resource_tracker
+
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
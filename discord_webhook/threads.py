@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from .cache import LRUCache
+from .prepared import PreparedMessage, SendResult
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadResolver:
+    """
+    Send messages to forum threads by name and create each thread only once.
+
+    The first message for a name creates the thread (`thread_name`) and the id
+    of the new thread is cached for the name. Messages for the same name that
+    arrive while the thread is being created wait until it exists and are then
+    sent to it (`thread_id`), so concurrent senders never create duplicates.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        path: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        transport=None,
+    ) -> None:
+        """
+        Init thread resolver.
+        :param int max_size: maximum number of cached thread names
+        :param str path: (optional) JSON file the thread ids are stored in, so
+        they are known after a restart
+        :param session: (optional) requests session whose connections are reused
+        :param transport: (optional) sync or async transport of the requests
+        """
+        self.path = path
+        self.session = session
+        self.transport = transport
+        self._threads = LRUCache(max_size=max_size)
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for url, name, thread_id in json.load(f)["threads"]:
+                    self._threads.set((url, name), thread_id)
+
+    def get(self, url: str, thread_name: str) -> Optional[str]:
+        """
+        Get the id of a thread that has been created by the resolver.
+        :param str url: webhook url
+        :param str thread_name: name of the thread
+        :return: thread id or None
+        """
+        return self._threads.get((url, thread_name))
+
+    def set(self, url: str, thread_name: str, thread_id: str) -> None:
+        """
+        Store the id of an existing thread.
+        :param str url: webhook url
+        :param str thread_name: name of the thread
+        :param str thread_id: id of the thread
+        """
+        self._threads.set((url, thread_name), thread_id)
+        self._save()
+
+    def forget(self, url: str, thread_name: str) -> None:
+        """
+        Forget a thread, e.g. because it was deleted.
+        :param str url: webhook url
+        :param str thread_name: name of the thread
+        """
+        self._threads.pop((url, thread_name))
+        self._save()
+
+    def send(self, webhook, thread_name: Optional[str] = None) -> SendResult:
+        """
+        Send the webhook to the thread of the name, the thread is created if the
+        resolver doesn't know it yet.
+        :param webhook: DiscordWebhook instance
+        :param str thread_name: name of the thread, defaults to `webhook.thread_name`
+        :return: SendResult
+        """
+        key = self._key(webhook, thread_name)
+        while True:
+            thread_id, future, creator = self._claim(key)
+            if future is not None and not creator:
+                # queued until the thread has been created by another sender
+                future.result()
+                continue
+            message = self._message(webhook, key[1], thread_id)
+            if creator:
+                result = None
+                try:
+                    result = message.send(self.session, transport=self.transport)
+                finally:
+                    self._created(key, future, result)
+                return result
+            result = message.send(self.session, transport=self.transport)
+            if not self._deleted(key, result):
+                return result
+
+    async def send_async(
+        self, webhook, thread_name: Optional[str] = None
+    ) -> SendResult:
+        """
+        Async version of send.
+        :param webhook: AsyncDiscordWebhook or DiscordWebhook instance
+        :param str thread_name: name of the thread, defaults to `webhook.thread_name`
+        :return: SendResult
+        """
+        key = self._key(webhook, thread_name)
+        while True:
+            thread_id, future, creator = self._claim(key)
+            if future is not None and not creator:
+                await asyncio.wrap_future(future)
+                continue
+            message = self._message(webhook, key[1], thread_id)
+            if creator:
+                result = None
+                try:
+                    result = await message.send_async(
+                        getattr(webhook, "client", None), transport=self.transport
+                    )
+                finally:
+                    self._created(key, future, result)
+                return result
+            result = await message.send_async(
+                getattr(webhook, "client", None), transport=self.transport
+            )
+            if not self._deleted(key, result):
+                return result
+
+    def execute(
+        self, webhook, thread_name: Optional[str] = None, remove_embeds: bool = False
+    ):
+        """
+        Send the webhook to the thread of the name and store the message id and
+        thread id in it, so it can be edited or deleted afterward.
+        :param webhook: DiscordWebhook instance
+        :param str thread_name: name of the thread, defaults to `webhook.thread_name`
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook
+        """
+        result = self.send(webhook, thread_name)
+        self._apply(webhook, result, remove_embeds)
+        return result.response
+
+    async def execute_async(
+        self, webhook, thread_name: Optional[str] = None, remove_embeds: bool = False
+    ):
+        """
+        Async version of execute.
+        :param webhook: AsyncDiscordWebhook instance
+        :param str thread_name: name of the thread, defaults to `webhook.thread_name`
+        :param bool remove_embeds: clear the stored embeds after webhook is executed
+        :return: Response of the sent webhook
+        """
+        result = await self.send_async(webhook, thread_name)
+        self._apply(webhook, result, remove_embeds)
+        return result.response
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+    @staticmethod
+    def _key(webhook, thread_name: Optional[str]) -> Tuple[str, str]:
+        thread_name = thread_name or webhook.thread_name
+        if not thread_name:
+            raise ValueError("ThreadResolver needs a thread_name")
+        return webhook.url, thread_name
+
+    def _claim(
+        self, key: Tuple[str, str]
+    ) -> Tuple[Optional[str], Optional[Future], bool]:
+        """
+        Look up the thread of the key.
+        :return: thread id if it's known, otherwise the future of the creation
+        and whether the caller has to create the thread
+        """
+        with self._lock:
+            thread_id = self._threads.get(key)
+            if thread_id is not None:
+                return thread_id, None, False
+            future = self._pending.get(key)
+            if future is not None:
+                return None, future, False
+            future = self._pending[key] = Future()
+            return None, future, True
+
+    def _created(
+        self, key: Tuple[str, str], future: Future, result: Optional[SendResult]
+    ) -> None:
+        """
+        Store the id of a created thread and release the queued messages. If the
+        thread couldn't be created, the next queued message tries again.
+        """
+        thread_id = None
+        if result is not None and result.ok:
+            # the id of the thread is the channel of its first message
+            thread_id = result.channel_id
+        with self._lock:
+            if thread_id is not None:
+                self._threads.set(key, thread_id)
+            del self._pending[key]
+        if thread_id is not None:
+            self._save()
+        future.set_result(thread_id)
+
+    def _deleted(self, key: Tuple[str, str], result: SendResult) -> bool:
+        """
+        Check if the thread of a message doesn't exist anymore.
+        :return: whether the message has to be sent to a new thread
+        """
+        if result.response.status_code != 404:
+            return False
+        logger.warning(f"Thread {key[1]} not found, it is created again")
+        self.forget(*key)
+        return True
+
+    @staticmethod
+    def _message(
+        webhook, thread_name: str, thread_id: Optional[str]
+    ) -> PreparedMessage:
+        """
+        Prepare the message either to create the thread or for the existing thread.
+        """
+        saved = webhook.thread_name, webhook.thread_id
+        if thread_id is None:
+            webhook.thread_name, webhook.thread_id = thread_name, None
+        else:
+            webhook.thread_name, webhook.thread_id = None, thread_id
+        try:
+            return webhook.prepare()
+        finally:
+            webhook.thread_name, webhook.thread_id = saved
+
+    @staticmethod
+    def _apply(webhook, result: SendResult, remove_embeds: bool) -> None:
+        if remove_embeds:
+            webhook.remove_embeds()
+        webhook.remove_files(clear_attachments=False)
+        if result.id:
+            webhook.id = result.id
+            webhook.thread_id = result.channel_id
+        if result.attachments:
+            webhook.attachments = list(result.attachments)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            threads = [[url, name, id_] for (url, name), id_ in self._threads.items()]
+            # write a temporary file first, so an interrupted save keeps the old file
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"threads": threads}, f)
+            os.replace(temp_path, self.path)
@@ -0,0 +1,472 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from http.client import HTTPException
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlencode
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import httpx
+except ImportError:  # pragma: nocover
+    # httpx is only needed by the httpx transports
+    pass
+
+logger = logging.getLogger(__name__)
+
+Content = Union[bytes, Callable[[], AsyncIterator[bytes]], None]
+
+
+class Request(NamedTuple):
+    """
+    HTTP request to Discord, independent of the library that sends it.
+    `content` is either the encoded body or a function returning an async
+    iterator of the body (only supported by async transports).
+    """
+
+    method: str
+    url: str
+    params: Tuple[Tuple[str, str], ...] = ()
+    headers: Tuple[Tuple[str, str], ...] = ()
+    content: Content = None
+    timeout: Optional[float] = None
+
+    @property
+    def full_url(self) -> str:
+        return f"{self.url}?{urlencode(self.params)}" if self.params else self.url
+
+
+class TransportResponse:
+    """
+    Response of the transports that don't have a response class of their own.
+    """
+
+    def __init__(
+        self, status_code: int, headers: Dict[str, str], content: bytes, url: str = ""
+    ) -> None:
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def __repr__(self) -> str:
+        return f"<TransportResponse [{self.status_code}]>"
+
+
+class Transport(ABC):
+    """
+    Sends requests synchronously.
+    """
+
+    @abstractmethod
+    def send(self, request: Request):
+        """
+        Send a request.
+        :param request: request
+        :return: response with status_code, headers and content
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncTransport(ABC):
+    """
+    Sends requests asynchronously.
+    """
+
+    @abstractmethod
+    async def send(self, request: Request):
+        """
+        Send a request.
+        :param request: request
+        :return: response with status_code, headers and content
+        """
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Transport using requests, the default of DiscordWebhook.
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Init requests transport.
+        :param session: (optional) session whose connections are reused, a new
+        connection is opened for every request if not set
+        :param dict proxies: (optional) proxies that should be used
+        """
+        self.session = session
+        self.proxies = proxies
+
+    def send(self, request: Request) -> requests.Response:
+        return (self.session or requests).request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=dict(request.headers),
+            data=request.content,
+            proxies=self.proxies,
+            timeout=request.timeout,
+        )
+
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+
+
+class HttpxTransport(Transport):
+    """
+    Synchronous transport using a pooled httpx.Client.
+    """
+
+    def __init__(self, client=None, proxy: Optional[str] = None) -> None:
+        """
+        Init httpx transport.
+        :param client: (optional) httpx.Client, a new client is created if not set
+        :param str proxy: (optional) proxy url of the created client
+        """
+        self.client = client or httpx.Client(proxy=proxy)
+
+    def send(self, request: Request) -> "httpx.Response":
+        return self.client.request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=dict(request.headers),
+            content=request.content,
+            timeout=request.timeout,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class AsyncHttpxTransport(AsyncTransport):
+    """
+    Transport using a httpx.AsyncClient, the default of AsyncDiscordWebhook.
+    """
+
+    def __init__(self, client=None, proxy: Optional[str] = None) -> None:
+        """
+        Init async httpx transport.
+        :param client: (optional) httpx.AsyncClient whose connections are reused, a
+        new client is created for every request if not set
+        :param str proxy: (optional) proxy url of the created clients
+        """
+        self.client = client
+        self.proxy = proxy
+
+    async def send(self, request: Request) -> "httpx.Response":
+        if self.client is None:
+            async with httpx.AsyncClient(proxy=self.proxy) as client:
+                return await self._send(client, request)
+        return await self._send(self.client, request)
+
+    @staticmethod
+    async def _send(client, request: Request) -> "httpx.Response":
+        content = request.content
+        return await client.request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=dict(request.headers),
+            content=content() if callable(content) else content,
+            timeout=request.timeout,
+        )
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+
+class Urllib3Transport(Transport):
+    """
+    Transport using urllib3 directly, which has less overhead than requests.
+    """
+
+    def __init__(self, pool_manager=None, proxy: Optional[str] = None) -> None:
+        """
+        Init urllib3 transport.
+        :param pool_manager: (optional) urllib3.PoolManager
+        :param str proxy: (optional) proxy url of the created pool manager
+        """
+        if pool_manager is None:
+            pool_manager = (
+                urllib3.ProxyManager(proxy) if proxy else urllib3.PoolManager()
+            )
+        self.pool_manager = pool_manager
+
+    def send(self, request: Request) -> TransportResponse:
+        response = self.pool_manager.request(
+            request.method,
+            request.full_url,
+            body=request.content,
+            headers=dict(request.headers),
+            timeout=urllib3.Timeout(total=request.timeout),
+            retries=False,
+        )
+        return TransportResponse(
+            response.status, dict(response.headers), response.data, request.full_url
+        )
+
+    def close(self) -> None:
+        self.pool_manager.clear()
+
+
+class ThreadLocalTransport(Transport):
+    """
+    Transport that gives every thread a transport of its own, so threads never
+    share a connection pool. requests.Session isn't thread-safe, and on
+    free-threaded Python builds threads really use it at the same time. The
+    transports of a thread are closed when the thread exits.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], Transport]] = None) -> None:
+        """
+        Init thread-local transport.
+        :param factory: (optional) function creating the transport of a thread, a
+        RequestsTransport with its own session by default
+        """
+        self.factory = factory or _requests_transport
+        self._local = threading.local()
+        # open transports of the threads, the finalizers remove them when the
+        # thread-local storage of a thread is cleared
+        self._transports: List[Transport] = []
+        self._lock = threading.Lock()
+
+    @property
+    def transport(self) -> Transport:
+        """
+        Transport of the current thread.
+        :return: Transport
+        """
+        return self.for_proxies(())
+
+    def for_proxies(self, proxies: Tuple[Tuple[str, str], ...]) -> Transport:
+        """
+        Transport of the current thread that sends through proxies, only the
+        default factory supports proxies.
+        :param proxies: proxies of requests as items, e.g. of a PreparedMessage
+        :return: Transport
+        """
+        owner = getattr(self._local, "owner", None)
+        if owner is None:
+            owner = self._local.owner = _TransportOwner()
+            weakref.finalize(
+                owner, _close_transports, self._transports, self._lock, owner.transports
+            )
+        transport = owner.transports.get(proxies)
+        if transport is None:
+            if not proxies:
+                transport = self.factory()
+            elif self.factory is _requests_transport:
+                transport = _requests_transport(dict(proxies))
+            else:
+                raise ValueError("Only the default factory supports proxies")
+            owner.transports[proxies] = transport
+            with self._lock:
+                self._transports.append(transport)
+        return transport
+
+    def send(self, request: Request):
+        return self.transport.send(request)
+
+    def close(self) -> None:
+        with self._lock:
+            transports = self._transports[:]
+            self._transports.clear()
+        for transport in transports:
+            transport.close()
+        self._local = threading.local()
+
+
+class _TransportOwner:
+    """
+    Holds the transports of a thread in its thread-local storage, which is
+    cleared when the thread exits.
+    """
+
+    __slots__ = ("transports", "__weakref__")
+
+    def __init__(self) -> None:
+        self.transports: Dict[Tuple[Tuple[str, str], ...], Transport] = {}
+
+
+def _close_transports(
+    transports: List[Transport],
+    lock: threading.Lock,
+    owned: Dict[Tuple[Tuple[str, str], ...], Transport],
+) -> None:
+    closing = []
+    with lock:
+        for transport in owned.values():
+            for i, open_transport in enumerate(transports):
+                if open_transport is transport:
+                    # not closed by ThreadLocalTransport.close() yet
+                    del transports[i]
+                    closing.append(transport)
+                    break
+    for transport in closing:
+        try:
+            transport.close()
+        except Exception:
+            logger.exception("Transport of an exited thread could not be closed")
+
+
+class FakeTransport(Transport):
+    """
+    In-memory transport that records requests and answers them with queued
+    responses, e.g. for tests or dry runs.
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[Request] = []
+        self.responses: List[Tuple[int, Any, Dict[str, str]]] = []
+
+    def queue(
+        self,
+        status_code: int = 200,
+        body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Queue the response of the next request.
+        :param int status_code: status code
+        :param body: JSON body of the response
+        :param dict headers: (optional) headers of the response
+        """
+        self.responses.append((status_code, body, headers or {}))
+
+    def send(self, request: Request) -> TransportResponse:
+        self.requests.append(request)
+        if self.responses:
+            status_code, body, headers = self.responses.pop(0)
+        else:
+            status_code, body, headers = 200, {"id": str(len(self.requests))}, {}
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        return TransportResponse(status_code, headers, content, request.full_url)
+
+
+class AsyncFakeTransport(AsyncTransport, FakeTransport):
+    """
+    Async version of FakeTransport, streamed bodies are read completely.
+    """
+
+    async def send(self, request: Request) -> TransportResponse:
+        if callable(request.content):
+            content = b"".join([chunk async for chunk in request.content()])
+            request = request._replace(content=content)
+        return FakeTransport.send(self, request)
+
+
+def retry_delay(response) -> float:
+    """
+    Get the seconds to wait before a rate limited request can be sent again.
+    :param response: response with status code 429
+    :return: seconds to sleep
+    """
+    errors = json.loads(response.content.decode("utf-8"))
+    if not response.headers.get("Via"):
+        # not rate limited by the webhook, but e.g. blocked by Cloudflare
+        raise HTTPException(errors)
+    wh_sleep = float(errors["retry_after"]) + 0.15
+    logger.error(f"Webhook rate limited: sleeping for {wh_sleep:.2f} seconds...")
+    return wh_sleep
+
+
+def send_request(transport: Transport, request: Request, rate_limit_retry: bool):
+    """
+    Send a request and resend it until it isn't rate limited anymore.
+    :param transport: sync transport
+    :param request: request
+    :param bool rate_limit_retry: whether rate limited requests are sent again
+    :return: response of the transport
+    """
+    response = transport.send(request)
+    while response.status_code == 429 and rate_limit_retry:
+        time.sleep(retry_delay(response))
+        response = transport.send(request)
+    return response
+
+
+async def send_request_async(
+    transport: AsyncTransport, request: Request, rate_limit_retry: bool
+):
+    """
+    Async version of send_request.
+    :param transport: async transport
+    :param request: request
+    :param bool rate_limit_retry: whether rate limited requests are sent again
+    :return: response of the transport
+    """
+    response = await transport.send(request)
+    while response.status_code == 429 and rate_limit_retry:
+        await asyncio.sleep(retry_delay(response))
+        response = await transport.send(request)
+    return response
+
+
+def log_response(response, message: str = "Webhook executed") -> None:
+    """
+    Log the result of a request.
+    :param response: response of the transport
+    :param str message: debug message of a successful request
+    """
+    if response.status_code in [200, 204]:
+        logger.debug(message)
+    else:
+        logger.error(
+            "Webhook status code {status_code}: {content}".format(
+                status_code=response.status_code,
+                content=response.content.decode("utf-8"),
+            )
+        )
+
+
+def _requests_transport(
+    proxies: Optional[Dict[str, str]] = None,
+) -> RequestsTransport:
+    return RequestsTransport(requests.Session(), proxies=proxies)
+
+
+def httpx_proxy(proxies: Union[Dict[str, str], str, None]) -> Optional[str]:
+    """
+    Get the proxy url for httpx from the proxies of requests.
+    :param proxies: dict of proxies or a proxy url
+    :return: proxy url
+    """
+    if isinstance(proxies, dict):
+        return proxies.get("https") or proxies.get("http")
+    return proxies
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # pragma: nocover
+    # httpx is only needed for the AsyncConnectionWarmer
+    pass
+
+logger = logging.getLogger(__name__)
+
+# cheap endpoint of the Discord API that doesn't need authentication
+WARMUP_URL = "https://discord.com/api/v10/gateway"
+
+
+class ConnectionWarmer:
+    """
+    Open connections to Discord before the first message is sent.
+
+    The given number of connections is opened (including the DNS lookup and the
+    TLS handshake) in the connection pool of a requests session. In keep-warm mode
+    a background thread repeats this before idle connections are closed, so the
+    first message after a quiet period reuses an open connection instead of paying
+    for DNS, TCP and TLS.
+    Pass the session to the webhooks, e.g. `DiscordWebhook(url, session=warmer.session)`.
+    """
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        url: str = WARMUP_URL,
+        connections: int = 2,
+        keep_warm_interval: Optional[float] = None,
+        timeout: float = 10,
+    ) -> None:
+        """
+        Init connection warmer.
+        :param session: (optional) session to warm up, a new session with a pool of
+        at least `connections` connections is created if not set
+        :param str url: url on the host of your webhooks that is requested
+        :param int connections: number of connections that are opened
+        :param float keep_warm_interval: (optional) seconds between warm-ups of the
+        background thread, should be shorter than the idle timeout of the server
+        :param float timeout: seconds to wait for a response
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=max(connections, 10))
+            session.mount("https://", adapter)
+        self.session = session
+        self.url = url
+        self.connections = connections
+        self.keep_warm_interval = keep_warm_interval
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=connections, thread_name_prefix="ConnectionWarmer"
+        )
+
+    def warm_up(self) -> int:
+        """
+        Open the connections or keep the open ones alive.
+        :return: number of connections that were opened or reused successfully
+        """
+        # concurrent requests can't share a connection, so each opens its own
+        # connection that is returned to the pool afterward
+        results = list(
+            self._executor.map(lambda _: self._ping(), range(self.connections))
+        )
+        return sum(results)
+
+    def start(self) -> "ConnectionWarmer":
+        """
+        Warm up the connections and keep them warm in a background thread.
+        :return: the connection warmer
+        """
+        self.warm_up()
+        if self.keep_warm_interval and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="ConnectionWarmer", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop the background thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """
+        Stop the background thread and close the connections.
+        """
+        self.stop()
+        self._executor.shutdown()
+        self.session.close()
+
+    def __enter__(self) -> "ConnectionWarmer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.keep_warm_interval):
+            try:
+                self.warm_up()
+            except Exception:
+                logger.exception("Keeping the connections warm failed")
+
+    def _ping(self) -> bool:
+        try:
+            # the response is read completely, which returns the connection to the pool
+            self.session.head(self.url, timeout=self.timeout)
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Warming up the connection failed: {e}")
+            return False
+
+
+class AsyncConnectionWarmer:
+    """
+    Async version of ConnectionWarmer for a httpx.AsyncClient.
+    Pass the client to the webhooks, e.g. `AsyncDiscordWebhook(url, client=warmer.client)`.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        url: str = WARMUP_URL,
+        connections: int = 2,
+        keep_warm_interval: Optional[float] = None,
+        timeout: float = 10,
+    ) -> None:
+        """
+        Init async connection warmer.
+        :param client: (optional) httpx.AsyncClient to warm up
+        :param str url: url on the host of your webhooks that is requested
+        :param int connections: number of connections that are opened
+        :param float keep_warm_interval: (optional) seconds between warm-ups of the
+        background task
+        :param float timeout: seconds to wait for a response
+        """
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=max(connections, 20),
+                    keepalive_expiry=max(keep_warm_interval or 0, 5) * 2,
+                )
+            )
+        self.client = client
+        self.url = url
+        self.connections = connections
+        self.keep_warm_interval = keep_warm_interval
+        self.timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+
+    async def warm_up(self) -> int:
+        """
+        Open the connections or keep the open ones alive.
+        :return: number of connections that were opened or reused successfully
+        """
+        results = await asyncio.gather(*(self._ping() for _ in range(self.connections)))
+        return sum(results)
+
+    async def start(self) -> "AsyncConnectionWarmer":
+        """
+        Warm up the connections and keep them warm in a background task.
+        :return: the connection warmer
+        """
+        await self.warm_up()
+        if self.keep_warm_interval and self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    async def stop(self) -> None:
+        """
+        Stop the background task.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def aclose(self) -> None:
+        """
+        Stop the background task and close the client.
+        """
+        await self.stop()
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncConnectionWarmer":
+        return await self.start()
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            try:
+                await self.warm_up()
+            except Exception:
+                logger.exception("Keeping the connections warm failed")
+
+    async def _ping(self) -> bool:
+        try:
+            await self.client.head(self.url, timeout=self.timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Warming up the connection failed: {e}")
+            return False
@@ -1,12 +1,23 @@
-import json
+import copy
 import logging
 import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from functools import partial
-from http.client import HTTPException
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import requests
 
+from .bulk import BulkJob, BulkProgress, Target
+from .cache import ATTACHMENT_SCHEME, EMBED_ATTACHMENT_FIELDS, AttachmentCache
+from .prepared import PreparedMessage, SendResult
+from .preprocessing import AttachmentPreprocessor
+from .transport import (
+    Request,
+    RequestsTransport,
+    Transport,
+    log_response,
+    retry_delay,
+    send_request,
+)
 from .webhook_exceptions import ColorNotInRangeException
 
 logger = logging.getLogger(__name__)
@@ -225,6 +236,7 @@ class DiscordWebhook:
     """
 
     allowed_mentions: Dict[str, List[str]]
+    attachment_cache: Optional[AttachmentCache]
     attachments: Optional[List[Dict[str, Any]]]
     avatar_url: Optional[str]
     components: Optional[list]
@@ -234,20 +246,34 @@ class DiscordWebhook:
     id: Optional[str]
     proxies: Optional[Dict[str, str]]
     rate_limit_retry: bool = False
+    session: Optional[requests.Session]
     thread_id: Optional[str]
     thread_name: Optional[str]
     timeout: Optional[float]
+    transport: Optional[Transport]
     tts: Optional[bool]
     url: str
     username: Optional[str]
     wait: Optional[bool]
 
+    # attributes that are not sent to Discord
+    _local_attributes = (
+        "url",
+        "files",
+        "file_sources",
+        "attachment_cache",
+        "session",
+        "client",
+        "transport",
+    )
+
     def __init__(self, url: str, **kwargs) -> None:
         """
         Init Webhook for Discord.
         ---------
         :param str url: your discord webhook url
         :keyword dict allowed_mentions: allowed mentions for the message
+        :keyword AttachmentCache attachment_cache: reuse already uploaded files
         :keyword dict attachments: attachments that should be included
         :keyword str avatar_url: override the default avatar of the webhook
         :keyword str content: the message contents
@@ -257,14 +283,18 @@ class DiscordWebhook:
         :keyword str id: webhook id
         :keyword dict proxies: proxies that should be used
         :keyword bool rate_limit_retry: whether the message should be sent again when being rate limited
+        :keyword requests.Session session: session whose connections are reused
         :keyword str thread_id: send message to a thread specified by its thread id
         :keyword str thread_name: name of thread to create
         :keyword int timeout: seconds to wait for a response from Discord
+        :keyword Transport transport: sends the requests instead of requests, e.g.
+        Urllib3Transport or FakeTransport
         :keyword bool tts: indicates if this is a TTS message
         :keyword str username: override the default username of the webhook
         :keyword bool wait: waits for server confirmation of message send before response (defaults to True)
         """
         self.allowed_mentions = kwargs.get("allowed_mentions", {})
+        self.attachment_cache = kwargs.get("attachment_cache")
         self.attachments = kwargs.get("attachments", [])
         self.avatar_url = kwargs.get("avatar_url")
         self.content = kwargs.get("content")
@@ -274,9 +304,11 @@ class DiscordWebhook:
         self.id = kwargs.get("id")
         self.proxies = kwargs.get("proxies")
         self.rate_limit_retry = kwargs.get("rate_limit_retry", False)
+        self.session = kwargs.get("session")
         self.thread_id = kwargs.get("thread_id")
         self.thread_name = kwargs.get("thread_name")
         self.timeout = kwargs.get("timeout")
+        self.transport = kwargs.get("transport")
         self.tts = kwargs.get("tts", False)
         self.url = url
         self.username = kwargs.get("username", False)
@@ -344,6 +376,60 @@ class DiscordWebhook:
         if clear_attachments:
             self.clear_attachments()
 
+    def preprocess_files(
+        self, preprocessor: "AttachmentPreprocessor"
+    ) -> List["DiscordWebhook"]:
+        """
+        Compress, downscale or split the added files before they are uploaded.
+        Files that don't fit into this message are moved to follow-up messages.
+        :param AttachmentPreprocessor preprocessor: preprocessor of the files
+        :return: follow-up webhooks with the remaining files, they have to be
+        executed after this webhook. If this webhook creates a thread with
+        `thread_name`, set the `thread_id` of the follow-ups to the `channel_id`
+        of its response
+        """
+        referenced = self._referenced_files()
+        files = preprocessor.process(self.files, referenced)
+        return self._split_files(preprocessor.batch(files, referenced))
+
+    def _referenced_files(self) -> List[str]:
+        """
+        Get the filenames that the embeds reference with `attachment://`.
+        :return: list of filenames
+        """
+        filenames = []
+        for embed in self.embeds:
+            embed = embed if isinstance(embed, dict) else embed.__dict__
+            for field, key in EMBED_ATTACHMENT_FIELDS:
+                url = (embed.get(field) or {}).get(key) or ""
+                if url.startswith(ATTACHMENT_SCHEME):
+                    filenames.append(url[len(ATTACHMENT_SCHEME) :])
+        return filenames
+
+    def _split_files(self, batches: List[Dict[str, Any]]) -> List["DiscordWebhook"]:
+        """
+        Keep the first batch of files and create follow-up webhooks for the others.
+        :param list batches: batches of files
+        :return: follow-up webhooks
+        """
+        self.files = batches[0] if batches else {}
+        follow_ups = []
+        for files in batches[1:]:
+            follow_up = copy.copy(self)
+            follow_up.content = None
+            follow_up.embeds = []
+            follow_up.attachments = []
+            follow_up.files = files
+            follow_up.id = None
+            # only the first message creates the thread, has a poll or components
+            # and is read aloud
+            follow_up.thread_name = None
+            follow_up.poll = None
+            follow_up.components = None
+            follow_up.tts = False
+            follow_ups.append(follow_up)
+        return follow_ups
+
     def clear_attachments(self) -> None:
         """
         Remove all attachments.
@@ -382,38 +468,52 @@ class DiscordWebhook:
         # convert DiscordEmbed to dict
         for embed in embeds:
             self.add_embed(embed)
+        return self._payload()
+
+    def _payload(self) -> Dict[str, Any]:
+        """
+        Collect the data of the webhook that is sent to Discord without changing
+        the webhook.
+        :return: webhook data as json
+        """
         data = {
             key: value
             for key, value in self.__dict__.items()
-            if value and key not in ["url", "files"] or key in ["embeds", "attachments"]
+            if value
+            and key not in self._local_attributes
+            or key in ["embeds", "attachments"]
         }
-        embeds_empty = not any(data["embeds"]) if "embeds" in data else True
-        if embeds_empty and "content" not in data and bool(self.files) is False:
+        data["embeds"] = [
+            embed.__dict__ if isinstance(embed, DiscordEmbed) else embed
+            for embed in data["embeds"]
+        ]
+        embeds_empty = not any(data["embeds"])
+        if embeds_empty and "content" not in data and self._has_files() is False:
             logger.error("webhook message is empty! set content or embed data")
         return data
 
+    def _has_files(self) -> bool:
+        """
+        Check if files will be uploaded with the webhook.
+        :return: whether the webhook has files
+        """
+        return bool(self.files)
+
+    def prepare(self, method: str = "POST") -> "PreparedMessage":
+        """
+        Freeze the current data of the webhook into an immutable message that can
+        be sent from any number of threads or coroutines at once.
+        :param str method: HTTP method, use "PATCH" to edit the message of `id`
+        :return: prepared message
+        """
+        return PreparedMessage.from_webhook(self, method=method)
+
     def api_post_request(self) -> "requests.Response":
         """
         Post the JSON converted webhook data to the specified url.
         :return: Response of the sent webhook
         """
-        if not self.files:
-            return requests.post(
-                self.url,
-                json=self.json,
-                params=self._query_params,
-                proxies=self.proxies,
-                timeout=self.timeout,
-            )
-
-        self.files["payload_json"] = (None, json.dumps(self.json))
-        return requests.post(
-            self.url,
-            files=self.files,
-            params=self._query_params,
-            proxies=self.proxies,
-            timeout=self.timeout,
-        )
+        return self._transport.send(self._request())
 
     def handle_rate_limit(self, response, request):
         """
@@ -423,17 +523,34 @@ class DiscordWebhook:
         :return: Response of the sent webhook
         """
         while response.status_code == 429:
-            errors = json.loads(response.content.decode("utf-8"))
-            if not response.headers.get("Via"):
-                raise HTTPException(errors)
-            wh_sleep = float(errors["retry_after"]) + 0.15
-            logger.error(
-                f"Webhook rate limited: sleeping for {wh_sleep:.2f} seconds..."
-            )
-            time.sleep(wh_sleep)
+            time.sleep(retry_delay(response))
             response = request()
-            if response.status_code in [200, 204]:
-                return response
+        return response
+
+    @contextmanager
+    def _attachment_cache_applied(self) -> Iterator[Dict[str, str]]:
+        """
+        Reference already uploaded files instead of uploading them again. The
+        embeds and files of the webhook are restored if sending raises.
+        :return: hex digests of the files that will be uploaded by filename
+        """
+        if self.attachment_cache is None or not self.files:
+            yield {}
+            return
+        embeds, files = self.embeds, dict(self.files)
+        try:
+            yield self.attachment_cache.apply(self)
+        except BaseException:
+            self.embeds, self.files = embeds, files
+            raise
+
+    @property
+    def _transport(self) -> Transport:
+        """
+        Transport that sends the requests, requests is used if no transport is set.
+        :return: Transport
+        """
+        return self.transport or RequestsTransport(self.session, proxies=self.proxies)
 
     @property
     def _query_params(self) -> dict:
@@ -448,33 +565,53 @@ class DiscordWebhook:
             params["wait"] = self.wait
         return params
 
+    def _request(self, method: str = "POST") -> Request:
+        """
+        Build the request of the webhook without sending it or changing the webhook.
+        :param str method: "POST" sends, "PATCH" edits and "DELETE" deletes the message
+        :return: Request
+        """
+        if method == "DELETE":
+            return Request(
+                method=method,
+                url=f"{self.url}/messages/{self.id}",
+                params=tuple((k, str(v)) for k, v in self._query_params.items()),
+                timeout=self.timeout,
+            )
+        return PreparedMessage.from_webhook(
+            self, method=method, fingerprint=False
+        ).to_request()
+
+    def _executed(self, response, remove_embeds: bool, digests: Dict[str, str]) -> None:
+        """
+        Store the message id and attachments of the response and clear the files.
+        :param response: response of the executed webhook
+        :param bool remove_embeds: clear the stored embeds
+        :param dict digests: hex digests of the uploaded files by filename
+        """
+        if remove_embeds:
+            self.remove_embeds()
+        self.remove_files(clear_attachments=False)
+        result = SendResult.from_response(response)
+        if result.id:
+            self.id = result.id
+        if result.attachments:
+            self.attachments = list(result.attachments)
+            if self.attachment_cache is not None:
+                self.attachment_cache.store_attachments(digests, self.attachments)
+
     def execute(self, remove_embeds: bool = False) -> "requests.Response":
         """
         Execute the sending of the webhook with the given data.
         :param bool remove_embeds: clear the stored embeds after webhook is executed
         :return: Response of the sent webhook
         """
-        response = self.api_post_request()
-        if response.status_code in [200, 204]:
-            logger.debug("Webhook executed")
-        elif response.status_code == 429 and self.rate_limit_retry:
-            response = self.handle_rate_limit(response, self.api_post_request)
-            logger.debug("Webhook executed")
-        else:
-            logger.error(
-                "Webhook status code {status_code}: {content}".format(
-                    status_code=response.status_code,
-                    content=response.content.decode("utf-8"),
-                )
+        with self._attachment_cache_applied() as digests:
+            response = send_request(
+                self._transport, self._request(), self.rate_limit_retry
             )
-        if remove_embeds:
-            self.remove_embeds()
-        self.remove_files(clear_attachments=False)
-        response_content = json.loads(response.content.decode("utf-8"))
-        if webhook_id := response_content.get("id"):
-            self.id = webhook_id
-        if attachments := response_content.get("attachments"):
-            self.attachments = attachments
+        log_response(response)
+        self._executed(response, remove_embeds, digests)
         return response
 
     def edit(self) -> "requests.Response":
@@ -488,38 +625,10 @@ class DiscordWebhook:
         assert isinstance(
             self.url, str
         ), "Webhook URL needs to be set in order to edit the webhook."
-        url = f"{self.url}/messages/{self.id}"
-        if bool(self.files) is False:
-            request = partial(
-                requests.patch,
-                url,
-                json=self.json,
-                proxies=self.proxies,
-                params=self._query_params,
-                timeout=self.timeout,
-            )
-        else:
-            self.files["payload_json"] = (None, json.dumps(self.json))
-            request = partial(
-                requests.patch,
-                url,
-                files=self.files,
-                proxies=self.proxies,
-                timeout=self.timeout,
-            )
-        response = request()
-        if response.status_code in [200, 204]:
-            logger.debug("Webhook with id {id} edited".format(id=self.id))
-        elif response.status_code == 429 and self.rate_limit_retry:
-            response = self.handle_rate_limit(response, request)
-            logger.debug("Webhook edited")
-        else:
-            logger.error(
-                "Webhook status code {status_code}: {content}".format(
-                    status_code=response.status_code,
-                    content=response.content.decode("utf-8"),
-                )
-            )
+        response = send_request(
+            self._transport, self._request("PATCH"), self.rate_limit_retry
+        )
+        log_response(response, f"Webhook with id {self.id} edited")
         return response
 
     def delete(self) -> "requests.Response":
@@ -533,22 +642,58 @@ class DiscordWebhook:
         assert isinstance(
             self.url, str
         ), "Webhook URL needs to be set in order to delete the webhook."
-        url = f"{self.url}/messages/{self.id}"
-        request = partial(
-            requests.delete,
-            url,
-            proxies=self.proxies,
-            params=self._query_params,
-            timeout=self.timeout,
+        response = send_request(
+            self._transport, self._request("DELETE"), self.rate_limit_retry
         )
-        response = request()
-        if response.status_code in [200, 204]:
-            logger.debug("Webhook deleted")
-        elif response.status_code == 429 and self.rate_limit_retry:
-            response = self.handle_rate_limit(response, request)
-            logger.debug("Webhook edited")
+        log_response(response, f"Webhook with id {self.id} deleted")
         return response
 
+    def bulk_delete(
+        self,
+        message_ids: Iterable[Target],
+        concurrency: int = 4,
+        progress: Optional[BulkProgress] = None,
+    ) -> BulkProgress:
+        """
+        Delete many messages of the webhook concurrently within the rate limits.
+        :param message_ids: message ids or tuples of message id and thread id
+        :param int concurrency: number of requests in flight at once
+        :param BulkProgress progress: (optional) progress of an interrupted run
+        :return: progress with the result of every message
+        """
+        return self._bulk_job("DELETE", concurrency, progress).run(message_ids)
+
+    def bulk_edit(
+        self,
+        message_ids: Iterable[Target],
+        concurrency: int = 4,
+        progress: Optional[BulkProgress] = None,
+    ) -> BulkProgress:
+        """
+        Replace many messages of the webhook with the data of this webhook.
+        :param message_ids: message ids or tuples of message id and thread id
+        :param int concurrency: number of requests in flight at once
+        :param BulkProgress progress: (optional) progress of an interrupted run
+        :return: progress with the result of every message
+        """
+        return self._bulk_job("PATCH", concurrency, progress).run(message_ids)
+
+    def _bulk_job(
+        self, method: str, concurrency: int, progress: Optional[BulkProgress], **kwargs
+    ) -> BulkJob:
+        kwargs.update(
+            concurrency=concurrency,
+            progress=progress,
+            transport=self.transport,
+            session=self.session,
+            proxies=self.proxies,
+        )
+        if method == "PATCH":
+            return BulkJob.edit(self, **kwargs)
+        return BulkJob.delete(
+            self.url, thread_id=self.thread_id, timeout=self.timeout, **kwargs
+        )
+
     @classmethod
     def create_batch(cls, urls: List[str], **kwargs) -> Tuple["DiscordWebhook", ...]:
         """
@@ -0,0 +1,62 @@
+import json
+from email.parser import BytesParser
+
+import pytest
+import requests
+
+
+class FakeDiscord:
+    """
+    Records the requests sent to Discord and answers them with queued responses.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+
+    def queue(self, status_code=200, body=None, headers=None):
+        self.responses.append((status_code, body, headers or {}))
+
+    def respond(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs))
+        if self.responses:
+            status_code, body, headers = self.responses.pop(0)
+        else:
+            status_code, body, headers = 200, {"id": str(len(self.requests))}, {}
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body if body is not None else {}).encode()
+        response.headers.update(headers)
+        response.url = url
+        return response
+
+    def payload(self, index=0):
+        """
+        Decode the body of a recorded request.
+        :return: JSON payload and the uploaded files by filename
+        """
+        kwargs = self.requests[index][2]
+        content_type = kwargs["headers"]["Content-Type"]
+        if content_type == "application/json":
+            return json.loads(kwargs["data"]), {}
+        message = BytesParser().parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + kwargs["data"]
+        )
+        payload, files = None, {}
+        for part in message.get_payload():
+            if part.get_param("name", header="content-disposition") == "payload_json":
+                payload = json.loads(part.get_payload(decode=True))
+            else:
+                files[part.get_filename()] = part.get_payload(decode=True)
+        return payload, files
+
+
+@pytest.fixture
+def discord(monkeypatch):
+    fake = FakeDiscord()
+
+    def request(session, method, url, **kwargs):
+        return fake.respond(method, url, **kwargs)
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    return fake
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from discord_webhook import AsyncDiscordWebhook
+from discord_webhook.async_files import AsyncFileSource
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    bodies = []
+
+    async def handler(request):
+        bodies.append(await request.aread())
+        return httpx.Response(200, json={"id": "1"})
+
+    client = httpx.AsyncClient
+    monkeypatch.setattr(
+        "discord_webhook.transport.httpx.AsyncClient",
+        lambda **kwargs: client(transport=httpx.MockTransport(handler)),
+    )
+    return bodies
+
+
+def test__add_file_from_path__streams_file(uploads, tmp_path):
+    path = tmp_path / "big.log"
+    path.write_bytes(b"line\n" * 50_000)
+    webhook = AsyncDiscordWebhook("https://webhook", content="logs")
+    webhook.add_file_from_path(path)
+
+    asyncio.run(webhook.execute())
+
+    assert b'filename="big.log"' in uploads[0]
+    assert b"line\n" * 50_000 in uploads[0]
+    assert b'"content": "logs"' in uploads[0]
+    assert webhook.file_sources == {}
+
+
+def test__add_file_stream__uploads_async_iterator(uploads):
+    async def stream():
+        for number in range(3):
+            yield f"chunk {number}\n".encode()
+
+    webhook = AsyncDiscordWebhook("https://webhook")
+    webhook.add_file(b"in memory", "memory.txt")
+    webhook.add_file_stream(stream(), "stream.txt")
+
+    asyncio.run(webhook.execute())
+
+    assert b"chunk 0\nchunk 1\nchunk 2\n" in uploads[0]
+    assert b"in memory" in uploads[0]
+
+
+def test__add_file_stream__can_only_be_sent_once(uploads):
+    async def stream():
+        yield b"data"
+
+    webhook = AsyncDiscordWebhook("https://webhook")
+    webhook.add_file_stream(stream(), "stream.txt")
+    source = webhook.file_sources["_stream.txt"][1]
+
+    asyncio.run(webhook.api_post_request())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(webhook.api_post_request())
+    assert source.consumed
+
+
+def test__async_file_source__subclasses_must_implement_chunks():
+    class Incomplete(AsyncFileSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from http.client import HTTPException
+
+import pytest
+
+from discord_webhook import (
+    AsyncDiscordWebhook,
+    AsyncFakeTransport,
+    BulkJob,
+    BulkProgress,
+    DiscordWebhook,
+    FakeTransport,
+)
+
+URL = "https://webhook"
+
+
+def test__bulk_delete__deletes_all_messages():
+    transport = FakeTransport()
+    webhook = DiscordWebhook(URL, transport=transport)
+
+    progress = webhook.bulk_delete(range(20), concurrency=4)
+
+    assert len(progress.succeeded) == 20
+    assert {r.method for r in transport.requests} == {"DELETE"}
+    assert sorted(r.url for r in transport.requests) == sorted(
+        f"{URL}/messages/{i}" for i in range(20)
+    )
+
+
+def test__bulk_edit__sends_payload_to_messages_in_threads():
+    transport = FakeTransport()
+    webhook = DiscordWebhook(URL, content="status: ok", transport=transport)
+
+    progress = webhook.bulk_edit([("1", "10"), ("2", None)], concurrency=1)
+
+    first, second = transport.requests
+    assert first.method == "PATCH"
+    assert first.params == (("thread_id", "10"),)
+    assert second.params == ()
+    assert json.loads(first.content)["content"] == "status: ok"
+    assert [item.ok for item in progress.results.values()] == [True, True]
+
+
+def test__bulk_job__waits_for_rate_limited_route():
+    transport = FakeTransport()
+    transport.queue(429, {"retry_after": 0.01}, {"Via": "1.1 google"})
+    job = BulkJob.delete(URL, transport=transport, concurrency=1)
+
+    progress = job.run(["1", "2"])
+
+    assert [r.url for r in transport.requests] == [
+        f"{URL}/messages/1",
+        f"{URL}/messages/1",
+        f"{URL}/messages/2",
+    ]
+    assert len(progress.succeeded) == 2
+
+
+def test__bulk_job__resumes_unfinished_messages(tmp_path):
+    path = str(tmp_path / "progress.json")
+    transport = FakeTransport()
+    transport.queue(204)
+    transport.queue(503, {"message": "unavailable"})
+    transport.queue(404, {"message": "Unknown Message"})
+    BulkJob.delete(
+        URL, transport=transport, concurrency=1, progress=BulkProgress(path)
+    ).run(["4", "5", "6"])
+    resumed = FakeTransport()
+
+    progress = BulkJob.delete(
+        URL, transport=resumed, concurrency=1, progress=BulkProgress(path)
+    ).run(["4", "5", "6"])
+
+    assert [r.url for r in resumed.requests] == [f"{URL}/messages/5"]
+    assert progress.results[("5", None)].ok
+    assert progress.results[("6", None)].status_code == 404
+
+
+def test__bulk_job__stops_when_blocked_and_saves_progress(tmp_path):
+    path = str(tmp_path / "progress.json")
+    transport = FakeTransport()
+    transport.queue(204)
+    transport.queue(429, {"message": "blocked"})
+    job = BulkJob.delete(
+        URL, transport=transport, concurrency=1, progress=BulkProgress(path)
+    )
+
+    with pytest.raises(HTTPException):
+        job.run(["1", "2", "3"])
+
+    assert BulkProgress(path).is_finished("1")
+    assert len(transport.requests) == 2
+
+
+def test__async_bulk_delete__deletes_all_messages():
+    transport = AsyncFakeTransport()
+    webhook = AsyncDiscordWebhook(URL, thread_id="9", transport=transport)
+
+    progress = asyncio.run(webhook.bulk_delete(range(10), concurrency=3))
+
+    assert len(progress.succeeded) == 10
+    assert {r.params for r in transport.requests} == {(("thread_id", "9"),)}
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+import requests
+
+from discord_webhook import AttachmentCache, DiscordEmbed, DiscordWebhook
+from discord_webhook.cache import LRUCache
+
+CDN_URL = "https://cdn.discordapp.com/attachments/1/2/logo.png"
+
+
+def test__lru_cache__evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test__lru_cache__expires_entries():
+    now = [0.0]
+    cache = LRUCache(ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+
+    now[0] = 11
+
+    assert cache.get("a") is None
+
+
+def test__attachment_cache__ignores_expired_signed_urls():
+    cache = AttachmentCache()
+    expired = f"{CDN_URL}?ex={int(time.time()) - 10:x}"
+
+    cache.store(cache.digest(b"logo"), {"filename": "logo.png", "url": expired})
+
+    assert cache.get(b"logo") is None
+
+
+def test__execute__reuses_uploaded_attachment(discord):
+    cache = AttachmentCache()
+    discord.queue(
+        body={"id": "1", "attachments": [{"filename": "logo.png", "url": CDN_URL}]}
+    )
+
+    for _ in range(2):
+        webhook = DiscordWebhook("https://webhook", attachment_cache=cache)
+        webhook.add_file(b"logo", "logo.png")
+        embed = DiscordEmbed(title="status")
+        embed.set_thumbnail(url="attachment://logo.png")
+        webhook.add_embed(embed)
+        webhook.execute()
+
+    _, first_files = discord.payload(0)
+    second, second_files = discord.payload(1)
+    assert first_files == {"logo.png": b"logo"}
+    assert second_files == {}
+    assert second["embeds"][0]["thumbnail"]["url"] == CDN_URL
+    assert embed.thumbnail["url"] == "attachment://logo.png"
+
+
+def test__execute__uploads_cached_file_without_embed_reference(discord):
+    cache = AttachmentCache()
+    cache.store(cache.digest(b"log"), {"filename": "app.log", "url": CDN_URL})
+    webhook = DiscordWebhook("https://webhook", attachment_cache=cache)
+    webhook.add_file(b"log", "app.log")
+
+    webhook.execute()
+
+    assert "app.log" in discord.payload()[1]
+
+
+def test__execute__restores_attachments_when_send_fails(monkeypatch):
+    cache = AttachmentCache()
+    cache.store(cache.digest(b"logo"), {"filename": "logo.png", "url": CDN_URL})
+    webhook = DiscordWebhook("https://webhook", attachment_cache=cache)
+    webhook.add_file(b"logo", "logo.png")
+    embed = DiscordEmbed(title="status")
+    embed.set_thumbnail(url="attachment://logo.png")
+    webhook.add_embed(embed)
+
+    def request(session, method, url, **kwargs):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    with pytest.raises(requests.ConnectionError):
+        webhook.execute()
+
+    assert webhook.files == {"_logo.png": ("logo.png", b"logo")}
+    assert webhook.embeds[0]["thumbnail"]["url"] == "attachment://logo.png"
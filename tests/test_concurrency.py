@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from discord_webhook import (
+    AdaptiveLimiter,
+    AdaptiveTransport,
+    AsyncAdaptiveTransport,
+    AsyncFakeTransport,
+    DiscordWebhook,
+    FakeTransport,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test__adaptive_limiter__grows_while_healthy():
+    clock = Clock()
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=4, clock=clock)
+
+    for _ in range(20):
+        token = limiter.acquire("discord.com")
+        clock.now += 0.1
+        limiter.release(token, 204)
+
+    assert limiter.limit("discord.com") == 4
+
+
+def test__adaptive_limiter__cuts_once_per_burst_of_errors():
+    limiter = AdaptiveLimiter(initial_limit=8)
+    tokens = [limiter.acquire("discord.com") for _ in range(8)]
+
+    for token in tokens:
+        limiter.release(token, 429)
+    assert limiter.limit("discord.com") == 4
+
+    limiter.release(limiter.acquire("discord.com"), 503)
+    assert limiter.limit("discord.com") == 2
+
+
+def test__adaptive_limiter__cuts_on_latency_spike():
+    clock = Clock()
+    limiter = AdaptiveLimiter(initial_limit=10, clock=clock)
+    for _ in range(5):
+        token = limiter.acquire("discord.com")
+        clock.now += 0.1
+        limiter.release(token, 200)
+
+    token = limiter.acquire("discord.com")
+    clock.now += 1.0
+    limiter.release(token, 200)
+
+    assert limiter.limit("discord.com") == 5
+    assert limiter.stats()["discord.com"]["latency"] == pytest.approx(0.1)
+
+
+def test__adaptive_limiter__blocks_at_limit():
+    limiter = AdaptiveLimiter(initial_limit=1)
+    limiter.acquire("discord.com")
+
+    with pytest.raises(TimeoutError):
+        limiter.acquire("discord.com", timeout=0.01)
+    limiter.acquire("other.host", timeout=0.01)
+
+
+def test__adaptive_transport__limits_webhook_by_host():
+    transport = AdaptiveTransport(FakeTransport())
+    webhook = DiscordWebhook("https://webhook/1", content="hi", transport=transport)
+
+    webhook.execute()
+
+    assert transport.limiter.stats()["webhook"]["in_flight"] == 0
+
+
+def test__async_adaptive_transport__caps_requests_in_flight():
+    in_flight, peak = 0, 0
+
+    class SlowTransport(AsyncFakeTransport):
+        async def send(self, request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return await super().send(request)
+
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=2)
+    transport = AsyncAdaptiveTransport(SlowTransport(), limiter)
+    message = DiscordWebhook("https://webhook/1", content="hi").prepare()
+
+    async def run():
+        await asyncio.gather(
+            *(message.send_async(transport=transport) for _ in range(10))
+        )
+
+    asyncio.run(run())
+
+    assert peak == 2
@@ -0,0 +1,111 @@
+import json
+import time
+
+import pytest
+import requests
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.dedup import MessageDeduplicator
+from discord_webhook.transport import FakeTransport
+
+
+def _webhook(content="disk full", **kwargs):
+    return DiscordWebhook("https://webhook", content=content, **kwargs)
+
+
+def test__dedup__drops_repeats_within_window(discord):
+    now = [0.0]
+    dedup = MessageDeduplicator(window=60, clock=lambda: now[0])
+
+    first = dedup.execute(_webhook())
+    second = dedup.execute(_webhook())
+    now[0] = 61
+    third = dedup.execute(_webhook())
+
+    assert first is not None and third is not None
+    assert second is None
+    assert len(discord.requests) == 2
+    assert dedup.suppressed == 1
+
+
+def test__dedup__different_targets_are_not_duplicates(discord):
+    dedup = MessageDeduplicator()
+
+    dedup.execute(_webhook())
+    dedup.execute(_webhook(thread_id="123"))
+    dedup.execute(_webhook(content="cpu high"))
+
+    assert len(discord.requests) == 3
+
+
+def test__dedup__failed_messages_are_not_remembered(discord):
+    discord.queue(500, {"message": "error"})
+    dedup = MessageDeduplicator()
+
+    dedup.execute(_webhook())
+    dedup.execute(_webhook())
+
+    assert len(discord.requests) == 2
+
+
+def test__dedup__edits_counter_of_original_message(discord):
+    dedup = MessageDeduplicator(collapse="edit", edit_interval=0.1)
+    discord.queue(200, {"id": "99"})
+
+    for _ in range(4):
+        dedup.execute(_webhook())
+    deadline = time.monotonic() + 5
+    while len(discord.requests) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    edits = [json.loads(kwargs["data"]) for _, _, kwargs in discord.requests[1:]]
+    (method, url, _) = discord.requests[1]
+    assert method == "PATCH"
+    assert url == "https://webhook/messages/99"
+    # the repeats within the edit interval are shown by a trailing edit
+    assert edits == [{"content": "disk full (×2)"}, {"content": "disk full (×4)"}]
+
+
+def test__dedup__edits_with_transport_of_webhook():
+    transport = FakeTransport()
+    dedup = MessageDeduplicator(collapse="edit", edit_interval=0)
+
+    dedup.execute(_webhook(transport=transport, timeout=3))
+    dedup.execute(_webhook(transport=transport, timeout=3))
+
+    (post, patch) = transport.requests
+    assert patch.method == "PATCH"
+    assert patch.url == "https://webhook/messages/1"
+    assert patch.timeout == 3
+
+
+def test__dedup__failed_counter_edit_is_logged(monkeypatch, caplog):
+    dedup = MessageDeduplicator(collapse="edit", edit_interval=0)
+    transport = FakeTransport()
+    dedup.execute(_webhook(transport=transport))
+
+    def send(request):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(transport, "send", send)
+
+    assert dedup.execute(_webhook(transport=transport)) is None
+    assert "could not be edited" in caplog.text
+
+
+def test__dedup__failed_sends_are_forgotten(monkeypatch):
+    dedup = MessageDeduplicator()
+
+    def request(session, method, url, **kwargs):
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    with pytest.raises(requests.ConnectionError):
+        dedup.execute(_webhook())
+
+    assert len(dedup) == 0
+
+
+def test__dedup__invalid_collapse():
+    with pytest.raises(ValueError):
+        MessageDeduplicator(collapse="merge")
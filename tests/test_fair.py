@@ -0,0 +1,151 @@
+import asyncio
+from concurrent.futures import Future
+
+import httpx
+import pytest
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.fair import AsyncFairSender, FairQueue, FairSender, TenantMessage
+
+RATE_LIMITED = {"Via": "1.1 google"}
+
+
+def _queued(content, tenant, url="https://webhook", queued_at=0.0):
+    message = DiscordWebhook(url, content=content).prepare()
+    return TenantMessage(message, tenant, queued_at, Future())
+
+
+def _pop_all(queue, delay=lambda url: 0.0):
+    order = []
+    while (item := queue.pop(0, delay)[0]) is not None:
+        order.append(item.tenant)
+    return order
+
+
+def test__fair_queue__round_robin_between_tenants():
+    queue = FairQueue()
+    for i in range(4):
+        queue.push(_queued(f"noisy {i}", "noisy"))
+    queue.push(_queued("quiet", "quiet"))
+
+    assert _pop_all(queue) == ["noisy", "quiet", "noisy", "noisy", "noisy"]
+    assert len(queue) == 0
+
+
+def test__fair_queue__weights():
+    queue = FairQueue(weights={"premium": 3})
+    for i in range(4):
+        queue.push(_queued(str(i), "premium"))
+        queue.push(_queued(str(i), "free"))
+
+    order = _pop_all(queue)
+
+    assert order[:5] == ["premium", "premium", "premium", "free", "premium"]
+    with pytest.raises(ValueError):
+        queue.set_weight("free", 0.5)
+
+
+def test__fair_queue__skips_rate_limited_urls():
+    queue = FairQueue()
+    queue.push(_queued("a", "noisy", url="https://limited"))
+    queue.push(_queued("b", "noisy", url="https://free", queued_at=1.0))
+    queue.push(_queued("c", "quiet", url="https://limited"))
+    delay = {"https://limited": 3.0, "https://free": 0.0}.get
+
+    item, _ = queue.pop(0, delay)
+    nothing, wait = queue.pop(0, delay)
+
+    assert b'"content": "b"' in item.message.body
+    assert nothing is None and wait == 3.0
+    assert queue.stats()["quiet"]["queued"] == 1
+
+
+def test__fair_queue__drops_stats_of_idle_tenants():
+    queue = FairQueue(max_stats=2)
+
+    for tenant in ["a", "b", "c"]:
+        queue.push(_queued("x", tenant))
+        queue.record(queue.pop(0, lambda url: 0.0)[0])
+    queue.push(_queued("x", "d"))
+
+    assert sorted(queue.stats()) == ["c", "d"]
+
+
+def test__fair_sender__requeues_rate_limited_message(discord):
+    discord.queue(429, {"retry_after": 0.01}, RATE_LIMITED)
+    discord.queue(200, {"id": "1"})
+
+    with FairSender(workers=1) as sender:
+        future = sender.submit(DiscordWebhook("https://webhook", content="a"), 1)
+        result = future.result(timeout=5)
+
+    assert result.id == "1"
+    assert len(discord.requests) == 2
+    assert sender.stats()[1]["sent"] == 1
+
+
+def test__fair_sender__close_without_wait_closes_transport(discord):
+    sender = FairSender(workers=2)
+    closed = []
+    sender.transport.close = lambda: closed.append(True)
+    future = sender.submit(DiscordWebhook("https://webhook", content="a"), 1)
+
+    sender.close(wait=False)
+
+    assert future.result(timeout=5).ok
+    for thread in sender._threads:
+        thread.join(timeout=5)
+    assert closed == [True]
+
+
+def test__fair_sender__uses_proxies_of_webhook(discord):
+    proxies = {"https": "http://proxy:3128"}
+    webhook = DiscordWebhook("https://webhook", content="a", proxies=proxies)
+
+    with FairSender(workers=1) as sender:
+        sender.submit(webhook, 1).result(timeout=5)
+
+    ((_, _, kwargs),) = discord.requests
+    assert kwargs["proxies"] == proxies
+
+
+def test__async_fair_sender():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"id": str(len(calls))})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async with AsyncFairSender(workers=1, client=client) as sender:
+                futures = [
+                    sender.submit(DiscordWebhook("https://a", content="a"), "a")
+                    for _ in range(3)
+                ]
+                webhook = DiscordWebhook("https://b", content="b")
+                futures.append(sender.submit(webhook, "b"))
+                return await asyncio.gather(*futures)
+
+    results = asyncio.run(main())
+
+    assert len(results) == 4
+    assert [call.url.host for call in calls[:2]] == ["a", "b"]
+
+
+def test__async_fair_sender__survives_cancelled_sends():
+    async def handler(request):
+        if b'"content": "slow"' in request.content:
+            await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"id": "1"})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async with AsyncFairSender(workers=1, client=client) as sender:
+                slow = DiscordWebhook("https://webhook", content="slow")
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(sender.send(slow, "a"), 0.05)
+                fast = DiscordWebhook("https://webhook", content="fast")
+                return await asyncio.wait_for(sender.send(fast, "b"), 5)
+
+    assert asyncio.run(main()).ok
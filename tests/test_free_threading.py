@@ -0,0 +1,147 @@
+import gc
+import os
+import sys
+import threading
+import time
+
+import pytest
+import requests
+
+from discord_webhook import DiscordEmbed, DiscordWebhook
+from discord_webhook.rate_limit import RateLimiter
+from discord_webhook.transport import FakeTransport, ThreadLocalTransport
+
+THREADS = 8
+
+GIL_ENABLED = getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def _run_threads(target, threads=THREADS):
+    barrier = threading.Barrier(threads)
+
+    def run():
+        barrier.wait()
+        target()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def _send_messages(transport, count):
+    for i in range(count):
+        webhook = DiscordWebhook("https://webhook", content=f"message {i}")
+        embed = DiscordEmbed(title="status", description="x" * 200)
+        for field in range(10):
+            embed.add_embed_field(name=f"field {field}", value="value")
+        webhook.add_embed(embed)
+        assert webhook.prepare().send(transport=transport).ok
+
+
+def test__rate_limiter__reservations_are_atomic():
+    limiter = RateLimiter()
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(
+        {
+            "X-RateLimit-Limit": "100",
+            "X-RateLimit-Remaining": "100",
+            "X-RateLimit-Reset-After": "60",
+        }
+    )
+    limiter.update("url", response)
+    reserved = []
+
+    def reserve():
+        for _ in range(50):
+            if limiter.reserve("url") == 0:
+                reserved.append(1)
+
+    _run_threads(reserve)
+
+    assert len(reserved) == 100
+    assert limiter.delay("url") > 0
+    assert limiter.delay("other url") == 0
+
+
+class ClosingTransport(FakeTransport):
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test__thread_local_transport__one_transport_per_thread():
+    created = []
+
+    def factory():
+        created.append(ClosingTransport())
+        return created[-1]
+
+    transport = ThreadLocalTransport(factory)
+
+    _run_threads(lambda: _send_messages(transport, 20))
+
+    assert len(created) == THREADS
+    assert all(len(fake.requests) == 20 for fake in created)
+    # the transports of exited threads are closed and released
+    deadline = time.monotonic() + 5
+    while transport._transports and time.monotonic() < deadline:
+        gc.collect()
+        time.sleep(0.01)
+    assert transport._transports == []
+    assert all(fake.closed for fake in created)
+
+
+def test__thread_local_transport__close():
+    transport = ThreadLocalTransport(ClosingTransport)
+    fake = transport.transport
+
+    transport.close()
+
+    assert fake.closed
+    assert transport._transports == []
+    assert transport.transport is not fake
+
+
+def test__thread_local_transport__transport_per_proxies():
+    transport = ThreadLocalTransport()
+    proxies = (("https", "http://proxy:3128"),)
+
+    proxied = transport.for_proxies(proxies)
+
+    assert proxied is transport.for_proxies(proxies)
+    assert proxied is not transport.transport
+    assert proxied.proxies == {"https": "http://proxy:3128"}
+    assert transport.transport.proxies is None
+    transport.close()
+    with pytest.raises(ValueError):
+        ThreadLocalTransport(FakeTransport).for_proxies(proxies)
+
+
+def _throughput(threads, count=200):
+    transport = ThreadLocalTransport(FakeTransport)
+    started = time.perf_counter()
+    _run_threads(lambda: _send_messages(transport, count), threads)
+    return threads * count / (time.perf_counter() - started)
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs 4 CPUs")
+def test__free_threading__send_path_scales():
+    """
+    A GIL build and a free-threaded build can't be compared within one test run,
+    the interpreter is either one or the other. On a GIL build the benchmark
+    records the baseline as an expected failure, since the GIL serializes the
+    send path; on a free-threaded build 4 threads have to scale.
+    """
+    single = _throughput(1)
+    parallel = _throughput(4)
+
+    numbers = f"1 thread: {single:.0f} msg/s, 4 threads: {parallel:.0f} msg/s"
+    if GIL_ENABLED:
+        pytest.xfail(f"GIL build baseline, {numbers}")
+    assert parallel > single * 1.5, numbers
@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+import time
+
+import pytest
+import requests
+
+from discord_webhook.log_handler import DiscordLogHandler
+
+
+@pytest.fixture
+def make_logger():
+    handlers = []
+
+    def make(**kwargs):
+        handler = DiscordLogHandler("https://webhook", flush_interval=0.05, **kwargs)
+        logger = logging.getLogger(f"test.discord.{len(handlers) + 1}")
+        handlers.append((logger, handler))
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        return logger, handler
+
+    yield make
+    for logger, handler in handlers:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def _payloads(discord):
+    return [json.loads(kwargs["data"]) for _, _, kwargs in discord.requests]
+
+
+def test__log_handler__batches_records_in_code_block(discord, make_logger):
+    logger, handler = make_logger()
+
+    for number in range(3):
+        logger.info("record %d", number)
+    assert handler.flush(timeout=5)
+
+    (payload,) = _payloads(discord)
+    assert payload["content"].startswith("```\n")
+    assert all(f"record {number}" in payload["content"] for number in range(3))
+    assert handler.stats["sent"] == 3
+    assert handler.stats["messages"] == 1
+
+
+def test__log_handler__splits_messages_at_content_limit(discord, make_logger):
+    logger, handler = make_logger()
+
+    for _ in range(30):
+        logger.warning("x" * 200)
+    handler.close()
+
+    payloads = _payloads(discord)
+    assert len(payloads) > 1
+    assert all(len(payload["content"]) <= 2000 for payload in payloads)
+    assert handler.sent == 30
+
+
+def test__log_handler__embeds(discord, make_logger):
+    logger, handler = make_logger(style="embed")
+
+    for _ in range(12):
+        logger.error("failure")
+    handler.close()
+
+    embeds = [len(payload["embeds"]) for payload in _payloads(discord)]
+    assert embeds == [10, 2]
+
+
+def test__log_handler__drops_records_when_queue_is_full(discord, make_logger):
+    logger, handler = make_logger(max_queue_size=1)
+    handler._stopping.set()
+    handler._thread.join()
+    handler._stopping.clear()
+
+    logger.info("first")
+    logger.info("second")
+
+    assert handler.stats["emitted"] == 1
+    assert handler.stats["dropped"] == 1
+
+
+def test__log_handler__counts_failed_records(discord, make_logger):
+    discord.queue(400, {"message": "bad request"})
+    logger, handler = make_logger()
+
+    logger.info("lost")
+    handler.close()
+
+    assert handler.failed == 1
+
+
+def test__log_handler__close_does_not_wait_for_a_hanging_network(
+    monkeypatch, make_logger
+):
+    release = threading.Event()
+    timeouts = []
+
+    def request(session, method, url, **kwargs):
+        timeouts.append(kwargs.get("timeout"))
+        release.wait(5)
+        raise requests.ConnectTimeout()
+
+    monkeypatch.setattr(requests.Session, "request", request)
+    logger, handler = make_logger(shutdown_timeout=0.1)
+
+    logger.info("stuck")
+    started = time.monotonic()
+    assert not handler.flush()
+    handler.close()
+    release.set()
+
+    assert time.monotonic() - started < 2
+    assert timeouts == [10.0]
+
+
+def test__log_handler__reports_bad_records_instead_of_raising(discord, make_logger):
+    logger, handler = make_logger()
+    errors = []
+    handler.handleError = errors.append
+
+    # pytest's own log capture raises on bad records, so call the handler directly
+    handler.handle(
+        logger.makeRecord(
+            logger.name, logging.ERROR, __file__, 1, "value %d", ("notanint",), None
+        )
+    )
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    assert handler.flush(timeout=5)
+
+    assert len(errors) == 1
+    (payload,) = _payloads(discord)
+    assert "failed\nTraceback" in payload["content"]
+    assert "ValueError: boom" in payload["content"]
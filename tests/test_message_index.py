@@ -0,0 +1,90 @@
+import asyncio
+
+from discord_webhook import (
+    AsyncDiscordWebhook,
+    AsyncFakeTransport,
+    DiscordWebhook,
+    FakeTransport,
+    MessageIndex,
+)
+
+URL = "https://webhook"
+
+
+def test__message_index__edits_by_key_after_restart(tmp_path):
+    path = str(tmp_path / "messages.db")
+    transport = FakeTransport()
+    transport.queue(200, {"id": "100"})
+    with MessageIndex(path) as index:
+        webhook = DiscordWebhook(URL, content="up", thread_id="5", transport=transport)
+        index.execute("db-1", webhook)
+
+    with MessageIndex(path) as index:
+        webhook = DiscordWebhook(URL, content="down", transport=transport)
+        index.edit("db-1", webhook)
+        entry = index.get("db-1")
+
+    request = transport.requests[-1]
+    assert request.method == "PATCH"
+    assert request.url == f"{URL}/messages/100"
+    assert request.params == (("thread_id", "5"), ("wait", "True"))
+    assert entry.message_id == "100"
+
+
+def test__message_index__skips_unchanged_edits():
+    transport = FakeTransport()
+    index = MessageIndex()
+    index.execute("db-1", DiscordWebhook(URL, content="up", transport=transport))
+    webhook = DiscordWebhook(URL, content="up", transport=transport)
+
+    response = index.edit("db-1", webhook)
+
+    assert response is None
+    assert len(transport.requests) == 1
+
+
+def test__message_index__upsert_sends_new_message_if_deleted():
+    transport = FakeTransport()
+    transport.queue(200, {"id": "1"})
+    transport.queue(404, {"message": "Unknown Message"})
+    transport.queue(200, {"id": "2"})
+    index = MessageIndex()
+    index.upsert("board", DiscordWebhook(URL, content="a", transport=transport))
+
+    index.upsert("board", DiscordWebhook(URL, content="b", transport=transport))
+
+    assert [r.method for r in transport.requests] == ["POST", "PATCH", "POST"]
+    assert index.get("board").message_id == "2"
+
+
+def test__message_index__delete_removes_entry(tmp_path):
+    transport = FakeTransport()
+    index = MessageIndex(str(tmp_path / "messages.db"), max_size=1)
+    index.execute("a", DiscordWebhook(URL, content="a", transport=transport))
+    index.execute("b", DiscordWebhook(URL, content="b", transport=transport))
+
+    response = index.delete("a", transport=transport)
+
+    assert response.status_code == 200
+    assert transport.requests[-1].url == f"{URL}/messages/1"
+    assert "a" not in index
+    assert len(index) == 1
+
+
+def test__message_index__async():
+    transport = AsyncFakeTransport()
+    index = MessageIndex()
+
+    async def run():
+        await index.execute_async(
+            "a", AsyncDiscordWebhook(URL, content="a", transport=transport)
+        )
+        await index.edit_async(
+            "a", AsyncDiscordWebhook(URL, content="b", transport=transport)
+        )
+        await index.delete_async("a", transport=transport)
+
+    asyncio.run(run())
+
+    assert [r.method for r in transport.requests] == ["POST", "PATCH", "DELETE"]
+    assert len(index) == 0
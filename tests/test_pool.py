@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.pool import WebhookPool
+
+URLS = ["https://webhook/1", "https://webhook/2", "https://webhook/3"]
+
+
+def _headers(remaining):
+    return {
+        "X-RateLimit-Limit": "5",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset-After": "2",
+    }
+
+
+def test__pool__prefers_url_with_most_headroom(discord):
+    pool = WebhookPool(URLS)
+    for url, remaining in zip(URLS, [1, 4, 0]):
+        discord.queue(200, {}, _headers(remaining))
+        pool.rate_limiter.update(url, discord.respond("POST", url))
+
+    result = pool.send(DiscordWebhook("unused", content="message"))
+
+    assert result.url == URLS[1]
+
+
+def test__pool__sticky_key_uses_same_url(discord):
+    pool = WebhookPool(URLS)
+
+    urls = {
+        pool.send(DiscordWebhook("unused", content="x"), key="incident").url
+        for _ in range(5)
+    }
+
+    assert len(urls) == 1
+
+
+def test__pool__removes_unauthorized_urls(discord):
+    pool = WebhookPool(URLS)
+    discord.queue(404, {"message": "Unknown Webhook"})
+
+    webhook = DiscordWebhook("unused", content="x")
+    result = pool.execute(webhook)
+
+    assert result.ok
+    assert len(pool.urls) == 2
+    assert list(pool.removed_urls.values()) == [404]
+    assert webhook.url == result.url and webhook.id == result.id
+
+
+def test__pool__raises_when_no_url_is_left(discord):
+    pool = WebhookPool(URLS[:1])
+    discord.queue(401, {"message": "Invalid Webhook Token"})
+
+    with pytest.raises(RuntimeError):
+        pool.send(DiscordWebhook("unused", content="x"))
+
+
+def test__pool__send_async():
+    used = []
+
+    def handler(request):
+        used.append(str(request.url))
+        return httpx.Response(200, json={"id": "1"}, headers=_headers(0))
+
+    async def main():
+        pool = WebhookPool(URLS[:2])
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            for _ in range(2):
+                await pool.send_async(
+                    DiscordWebhook("unused", content="x"), client=client
+                )
+
+    asyncio.run(main())
+
+    assert sorted(used) == [
+        "https://webhook/1?wait=True",
+        "https://webhook/2?wait=True",
+    ]
+
+
+def test__pool__close_closes_own_sessions():
+    with WebhookPool(["https://webhook/1"]) as pool:
+        transport = pool._transport.transport
+    assert pool._transport._transports == []
+    assert pool._transport.transport is not transport
+
+    session = requests.Session()
+    with WebhookPool(["https://webhook/1"], session=session) as pool:
+        assert pool._transport is None
+
+
+def test__pool__uses_proxies_of_webhook(discord):
+    proxies = {"https": "http://proxy:3128"}
+
+    with WebhookPool(URLS) as pool:
+        pool.send(DiscordWebhook("", content="a", proxies=proxies))
+
+    ((_, _, kwargs),) = discord.requests
+    assert kwargs["proxies"] == proxies
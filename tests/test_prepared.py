@@ -0,0 +1,75 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from discord_webhook import AsyncDiscordWebhook, DiscordEmbed, DiscordWebhook
+
+
+def test__prepare__does_not_change_webhook():
+    embed = DiscordEmbed(title="title")
+    webhook = DiscordWebhook("https://webhook", content="hello", embeds=[embed])
+    webhook.add_file(b"data", "data.txt")
+
+    prepared = webhook.prepare()
+
+    assert webhook.embeds == [embed]
+    assert "payload_json" not in webhook.files
+    assert prepared.filenames == ("data.txt",)
+    assert prepared.content_type.startswith("multipart/form-data")
+    assert b'"title": "title"' in prepared.body
+
+
+def test__prepare__is_hashable_and_immutable():
+    webhook = DiscordWebhook("https://webhook", content="hello")
+
+    prepared = webhook.prepare()
+
+    assert hash(prepared) == hash(webhook.prepare())
+    assert prepared.fingerprint == webhook.prepare().fingerprint
+    webhook.set_content("changed")
+    assert prepared.fingerprint != webhook.prepare().fingerprint
+    assert json.loads(prepared.body)["content"] == "hello"
+
+
+def test__prepared_message__sends_concurrently(discord):
+    webhook = DiscordWebhook("https://webhook", content="hello")
+    prepared = webhook.prepare()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: prepared.send(), range(8)))
+
+    assert sorted(int(result.id) for result in results) == list(range(1, 9))
+    assert webhook.id is None
+    assert all(kwargs["data"] == prepared.body for _, _, kwargs in discord.requests)
+
+
+def test__prepared_message__retries_when_rate_limited(discord, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    discord.queue(429, {"retry_after": 0.01}, {"Via": "1.1 google"})
+    discord.queue(200, {"id": "42", "attachments": [{"filename": "a.txt"}]})
+    webhook = DiscordWebhook("https://webhook", content="hi", rate_limit_retry=True)
+
+    result = webhook.prepare().send()
+
+    assert result.ok
+    assert result.id == "42"
+    assert result.attachments == ({"filename": "a.txt"},)
+    assert len(discord.requests) == 2
+
+
+def test__prepared_message__send_async():
+    def handler(request):
+        assert request.headers["content-type"] == "application/json"
+        return httpx.Response(200, json={"id": "7", "channel_id": "9"})
+
+    prepared = AsyncDiscordWebhook("https://webhook", content="hi").prepare()
+
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await prepared.send_async(client)
+
+    result = asyncio.run(send())
+
+    assert (result.id, result.channel_id) == ("7", "9")
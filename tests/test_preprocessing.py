@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from discord_webhook import (
+    AsyncDiscordWebhook,
+    AttachmentPreprocessor,
+    DiscordEmbed,
+    DiscordWebhook,
+)
+from discord_webhook.preprocessing import process_file
+
+
+@pytest.fixture
+def preprocessor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield AttachmentPreprocessor(
+            compress_threshold=100, max_file_size=1000, executor=executor
+        )
+
+
+def test__preprocess__compresses_large_logs(preprocessor):
+    log = b"2024-01-01 INFO something happened\n" * 50
+    webhook = DiscordWebhook("https://webhook")
+    webhook.add_file(log, "app.log")
+
+    webhook.preprocess_files(preprocessor)
+
+    filename, content = webhook.files["_app.log.gz"]
+    assert filename == "app.log.gz"
+    assert gzip.decompress(content) == log
+
+
+def test__preprocess__keeps_small_files(preprocessor):
+    webhook = DiscordWebhook("https://webhook")
+    webhook.add_file(b"small", "small.log")
+
+    webhook.preprocess_files(preprocessor)
+
+    assert webhook.files == {"_small.log": ("small.log", b"small")}
+
+
+def test__preprocess__splits_files_larger_than_limit(preprocessor):
+    data = bytes(range(256)) * 10
+    webhook = DiscordWebhook("https://webhook")
+    webhook.add_file(data, "dump.bin")
+
+    follow_ups = webhook.preprocess_files(preprocessor)
+
+    messages = [webhook] + follow_ups
+    assert [list(message.files) for message in messages] == [
+        ["_dump.bin.001"],
+        ["_dump.bin.002"],
+        ["_dump.bin.003"],
+    ]
+    parts = [content for m in messages for _, content in m.files.values()]
+    assert b"".join(parts) == data
+
+
+def test__preprocess__follow_up_messages_have_at_most_ten_files(preprocessor):
+    webhook = DiscordWebhook("https://webhook", content="logs", username="ci")
+    for i in range(12):
+        webhook.add_file(b"x", f"{i}.bin")
+
+    follow_ups = webhook.preprocess_files(preprocessor)
+
+    assert len(webhook.files) == 10
+    assert [len(f.files) for f in follow_ups] == [2]
+    assert follow_ups[0].content is None
+    assert follow_ups[0].username == "ci"
+
+
+def test__preprocess__follow_up_messages_do_not_create_threads(preprocessor):
+    webhook = DiscordWebhook("https://webhook", thread_name="nightly", tts=True)
+    webhook.components = [{"type": 1}]
+    for i in range(11):
+        webhook.add_file(b"x", f"{i}.bin")
+
+    (follow_up,) = webhook.preprocess_files(preprocessor)
+
+    assert webhook.thread_name == "nightly"
+    payload = follow_up.json
+    assert "thread_name" not in payload
+    assert "components" not in payload
+    assert "tts" not in payload
+
+
+def test__preprocess__keeps_filenames_referenced_by_embeds(preprocessor):
+    webhook = DiscordWebhook("https://webhook")
+    webhook.add_file(b"line\n" * 500, "report.txt")
+    embed = DiscordEmbed(title="report")
+    embed.set_image(url="attachment://report.txt")
+    webhook.add_embed(embed)
+
+    follow_ups = webhook.preprocess_files(preprocessor)
+
+    assert follow_ups == []
+    assert list(webhook.files) == ["_report.txt"]
+
+
+def test__preprocess__sends_decompression_bombs_as_they_are(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    output = io.BytesIO()
+    Image.new("RGB", (100, 100)).save(output, format="PNG")
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 10)
+
+    files = process_file("big.png", output.getvalue(), {"max_file_size": 10**6})
+
+    assert files == [("big.png", output.getvalue())]
+
+
+def test__preprocess__async(preprocessor):
+    webhook = AsyncDiscordWebhook("https://webhook")
+    webhook.add_file(b"x" * 500, "output.txt")
+
+    asyncio.run(webhook.preprocess_files(preprocessor))
+
+    assert list(webhook.files) == ["_output.txt.gz"]
+
+
+def test__preprocess__default_process_pool():
+    with AttachmentPreprocessor(compress_threshold=10, archive_format="zip") as p:
+        files = p.process({"_a.csv": ("a.csv", b"a,b,c\n" * 10)})
+
+    assert list(files) == ["_a.zip"]
@@ -0,0 +1,144 @@
+import asyncio
+from concurrent.futures import Future
+
+import httpx
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.priority import (
+    AsyncPrioritySender,
+    Priority,
+    PriorityLanes,
+    PrioritySender,
+    QueuedMessage,
+)
+
+RATE_LIMITED = {"Via": "1.1 google"}
+
+
+def _queued(content, priority, queued_at=0.0, url="https://webhook"):
+    message = DiscordWebhook(url, content=content).prepare()
+    return QueuedMessage(message, priority, queued_at, Future())
+
+
+def _pop_all(lanes, now=0.0, delay=lambda url: 0.0):
+    order = []
+    while (item := lanes.pop(now, delay)[0]) is not None:
+        order.append(item.message.body)
+    return order
+
+
+def test__priority_lanes__higher_priority_first():
+    lanes = PriorityLanes()
+    for content, priority in [("bulk", 0), ("alert", 4), ("normal", 2)]:
+        lanes.push(_queued(content, priority))
+
+    order = _pop_all(lanes)
+
+    assert [b'"content": "alert"' in body for body in order] == [True, False, False]
+    assert b'"content": "bulk"' in order[-1]
+
+
+def test__priority_lanes__aging_prevents_starvation():
+    lanes = PriorityLanes(aging=10)
+    lanes.push(_queued("old bulk", Priority.BULK, queued_at=0))
+    lanes.push(_queued("new high", Priority.HIGH, queued_at=45))
+
+    item, _ = lanes.pop(50, lambda url: 0.0)
+
+    assert b"old bulk" in item.message.body
+
+
+def test__priority_lanes__skips_rate_limited_urls():
+    lanes = PriorityLanes()
+    lanes.push(_queued("alert", Priority.CRITICAL, url="https://limited"))
+    lanes.push(_queued("bulk", Priority.BULK, url="https://free"))
+    delay = {"https://limited": 3.0, "https://free": 0.0}.get
+
+    item, _ = lanes.pop(0, delay)
+    nothing, wait = lanes.pop(0, delay)
+
+    assert b"bulk" in item.message.body
+    assert nothing is None and wait == 3.0
+    assert lanes.stats()[Priority.CRITICAL]["queued"] == 1
+
+
+def test__priority_sender__requeues_rate_limited_message(discord):
+    discord.queue(429, {"retry_after": 0.01}, RATE_LIMITED)
+    discord.queue(200, {"id": "1"})
+
+    with PrioritySender() as sender:
+        future = sender.submit(DiscordWebhook("https://webhook", content="alert"))
+        result = future.result(timeout=5)
+
+    assert result.id == "1"
+    assert len(discord.requests) == 2
+    assert sender.stats()[Priority.NORMAL]["sent"] == 1
+
+
+def test__priority_sender__close_without_wait_closes_transport(discord):
+    sender = PrioritySender(workers=2)
+    closed = []
+    sender.transport.close = lambda: closed.append(True)
+    future = sender.submit(DiscordWebhook("https://webhook", content="alert"))
+
+    sender.close(wait=False)
+
+    assert future.result(timeout=5).ok
+    for thread in sender._threads:
+        thread.join(timeout=5)
+    assert closed == [True]
+
+
+def test__priority_sender__uses_proxies_of_webhook(discord):
+    proxies = {"https": "http://proxy:3128"}
+    webhook = DiscordWebhook("https://webhook", content="alert", proxies=proxies)
+
+    with PrioritySender() as sender:
+        sender.submit(webhook).result(timeout=5)
+        sender.submit(DiscordWebhook("https://webhook", content="a")).result(timeout=5)
+
+    assert [kwargs["proxies"] for _, _, kwargs in discord.requests] == [proxies, None]
+
+
+def test__async_priority_sender():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"id": str(len(calls))})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async with AsyncPrioritySender(client=client) as sender:
+                return await asyncio.gather(
+                    sender.send(DiscordWebhook("https://webhook", content="a")),
+                    sender.send(DiscordWebhook("https://webhook", content="b"), 4),
+                )
+
+    results = asyncio.run(main())
+
+    assert sorted(result.id for result in results) == ["1", "2"]
+    assert b'"content": "b"' in calls[0].content
+
+
+def test__async_priority_sender__survives_cancelled_sends():
+    async def handler(request):
+        if b'"content": "slow"' in request.content:
+            await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"id": "1"})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            async with AsyncPrioritySender(workers=1, client=client) as sender:
+                try:
+                    await asyncio.wait_for(
+                        sender.send(DiscordWebhook("https://webhook", content="slow")),
+                        0.05,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                return await asyncio.wait_for(
+                    sender.send(DiscordWebhook("https://webhook", content="fast")), 5
+                )
+
+    assert asyncio.run(main()).ok
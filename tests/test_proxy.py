@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+import requests
+import urllib3
+
+from discord_webhook import AsyncDiscordWebhook, DiscordWebhook
+from discord_webhook.proxy import (
+    AsyncProxyPoolTransport,
+    ProxyPool,
+    ProxyPoolTransport,
+    _can_fail_over,
+)
+from discord_webhook.transport import (
+    AsyncFakeTransport,
+    FakeTransport,
+    TransportResponse,
+)
+
+PROXIES = ["http://proxy-a", "http://proxy-b"]
+
+
+class BrokenTransport(FakeTransport):
+    def __init__(self, error=None):
+        super().__init__()
+        self.error = error or ConnectionRefusedError("proxy down")
+
+    def send(self, request):
+        self.requests.append(request)
+        raise self.error
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test__proxy_pool__prefers_lower_latency():
+    pool = ProxyPool(PROXIES)
+    slow, fast = pool.proxies
+    pool.report(slow, 2.0, True)
+    pool.report(fast, 0.1, True)
+
+    state = pool.select("https://webhook")
+
+    assert state is fast
+    assert pool.stats()[fast.url]["in_flight"] == 1
+
+
+def test__proxy_pool__ejects_failing_proxy_and_readmits_it():
+    clock = Clock()
+    pool = ProxyPool(PROXIES, eject_after=2, eject_for=10, clock=clock)
+    broken, healthy = pool.proxies
+    pool.report(broken, 1.0, False)
+    pool.report(broken, 1.0, False)
+
+    assert all(pool.select("https://webhook") is healthy for _ in range(5))
+    assert pool.stats()[broken.url]["ejected"] == 10
+
+    clock.now = 11
+    pool.report(healthy, 5.0, True)
+    assert pool.select("https://webhook") is broken
+
+
+def test__proxy_pool__rate_limits_per_proxy():
+    pool = ProxyPool(PROXIES)
+    limited, free = pool.proxies
+    rate_limited = TransportResponse(
+        429, {"Via": "1.1 google"}, b'{"retry_after": 60, "global": true}'
+    )
+
+    state = pool.select("https://webhook", exclude=[free.url])
+    pool.release(state, 0.1, rate_limited, "https://webhook")
+
+    assert state is limited
+    assert limited.rate_limiter.delay("https://other") > 0
+    assert free.rate_limiter.delay("https://other") == 0
+    assert all(pool.select("https://other") is free for _ in range(5))
+
+
+def test__proxy_pool_transport__fails_over_to_another_proxy():
+    transports = {PROXIES[0]: BrokenTransport(), PROXIES[1]: FakeTransport()}
+    pool = ProxyPool(PROXIES, eject_after=1)
+    transport = ProxyPoolTransport(pool, transport_factory=transports.get)
+    pool.report(pool.proxies[1], 1.0, True)  # the broken proxy looks faster
+
+    webhook = DiscordWebhook("https://webhook", content="a", transport=transport)
+    response = webhook.execute()
+
+    assert response.status_code == 200
+    assert len(transports[PROXIES[0]].requests) == 1
+    assert len(transports[PROXIES[1]].requests) == 1
+    assert pool.stats()[PROXIES[0]]["ejected"] > 0
+
+
+def test__proxy_pool_transport__raises_when_all_proxies_fail():
+    pool = ProxyPool(PROXIES)
+    transport = ProxyPoolTransport(pool, lambda url: BrokenTransport())
+
+    with pytest.raises(ConnectionError):
+        DiscordWebhook("https://webhook", content="a", transport=transport).execute()
+
+
+def test__proxy_pool_transport__fails_over_only_before_sending():
+    timeout = requests.ReadTimeout("read timed out")
+    transports = {url: BrokenTransport(timeout) for url in PROXIES}
+    transport = ProxyPoolTransport(ProxyPool(PROXIES), transport_factory=transports.get)
+    webhook = DiscordWebhook("https://webhook", content="a", transport=transport)
+
+    # Discord may have posted the message already
+    with pytest.raises(requests.ReadTimeout):
+        webhook.execute()
+    assert sum(len(t.requests) for t in transports.values()) == 1
+
+    # deleting a message twice is harmless, so it's tried `attempts` times
+    webhook.id = "1"
+    with pytest.raises(requests.ReadTimeout):
+        webhook.delete()
+    assert sum(len(t.requests) for t in transports.values()) == 1 + 3
+
+
+def test__can_fail_over__unwraps_connect_errors_of_requests():
+    request = DiscordWebhook("https://webhook", content="a")._request()
+    refused = urllib3.exceptions.NewConnectionError(None, "refused")
+    aborted = urllib3.exceptions.ProtocolError("Connection aborted.")
+
+    assert _can_fail_over(
+        request,
+        requests.ConnectionError(urllib3.exceptions.MaxRetryError(None, "/", refused)),
+    )
+    assert not _can_fail_over(request, requests.ConnectionError(aborted))
+
+
+def test__async_proxy_pool_transport():
+    transports = {url: AsyncFakeTransport() for url in PROXIES}
+    pool = ProxyPool(PROXIES)
+    transport = AsyncProxyPoolTransport(pool, transport_factory=transports.get)
+
+    async def main():
+        webhook = AsyncDiscordWebhook("https://webhook", content="a")
+        webhook.transport = transport
+        return await webhook.execute()
+
+    response = asyncio.run(main())
+
+    assert response.status_code == 200
+    assert sum(len(t.requests) for t in transports.values()) == 1
+
+
+def test__async_proxy_pool_transport__cancelled_requests_are_released():
+    class SlowTransport(AsyncFakeTransport):
+        async def send(self, request):
+            await asyncio.sleep(10)
+
+    pool = ProxyPool(PROXIES)
+    transport = AsyncProxyPoolTransport(
+        pool, transport_factory=lambda url: SlowTransport()
+    )
+    request = DiscordWebhook("https://webhook", content="a").prepare().to_request()
+
+    async def main():
+        for _ in range(5):
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(transport.send(request), 0.01)
+
+    asyncio.run(main())
+
+    assert [state.in_flight for state in pool.proxies] == [0, 0]
+    # a cancelled request says nothing about the health of the proxy
+    assert all(state.failures == 0 for state in pool.proxies)
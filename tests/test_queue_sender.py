@@ -0,0 +1,35 @@
+import pytest
+
+from discord_webhook import DiscordWebhook, FairSender, PrioritySender
+from discord_webhook.queue_sender import new_wait_stats, record_wait, wait_summary
+
+
+class _Item:
+    def __init__(self, queued_at, dispatched_at):
+        self.queued_at = queued_at
+        self.dispatched_at = dispatched_at
+
+
+def test__wait_stats():
+    stats = new_wait_stats()
+
+    record_wait(stats, _Item(0.0, 1.0))
+    record_wait(stats, _Item(0.0, 3.0))
+
+    assert wait_summary(stats) == {
+        "queued": 0,
+        "sent": 2,
+        "wait_total": 4.0,
+        "wait_max": 3.0,
+        "wait_avg": 2.0,
+    }
+    assert wait_summary(new_wait_stats())["wait_avg"] == 0.0
+
+
+@pytest.mark.parametrize("sender_class, key", [(PrioritySender, 2), (FairSender, "a")])
+def test__queue_sender__rejects_messages_after_close(sender_class, key):
+    sender = sender_class(workers=1)
+    sender.close()
+
+    with pytest.raises(RuntimeError, match=f"{sender_class.__name__} has been closed"):
+        sender.submit(DiscordWebhook("https://webhook", content="late"), key)
@@ -0,0 +1,59 @@
+import requests
+
+from discord_webhook.rate_limit import RateLimiter
+
+
+def _response(status_code=200, headers=None, body=b"{}"):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = body
+    return response
+
+
+def test__rate_limiter__unknown_bucket_can_be_used():
+    limiter = RateLimiter()
+
+    assert limiter.delay("url") == 0
+    assert limiter.headroom("url") is None
+
+
+def test__rate_limiter__waits_when_bucket_is_exhausted():
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+    limiter.update(
+        "url",
+        _response(
+            headers={
+                "X-RateLimit-Limit": "5",
+                "X-RateLimit-Remaining": "1",
+                "X-RateLimit-Reset-After": "2",
+            }
+        ),
+    )
+
+    assert limiter.reserve("url") == 0
+    assert limiter.delay("url") == 2
+    now[0] = 2.5
+    assert limiter.headroom("url") == 5
+    assert limiter.reserve("url") == 0
+
+
+def test__rate_limiter__429_blocks_bucket():
+    now = [0.0]
+    limiter = RateLimiter(clock=lambda: now[0])
+
+    retry_after = limiter.update("url", _response(429, body=b'{"retry_after": 1.5}'))
+
+    assert retry_after == 1.65
+    assert limiter.delay("url") == 1.65
+    assert limiter.delay("other") == 0
+
+
+def test__rate_limiter__global_429_blocks_all_buckets():
+    limiter = RateLimiter(clock=lambda: 0.0)
+
+    limiter.update("url", _response(429, body=b'{"retry_after": 1, "global": true}'))
+
+    assert limiter.delay("other") > 0
+    assert limiter.headroom("other") == 0
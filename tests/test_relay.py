@@ -0,0 +1,92 @@
+import socket
+
+import pytest
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.relay import (
+    Relay,
+    RelayClient,
+    RelayQueue,
+    message_from_json,
+    message_to_json,
+)
+
+
+def test__message_json__round_trip():
+    webhook = DiscordWebhook("https://webhook", content="a", thread_id="7")
+    webhook.add_file(b"file", "file.txt")
+    message = webhook.prepare()
+
+    assert message_from_json(message_to_json(message)) == message.replace(
+        proxies=(), rate_limit_retry=False
+    )
+    plain = DiscordWebhook("https://webhook", content="b").prepare()
+    assert message_to_json(plain)["payload"]["content"] == "b"
+
+
+def test__relay__sends_and_waits(discord):
+    discord.queue(200, {"id": "42"})
+    with Relay(port=0) as relay:
+        client = RelayClient(relay.address, fallback=False)
+        result = client.send(DiscordWebhook("https://webhook", content="a"), wait=True)
+
+    assert result.id == "42"
+    assert discord.payload(0)[0]["content"] == "a"
+
+
+def test__relay__queues_without_waiting(discord):
+    with Relay(port=0) as relay:
+        client = RelayClient(relay.address, fallback=False)
+        result = client.send(DiscordWebhook("https://webhook", content="a"))
+
+    assert result is None
+    assert len(discord.requests) == 1
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+def test__relay__unix_socket_and_durable_queue(discord, tmp_path):
+    queue_path = str(tmp_path / "relay.db")
+    RelayQueue(queue_path).add({"url": "https://webhook", "payload": {"content": "b"}})
+
+    socket_path = str(tmp_path / "relay.sock")
+    with Relay(socket_path=socket_path, queue_path=queue_path) as relay:
+        client = RelayClient(relay.address, fallback=False)
+        client.send(DiscordWebhook("https://webhook", content="a"), wait=True)
+
+    assert len(RelayQueue(queue_path)) == 0
+    contents = sorted(discord.payload(i)[0]["content"] for i in range(2))
+    assert contents == ["a", "b"]
+
+
+def test__relay_client__falls_back_to_direct_send(discord, tmp_path):
+    client = RelayClient(str(tmp_path / "missing.sock"))
+
+    result = client.send(DiscordWebhook("https://webhook", content="a"))
+
+    assert result.ok
+    assert len(discord.requests) == 1
+
+
+def test__relay__rejects_invalid_priority(discord, tmp_path):
+    queue_path = str(tmp_path / "relay.db")
+    with Relay(port=0, queue_path=queue_path) as relay:
+        client = RelayClient(relay.address, fallback=False)
+        for priority in ["high", None, 1.5, 99]:
+            data = {"url": "https://webhook", "payload": {}, "priority": priority}
+            status, body = client._post(client._connect(), data)
+            assert status == 400
+        result = client.send(DiscordWebhook("https://webhook", content="a"), wait=True)
+
+    assert result.ok
+    assert len(RelayQueue(queue_path)) == 0
+
+
+def test__relay_client__does_not_fall_back_after_sending(discord):
+    server = socket.create_server(("127.0.0.1", 0))
+    host, port = server.getsockname()
+    client = RelayClient(f"http://{host}:{port}", timeout=0.1)
+
+    with server, pytest.raises(socket.timeout):
+        client.send(DiscordWebhook("https://webhook", content="a"), wait=True)
+
+    assert discord.requests == []
@@ -0,0 +1,74 @@
+import itertools
+
+from discord_webhook import ReportBuilder
+
+
+def test__tables__split_rows_into_messages_within_content_limit():
+    builder = ReportBuilder(["host", "status", "latency"], title="Nightly")
+    rows = [(f"host-{i}", "ok" if i % 7 else "down", f"{i} ms") for i in range(500)]
+
+    pages = list(builder.tables(rows))
+
+    assert len(pages) > 1
+    assert all(len(page) <= 2000 for page in pages)
+    body = [line for page in pages for line in page.splitlines()[4:-1]]
+    assert len(body) == 500
+    assert pages[0].startswith("**Nightly (1)**\n```\nhost")
+    assert pages[1].startswith("**Nightly (2)**")
+
+
+def test__tables__align_columns_and_cut_long_values():
+    builder = ReportBuilder(["name", "value"], max_width=8)
+
+    (page,) = builder.tables([("a", "short"), ("bb", "much too long`\nvalue")])
+
+    assert page.splitlines() == [
+        "```",
+        "name | value",
+        "-----+---------",
+        "a    | short",
+        "bb   | much to…",
+        "```",
+    ]
+
+
+def test__embeds__respect_field_embed_and_character_limits():
+    builder = ReportBuilder(["check", "detail"], title="Checks", style="embed")
+    rows = ((f"check {i}", "x" * 200) for i in range(1000))
+
+    messages = list(builder.embeds(rows))
+
+    fields = [field for embeds in messages for e in embeds for field in e["fields"]]
+    assert len(fields) == 1000
+    for embeds in messages:
+        assert len(embeds) <= 10
+        assert all(len(embed["fields"]) <= 25 for embed in embeds)
+        size = sum(
+            len(embed["title"])
+            + sum(len(f["name"]) + len(f["value"]) for f in embed["fields"])
+            for embed in embeds
+        )
+        assert size <= 6000
+    assert fields[0]["name"] == "check 0"
+    assert fields[0]["value"] == "detail: " + "x" * 200
+
+
+def test__webhooks__are_created_lazily():
+    builder = ReportBuilder(["number"])
+
+    webhooks = builder.webhooks("https://webhook", ([i] for i in itertools.count()))
+    webhook = next(webhooks)
+
+    assert webhook.url == "https://webhook"
+    assert webhook.content.startswith("```\nnumber\n------\n0\n1\n")
+
+
+def test__tables__cut_rows_that_would_not_fit_into_a_message():
+    builder = ReportBuilder([f"column {i}" for i in range(30)], title="Wide")
+    rows = [["x" * 40] * 30, ["y"] * 30]
+
+    pages = list(builder.tables(rows))
+
+    assert all(len(page) <= 2000 for page in pages)
+    # title, fences, header and rule are the other lines of a page
+    assert sum(len(page.splitlines()) - 5 for page in pages) == 2
@@ -0,0 +1,122 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.priority import AsyncPrioritySender
+from discord_webhook.scheduler import (
+    AsyncScheduler,
+    ScheduledMessage,
+    Scheduler,
+    ScheduleQueue,
+)
+
+
+def _entry(key, send_at):
+    message = DiscordWebhook("https://webhook", content=key).prepare()
+    return ScheduledMessage(key, send_at, message, 2, None)
+
+
+def test__schedule_queue__pops_due_messages_in_order():
+    queue = ScheduleQueue()
+    for key, send_at in [("c", 30), ("a", 10), ("b", 20)]:
+        queue.push(_entry(key, send_at))
+
+    due, next_at = queue.pop_due(20)
+
+    assert [entry.key for entry in due] == ["a", "b"]
+    assert next_at == 30
+    assert len(queue) == 1
+
+
+def test__schedule_queue__cancel_and_replace_by_key():
+    queue = ScheduleQueue()
+    queue.push(_entry("a", 10))
+    queue.push(_entry("b", 20))
+    replaced = queue.push(_entry("a", 40))
+
+    assert replaced.cancelled
+    assert queue.cancel("b") is not None
+    assert queue.cancel("b") is None
+    assert queue.pop_due(30) == ([], 40)
+
+
+def test__scheduler__sends_after_delay(discord):
+    with Scheduler() as scheduler:
+        started = time.monotonic()
+        entry = scheduler.schedule(
+            DiscordWebhook("https://webhook", content="later"), delay=0.2
+        )
+        result = entry.future.result(timeout=5)
+
+    assert result.ok
+    assert time.monotonic() - started >= 0.2
+    assert discord.payload(0)[0]["content"] == "later"
+
+
+def test__scheduler__cancel_and_reschedule(discord):
+    with Scheduler() as scheduler:
+        cancelled = scheduler.schedule(
+            DiscordWebhook("https://webhook", content="resolved"),
+            delay=0.2,
+            key="resolve",
+        )
+        assert scheduler.cancel("resolve")
+        moved = scheduler.schedule(
+            DiscordWebhook("https://webhook", content="digest"),
+            at=datetime.now(timezone.utc).timestamp() + 60,
+            key="digest",
+        )
+        assert scheduler.reschedule("digest", delay=0)
+        result = moved.future.result(timeout=5)
+
+    assert cancelled.future.cancelled()
+    assert not scheduler.reschedule("digest", delay=1)
+    assert result.ok
+    assert len(discord.requests) == 1
+    assert discord.payload(0)[0]["content"] == "digest"
+
+
+def test__scheduler__close_cancels_pending_messages(discord):
+    scheduler = Scheduler()
+    entry = scheduler.schedule(DiscordWebhook("https://webhook"), delay=60)
+
+    scheduler.close()
+
+    assert entry.future.cancelled()
+    assert len(discord.requests) == 0
+
+
+def test__async_scheduler():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"id": str(len(calls))})
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            sender = AsyncPrioritySender(client=client)
+            async with AsyncScheduler(sender) as scheduler:
+                first = scheduler.schedule(
+                    DiscordWebhook("https://webhook", content="a"), delay=0.1
+                )
+                second = scheduler.schedule(
+                    DiscordWebhook("https://webhook", content="b"), delay=0.05
+                )
+                scheduler.schedule(
+                    DiscordWebhook("https://webhook", content="c"),
+                    delay=0.01,
+                    key="c",
+                )
+                scheduler.cancel("c")
+                results = await asyncio.gather(first.future, second.future)
+            await sender.close()
+            return results
+
+    results = asyncio.run(main())
+
+    assert [result.id for result in results] == ["2", "1"]
+    assert len(calls) == 2
@@ -0,0 +1,91 @@
+import json
+from types import SimpleNamespace
+
+from discord_webhook import DiscordWebhook
+from discord_webhook.sharding import HashRing, ShardedSender
+from discord_webhook.transport import FakeTransport, TransportResponse
+
+
+class EchoTransport(FakeTransport):
+    """
+    Answers with the content of the message, so the tests can check the
+    payload that arrived in the worker process.
+    """
+
+    def send(self, request):
+        content = json.loads(request.content)["content"]
+        body = json.dumps({"id": f"{request.url[-1]}:{content}"}).encode("utf-8")
+        return TransportResponse(200, {}, body, request.url)
+
+
+def test__hash_ring__is_consistent_and_balanced():
+    ring = HashRing(4)
+    urls = [f"https://webhook/{i}" for i in range(4000)]
+
+    shards = ring.split(urls)
+
+    assert all(ring.shard(url) == HashRing(4).shard(url) for url in urls[:50])
+    assert sorted(shards) == [0, 1, 2, 3]
+    assert all(800 < len(shard_urls) < 1200 for shard_urls in shards.values())
+
+
+def test__hash_ring__moves_few_urls_when_shards_are_added():
+    urls = [f"https://webhook/{i}" for i in range(2000)]
+    before, after = HashRing(4), HashRing(5)
+
+    moved = sum(before.shard(url) != after.shard(url) for url in urls)
+
+    assert moved < len(urls) * 0.35
+
+
+def test__sharded_sender__broadcast():
+    urls = [f"https://webhook/{i}" for i in range(10)]
+    webhook = DiscordWebhook("https://ignored", content="hello")
+
+    sender = ShardedSender(processes=2, threads=2, transport_factory=EchoTransport)
+    with sender:
+        results = list(sender.broadcast(webhook, urls))
+        again = list(sender.broadcast(webhook, urls[:3]))
+
+    assert sorted(result.url for result in results) == urls
+    assert all(result.ok for result in results)
+    assert {result.id for result in results} == {f"{i}:hello" for i in range(10)}
+    assert len(again) == 3
+
+
+def test__sharded_sender__abandoned_broadcast():
+    urls = [f"https://webhook/{i}" for i in range(40)]
+    webhook = DiscordWebhook("https://ignored", content="hello")
+
+    sender = ShardedSender(processes=4, threads=2, transport_factory=EchoTransport)
+    with sender:
+        abandoned = sender.broadcast(webhook, urls)
+        next(abandoned)
+        # a broadcast that isn't consumed doesn't block the others
+        overlapping = list(sender.broadcast(webhook, urls[:5]))
+        abandoned.close()
+        again = list(sender.broadcast(webhook, urls))
+
+    assert len(overlapping) == 5
+    assert sorted(result.url for result in again) == sorted(urls)
+    assert all(result.ok for result in again)
+    assert sender._segments == {}
+
+
+def test__sharded_sender__dispatches_without_iterating():
+    webhook = DiscordWebhook(
+        "https://ignored", content="hello", proxies={"https": "http://proxy:3128"}
+    )
+    sender = ShardedSender(processes=1, threads=1, transport_factory=EchoTransport)
+    # keep the task from the worker to see what broadcast queued
+    captured, tasks = [], sender._tasks[0]
+    sender._tasks[0] = SimpleNamespace(put=captured.append)
+
+    sender.broadcast(webhook, ["https://webhook/1"])
+
+    sender._tasks[0] = tasks
+    sender.close()
+    ((_, _, _, meta, urls),) = captured
+    assert urls == ["https://webhook/1"]
+    assert meta["proxies"] == (("https", "http://proxy:3128"),)
+    assert sender._segments == {}
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from discord_webhook import (
+    AsyncDiscordWebhook,
+    AsyncFakeTransport,
+    DiscordWebhook,
+    FakeTransport,
+    ThreadResolver,
+)
+from discord_webhook.transport import TransportResponse
+
+URL = "https://webhook"
+
+
+class ForumTransport(FakeTransport):
+    """
+    Creates a thread for every message with a thread_name.
+    """
+
+    def __init__(self, delay=None):
+        super().__init__()
+        self.created = 0
+        self.delay = delay
+
+    def send(self, request):
+        self.requests.append(request)
+        if b"thread_name" in request.content:
+            if self.delay is not None:
+                self.delay.wait(1)
+            self.created += 1
+            channel_id = f"thread-{self.created}"
+        else:
+            channel_id = dict(request.params)["thread_id"]
+        body = f'{{"id": "{len(self.requests)}", "channel_id": "{channel_id}"}}'
+        return TransportResponse(200, {}, body.encode(), request.url)
+
+
+def test__thread_resolver__creates_thread_once():
+    transport = ForumTransport()
+    resolver = ThreadResolver(transport=transport)
+
+    for number in range(3):
+        webhook = DiscordWebhook(URL, content=f"update {number}")
+        resolver.execute(webhook, thread_name="incident-1")
+
+    assert transport.created == 1
+    assert [dict(r.params).get("thread_id") for r in transport.requests] == [
+        None,
+        "thread-1",
+        "thread-1",
+    ]
+    assert webhook.thread_id == "thread-1"
+    assert resolver.get(URL, "incident-1") == "thread-1"
+
+
+def test__thread_resolver__queues_messages_during_creation():
+    release = threading.Event()
+    transport = ForumTransport(delay=release)
+    resolver = ThreadResolver(transport=transport)
+    results = []
+
+    def send(number):
+        webhook = DiscordWebhook(URL, content=f"{number}", thread_name="incident")
+        results.append(resolver.send(webhook))
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert transport.created == 1
+    assert {result.channel_id for result in results} == {"thread-1"}
+
+
+def test__thread_resolver__recreates_deleted_thread(tmp_path):
+    path = str(tmp_path / "threads.json")
+    ThreadResolver(path=path).set(URL, "incident", "gone")
+    transport = ForumTransport()
+    original = transport.send
+
+    def send(request):
+        if dict(request.params).get("thread_id") == "gone":
+            transport.requests.append(request)
+            return TransportResponse(404, {}, b'{"message": "Unknown Channel"}')
+        return original(request)
+
+    transport.send = send
+    resolver = ThreadResolver(path=path, transport=transport)
+
+    result = resolver.send(DiscordWebhook(URL, content="hi"), thread_name="incident")
+
+    assert result.channel_id == "thread-1"
+    assert ThreadResolver(path=path).get(URL, "incident") == "thread-1"
+
+
+def test__thread_resolver__async():
+    transport = AsyncFakeTransport()
+    transport.queue(200, {"id": "1", "channel_id": "thread-1"})
+    resolver = ThreadResolver(transport=transport)
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                resolver.execute_async(
+                    AsyncDiscordWebhook(URL, content=str(i)), thread_name="incident"
+                )
+                for i in range(3)
+            )
+        )
+
+    asyncio.run(run())
+
+    names = [b"thread_name" in r.content for r in transport.requests]
+    assert names == [True, False, False]
+    assert {dict(r.params).get("thread_id") for r in transport.requests[1:]} == {
+        "thread-1"
+    }
@@ -0,0 +1,161 @@
+import asyncio
+import json
+from http.client import HTTPException
+
+import httpx
+import pytest
+
+from discord_webhook import (
+    AsyncDiscordWebhook,
+    AsyncFakeTransport,
+    DiscordWebhook,
+    FakeTransport,
+    HttpxTransport,
+    Urllib3Transport,
+)
+from discord_webhook.transport import AsyncTransport, Request, Transport
+
+RATE_LIMITED = {"retry_after": 0.01}
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    async def sleep(seconds):
+        pass
+
+    monkeypatch.setattr("discord_webhook.transport.time.sleep", lambda seconds: None)
+    monkeypatch.setattr("discord_webhook.transport.asyncio.sleep", sleep)
+
+
+def test__execute__builds_request_without_changing_files():
+    transport = FakeTransport()
+    transport.queue(200, {"id": "42", "attachments": [{"filename": "a.txt"}]})
+    webhook = DiscordWebhook("https://webhook", content="hi", transport=transport)
+    webhook.add_file(b"a", "a.txt")
+    files = dict(webhook.files)
+
+    webhook._request()
+
+    assert webhook.files == files
+    webhook.execute()
+    request = transport.requests[0]
+    assert request.method == "POST"
+    assert request.params == (("wait", "True"),)
+    assert b'filename="a.txt"' in request.content
+    assert webhook.id == "42"
+    assert webhook.attachments == [{"filename": "a.txt"}]
+
+
+def test__delete__retries_when_rate_limited():
+    transport = FakeTransport()
+    transport.queue(429, RATE_LIMITED, {"Via": "1.1 google"})
+    transport.queue(204)
+    webhook = DiscordWebhook(
+        "https://webhook", id="1", thread_id="7", rate_limit_retry=True
+    )
+    webhook.transport = transport
+
+    response = webhook.delete()
+
+    assert response.status_code == 204
+    assert [r.method for r in transport.requests] == ["DELETE", "DELETE"]
+    assert transport.requests[0].full_url == (
+        "https://webhook/messages/1?thread_id=7&wait=True"
+    )
+
+
+def test__rate_limit_without_via_header__raises():
+    transport = FakeTransport()
+    transport.queue(429, RATE_LIMITED)
+    webhook = DiscordWebhook(
+        "https://webhook", content="hi", rate_limit_retry=True, transport=transport
+    )
+
+    with pytest.raises(HTTPException):
+        webhook.execute()
+
+
+def test__async_webhook__restores_attachments_and_retries_delete():
+    transport = AsyncFakeTransport()
+    transport.queue(200, {"id": "5", "attachments": [{"filename": "a.txt"}]})
+    transport.queue(429, RATE_LIMITED, {"Via": "1.1 google"})
+    transport.queue(204)
+    webhook = AsyncDiscordWebhook(
+        "https://webhook", rate_limit_retry=True, transport=transport
+    )
+    webhook.add_file(b"a", "a.txt")
+
+    async def run():
+        await webhook.execute()
+        return await webhook.delete()
+
+    response = asyncio.run(run())
+
+    assert webhook.attachments == [{"filename": "a.txt"}]
+    assert response.status_code == 204
+    assert [r.method for r in transport.requests] == ["POST", "DELETE", "DELETE"]
+
+
+def test__async_webhook__file_sources_are_streamed_by_transport(tmp_path):
+    path = tmp_path / "big.log"
+    path.write_bytes(b"line\n" * 1000)
+    transport = AsyncFakeTransport()
+    webhook = AsyncDiscordWebhook("https://webhook", transport=transport)
+    webhook.add_file_from_path(path)
+
+    asyncio.run(webhook.execute())
+
+    assert b"line\n" * 1000 in transport.requests[0].content
+
+
+def test__httpx_transport__sends_request():
+    received = []
+
+    def handler(request):
+        received.append(request)
+        return httpx.Response(200, json={"id": "3"})
+
+    transport = HttpxTransport(httpx.Client(transport=httpx.MockTransport(handler)))
+    webhook = DiscordWebhook("https://webhook", content="hi", transport=transport)
+
+    webhook.execute()
+
+    assert webhook.id == "3"
+    assert json.loads(received[0].content)["content"] == "hi"
+    assert received[0].url.params["wait"] == "True"
+
+
+def test__urllib3_transport__wraps_response():
+    class PoolManager:
+        def request(self, method, url, **kwargs):
+            self.call = (method, url, kwargs)
+            return type(
+                "Response",
+                (),
+                {"status": 200, "headers": {"X-Test": "1"}, "data": b'{"id": "9"}'},
+            )
+
+    pool_manager = PoolManager()
+    transport = Urllib3Transport(pool_manager)
+
+    response = transport.send(
+        Request("POST", "https://webhook", params=(("wait", "True"),), content=b"{}")
+    )
+
+    assert pool_manager.call[1] == "https://webhook?wait=True"
+    assert pool_manager.call[2]["retries"] is False
+    assert response.json() == {"id": "9"}
+    assert response.headers["x-test"] == "1"
+
+
+def test__transports__subclasses_must_implement_send():
+    class Incomplete(Transport):
+        pass
+
+    class AsyncIncomplete(AsyncTransport):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    with pytest.raises(TypeError):
+        AsyncIncomplete()
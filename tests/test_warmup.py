@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import httpx
+import requests
+
+from discord_webhook import AsyncDiscordWebhook, DiscordWebhook
+from discord_webhook.warmup import AsyncConnectionWarmer, ConnectionWarmer
+
+URL = "https://localhost/api/v10/gateway"
+
+
+def test__warm_up__opens_connections(discord):
+    with ConnectionWarmer(url=URL, connections=3):
+        assert len(discord.requests) == 3
+        assert {method for method, _, _ in discord.requests} == {"HEAD"}
+
+
+def test__warm_up__keeps_connections_warm(discord):
+    warmer = ConnectionWarmer(url=URL, connections=1, keep_warm_interval=0.01)
+
+    warmer.start()
+    time.sleep(0.1)
+    warmer.close()
+
+    assert len(discord.requests) > 2
+
+
+def test__webhook__uses_session(discord, monkeypatch):
+    session = requests.Session()
+    sessions = []
+    request = requests.Session.request
+    monkeypatch.setattr(
+        requests.Session,
+        "request",
+        lambda self, *args, **kwargs: (
+            sessions.append(self) or request(self, *args, **kwargs)
+        ),
+    )
+
+    DiscordWebhook("https://webhook", content="hi", session=session).execute()
+
+    assert sessions == [session]
+    assert "session" not in DiscordWebhook("https://webhook", session=session).json
+
+
+def test__async_warm_up__uses_client():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(200, json={"id": "1"})
+
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncConnectionWarmer(client, url=URL, connections=2) as warmer:
+            webhook = AsyncDiscordWebhook(
+                "https://webhook", content="hi", client=warmer.client
+            )
+            await webhook.execute()
+            assert not client.is_closed
+
+    asyncio.run(main())
+
+    assert calls == ["HEAD", "HEAD", "POST"]
+
+
+def test__async_keep_warm__survives_unexpected_errors(monkeypatch):
+    async def main():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: None))
+        warmer = AsyncConnectionWarmer(client, url=URL, keep_warm_interval=0.01)
+        calls = []
+
+        async def warm_up():
+            calls.append(1)
+            raise RuntimeError("unexpected")
+
+        monkeypatch.setattr(warmer, "warm_up", warm_up)
+        warmer._task = asyncio.create_task(warmer._run())
+        await asyncio.sleep(0.1)
+        await warmer.aclose()
+        return calls
+
+    assert len(asyncio.run(main())) > 2